@@ -0,0 +1,152 @@
+"""End-to-end load test against a local provider stub.
+
+Runs wxdat in-process with thousands of simulated stations, spread across all of
+the providers and served by the stub server (see stubserver.py).  Reports the
+rate of observations recorded, the fraction of update cycles that overran their
+interval, peak memory and database write throughput.
+
+    python benchmarks/loadtest.py --stations 2000 --duration 60 --interval 10
+    python benchmarks/loadtest.py --stations 500 --latency 0.5 --error-rate 0.02
+
+By default, the process-wide one request per second limit on provider calls is
+bypassed, since it would otherwise cap the whole run at 1 obs/sec; use
+--rate-limit to keep it.
+"""
+
+import argparse
+import resource
+import tempfile
+import time
+
+from prometheus_client import REGISTRY
+from stubserver import StubServer
+
+from wxdat import providers
+from wxdat.__main__ import MainApp
+from wxdat.config import AppConfig
+
+
+def station_configs(count):
+    """Return station configs for count simulated stations across all providers."""
+
+    templates = [
+        lambda n: {"provider": "NOAA", "station": f"SIM{n}"},
+        lambda n: {
+            "provider": "AmbientWeather",
+            "app_key": "load",
+            "user_key": f"sim-{n}",
+            "device_id": f"sim-{n}",
+        },
+        lambda n: {"provider": "WUndergroundPWS", "api_key": "load", "station_id": f"SIM{n}"},
+        lambda n: {
+            "provider": "OpenWeatherMap",
+            "api_key": "load",
+            "latitude": n % 90,
+            "longitude": n % 180,
+            "calls_per_minute": 6000,
+        },
+        lambda n: {"provider": "AccuWeather", "api_key": "load", "location": n},
+    ]
+
+    return [{"name": f"sim-{n}", **templates[n % len(templates)](n)} for n in range(count)]
+
+
+def sample_total(name):
+    """Return the sum of all samples of a metric (across labels)."""
+
+    total = 0.0
+
+    for metric in REGISTRY.collect():
+        for sample in metric.samples:
+            if sample.name == name:
+                total += sample.value
+
+    return total
+
+
+def run(args, tmpdir):
+    database = args.database or f"sqlite:///{tmpdir}/loadtest.db"
+
+    config = AppConfig(
+        database=database,
+        update_interval=args.interval,
+        stations=station_configs(args.stations),
+        pipeline={"writers": args.writers, "queue_size": args.queue_size},
+    )
+
+    app = MainApp(config)
+
+    for service in app.services:
+        service.start()
+
+    started = time.perf_counter()
+
+    for obs in app.observers:
+        obs.start()
+
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+
+    app.shutdown(app.config.shutdown_timeout)
+
+    return app, time.perf_counter() - started
+
+
+def report(elapsed, server):
+    readings = sample_total("wxdat_station_readings_total")
+    cycles = sample_total("wxdat_station_cycles_total")
+    overflow = sample_total("wxdat_station_overflow_total")
+    writes = sample_total("wxdat_session_writes_total")
+    commits = sample_total("wxdat_session_commits_total")
+    dropped = sample_total("wxdat_pipeline_dropped_total")
+
+    # ru_maxrss is reported in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"elapsed:             {elapsed:.1f} sec")
+    print(f"observations:        {readings:.0f} ({readings / elapsed:.1f} obs/sec)")
+    print(f"update cycles:       {cycles:.0f}")
+    print(f"cycle overflow:      {overflow:.0f} ({overflow / cycles if cycles else 0:.1%})")
+    print(f"db writes:           {writes:.0f} ({writes / elapsed:.1f} writes/sec)")
+    print(f"db commits:          {commits:.0f} ({commits / elapsed:.1f} commits/sec)")
+    print(f"pipeline dropped:    {dropped:.0f}")
+    print(f"peak memory:         {peak_rss:.1f} MiB")
+    print(f"stub responses:      {dict(sorted(server.responses.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stations", type=int, default=1000, help="number of stations")
+    parser.add_argument("--duration", type=float, default=60, help="run time (sec)")
+    parser.add_argument("--interval", type=int, default=30, help="update interval (sec)")
+    parser.add_argument("--database", default=None, help="database URL (default: temp SQLite)")
+    parser.add_argument("--writers", type=int, default=2, help="database writer threads")
+    parser.add_argument("--queue-size", type=int, default=10000, help="write queue size")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean stub latency (sec)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of HTTP 429")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the 1 req/sec limit")
+    args = parser.parse_args()
+
+    server = StubServer(0, args.latency, args.error_rate, args.throttle_rate)
+    server.endpoints()
+    server.start()
+
+    if not args.rate_limit:
+        providers._rate_limit = lambda: None
+
+    print(f"running {args.stations} stations against {server.url} for {args.duration} sec")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _, elapsed = run(args, tmpdir)
+    finally:
+        server.stop()
+
+    report(elapsed, server)
+
+
+if __name__ == "__main__":
+    main()
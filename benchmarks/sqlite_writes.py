@@ -0,0 +1,114 @@
+"""Measure the sustained rate of saving readings to a SQLite database.
+
+Compares the original save path (default journal, a session and commit per reading
+from each recorder thread, no write lock) with WAL mode and grouped commits from a
+writer pool.
+
+    python benchmarks/sqlite_writes.py --readings 2000 --threads 8
+"""
+
+import argparse
+import contextlib
+import tempfile
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from wxdat.database import CurrentConditions, WeatherDatabase
+from wxdat.observation import WeatherObservation
+from wxdat.pipeline import Writer, WriterPool
+from wxdat.providers import noaa
+
+
+class BaselineDatabase(WeatherDatabase):
+    """Save readings as the original recorder did, for comparison.
+
+    Each reading is merged in its own session and commit, without the SQLite
+    pragmas or the write lock (threads contend for the database lock instead).
+    """
+
+    def __init__(self, url):
+        super().__init__(url, pragmas=None)
+
+        self._write_lock = contextlib.nullcontext()
+
+    def save(self, entry):
+        row = CurrentConditions(**self._rows([entry])[0])
+
+        with self.session() as session:
+            try:
+                session.merge(row)
+                session.commit()
+
+            except SQLAlchemyError:
+                session.rollback()
+                return False
+
+        return True
+
+
+def make_readings(station_id, count):
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+
+    return [
+        WeatherObservation(
+            timestamp=start + timedelta(minutes=idx),
+            provider="NOAA",
+            station_id=station_id,
+            temperature=20.0 + idx % 10,
+            humidity=0.5,
+        )
+        for idx in range(count)
+    ]
+
+
+def run(writer, readings, threads):
+    station = noaa.Station("Benchmark Station", station="KDEN")
+
+    def produce(entries):
+        for entry in entries:
+            writer.submit(station, entry)
+
+    workers = [
+        threading.Thread(target=produce, args=(readings[idx::threads],)) for idx in range(threads)
+    ]
+
+    started = time.perf_counter()
+
+    writer.start()
+
+    for worker in workers:
+        worker.start()
+
+    for worker in workers:
+        worker.join()
+
+    writer.stop()
+
+    return len(readings) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database = BaselineDatabase(f"sqlite:///{tmpdir}/baseline.db")
+        readings = make_readings("baseline", args.readings)
+        baseline = run(Writer(database), readings, args.threads)
+
+        database = WeatherDatabase(f"sqlite:///{tmpdir}/tuned.db")
+        readings = make_readings("tuned", args.readings)
+        tuned = run(WriterPool(database, workers=1), readings, args.threads)
+
+    print(f"baseline (rollback journal, per-reading commit): {baseline:10.1f} readings/sec")
+    print(f"tuned (WAL, single writer, grouped commits):     {tuned:10.1f} readings/sec")
+    print(f"speedup: {tuned / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Local HTTP server emulating the weather provider APIs.
+
+Responses are seeded from the test cassettes.  Each provider is served under its
+own path prefix; use `endpoints()` to point the provider modules at the server.
+Latency, server errors and rate limit (429) responses can be injected to see how
+wxdat behaves when providers are slow or unreliable.
+
+    python benchmarks/stubserver.py --port 8700 --latency 0.2 --error-rate 0.01
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import yaml
+
+CASSETTES = Path(__file__).parent.parent / "tests" / "cassettes"
+
+# use the C loader when available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# path prefix => cassette used to seed responses
+ROUTES = {
+    "/noaa/": "test_noaa_conditions[KDEN].yaml",
+    "/ambient/": "ambientwx_device.yaml",
+    "/wunderground/": "test_wunderground_conditions.yaml",
+    "/openweather/": "test_openweather_conditions.yaml",
+    "/accuweather/": "test_accuweather_conditions.yaml",
+}
+
+
+def load_body(name):
+    """Return the decoded body of the first successful response in the cassette."""
+
+    with open(CASSETTES / name) as fp:
+        cassette = yaml.load(fp, Loader=YAML_LOADER)
+
+    for interaction in cassette["interactions"]:
+        response = interaction["response"]
+
+        if response["status"]["code"] == 200:
+            return json.loads(response["body"]["string"])
+
+    raise ValueError(f"no successful response in cassette: {name}")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+
+        if server.latency > 0:
+            time.sleep(random.uniform(0.5, 1.5) * server.latency)
+
+        roll = random.random()
+
+        if roll < server.error_rate:
+            self._send(500, {"error": "stub server error"})
+            return
+
+        if roll < server.error_rate + server.throttle_rate:
+            self._send(429, {"error": "stub rate limit"})
+            return
+
+        url = urlparse(self.path)
+
+        for prefix, body in server.bodies.items():
+            if url.path.startswith(prefix):
+                self._send(200, self._customize(prefix, body, parse_qs(url.query)))
+                return
+
+        self._send(404, {"error": "unknown endpoint"})
+
+    def _customize(self, prefix, body, query):
+        # each simulated account has a single device, addressed by its user key (the
+        # cassette holds readings from the single device endpoint, without the device)
+        if prefix == "/ambient/":
+            device_id = query.get("apiKey", ["stub"])[0]
+            return [{"macAddress": device_id, "lastData": reading} for reading in body[:1]]
+
+        return body
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+        with self.server.lock:
+            self.server.responses[status] = self.server.responses.get(status, 0) + 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Serve provider responses from the cassettes."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, throttle_rate=0.0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+
+        self.bodies = {prefix: load_body(name) for prefix, name in ROUTES.items()}
+
+        self.lock = threading.Lock()
+        self.responses = {}
+
+        self.thread = threading.Thread(name="stub-server", target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def endpoints(self):
+        """Point the provider modules at this server."""
+
+        from wxdat.providers import accuweather, ambientwx, noaa, openweather, wunderground
+
+        noaa.API_BASE = f"{self.url}/noaa"
+        ambientwx.API_ENDPOINT = f"{self.url}/ambient"
+        wunderground.API_ENDPOINT = f"{self.url}/wunderground/current"
+        openweather.API_CURRENT_WX = f"{self.url}/openweather/weather"
+        accuweather.API_CURRENT_WX = f"{self.url}/accuweather"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response delay (sec)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of HTTP 429")
+    args = parser.parse_args()
+
+    server = StubServer(args.port, args.latency, args.error_rate, args.throttle_rate)
+
+    print(f"serving provider stubs at {server.url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Microbenchmarks for provider parsing, unit conversion and persistence.
+
+Provider responses are taken from the test cassettes, so no network access is
+needed.  For each operation, reports the sustained rate and the memory allocated
+while running it (peak per call and retained after many calls).
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --save baseline.json
+    python benchmarks/suite.py --compare baseline.json --threshold 0.2
+
+When comparing, the exit status is non-zero if any operation is slower than the
+baseline by more than the threshold (a fraction of its ops/sec).
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import yaml
+
+from wxdat.database import WeatherDatabase
+from wxdat.metrics import WeatherConditionMetrics
+from wxdat.providers import accuweather, ambientwx, noaa, openweather, wunderground
+
+CASSETTES = Path(__file__).parent.parent / "tests" / "cassettes"
+
+# use the C loader when available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_cassette(name):
+    """Return the decoded body of the first successful response in the cassette."""
+
+    with open(CASSETTES / name) as fp:
+        cassette = yaml.load(fp, Loader=YAML_LOADER)
+
+    for interaction in cassette["interactions"]:
+        response = interaction["response"]
+
+        if response["status"]["code"] == 200:
+            return json.loads(response["body"]["string"])
+
+    raise ValueError(f"no successful response in cassette: {name}")
+
+
+def provider_cases():
+    """Return (name, station, validate) for each provider.
+
+    validate parses the API response into the provider models and returns the value
+    the station expects from _api_get_current_weather().
+    """
+
+    noaa_data = load_cassette("test_noaa_conditions[KDEN].yaml")
+    accu_data = load_cassette("test_accuweather_conditions.yaml")
+    # recorded from the single device endpoint; wrapped as a /devices response
+    ambient_data = [
+        {"macAddress": "98:CD:AC:22:F4:07", "lastData": reading}
+        for reading in load_cassette("ambientwx_device.yaml")
+    ]
+    owm_data = load_cassette("test_openweather_conditions.yaml")
+    wu_data = load_cassette("test_wunderground_conditions.yaml")
+
+    return [
+        (
+            "noaa",
+            noaa.Station("Benchmark NOAA", station="KDEN"),
+            lambda: noaa.API_Observation.model_validate(noaa_data),
+        ),
+        (
+            "accuweather",
+            accuweather.Station("Benchmark AccuWeather", api_key="bench", location=2207713),
+            lambda: accuweather.API_Observations.validate_python(accu_data)[0],
+        ),
+        (
+            "ambientwx",
+            ambientwx.Station(
+                "Benchmark Ambient",
+                app_key="bench",
+                user_key="bench",
+                device_id=ambient_data[0]["macAddress"],
+            ),
+            lambda: ambientwx.API_DeviceList.validate_python(ambient_data)[0].lastData,
+        ),
+        (
+            "openweather",
+            openweather.Station("Benchmark OpenWeather", api_key="bench", latitude=0, longitude=0),
+            lambda: openweather.API_CurrentWeather.model_validate(owm_data),
+        ),
+        (
+            "wunderground",
+            wunderground.Station("Benchmark WUnderground", api_key="bench", station_id="KDEN"),
+            lambda: wunderground.API_Current.model_validate(wu_data).observations[0],
+        ),
+    ]
+
+
+def measure(func, min_time=0.5, mem_calls=100):
+    """Return (ops/sec, peak bytes per call, retained bytes per call) for func."""
+
+    # warm up (and let caches settle) before timing
+    for _ in range(10):
+        func()
+
+    calls = 0
+    started = time.perf_counter()
+
+    while (elapsed := time.perf_counter() - started) < min_time:
+        for _ in range(10):
+            func()
+
+        calls += 10
+
+    rate = calls / elapsed
+
+    tracemalloc.start()
+
+    try:
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+
+        before, _ = tracemalloc.get_traced_memory()
+
+        for _ in range(mem_calls):
+            func()
+
+        after, _ = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    return rate, peak, (after - before) / mem_calls
+
+
+def benchmarks(tmpdir):
+    """Yield (name, func) for each benchmark."""
+
+    for name, station, validate in provider_cases():
+        weather = validate()
+
+        # observe() using the parsed response, to time the conversion alone
+        station._api_get_current_weather = lambda weather=weather: weather
+
+        yield f"{name}.validate", validate
+        yield f"{name}.observe", lambda station=station: station.observe
+
+    station = noaa.Station("Benchmark Station", station="KDEN")
+    weather = noaa.API_Observation.model_validate(load_cassette("test_noaa_conditions[KDEN].yaml"))
+    station._api_get_current_weather = lambda: weather
+
+    obs = station.observe
+
+    metrics = WeatherConditionMetrics(station)
+    yield "metrics.update", lambda: metrics.update(obs)
+
+    database = WeatherDatabase(f"sqlite:///{tmpdir}/bench.db")
+
+    # each save needs a new reading, so this includes the conversion
+    yield "database.save", lambda: database.save(station.observe)
+
+
+def compare(results, baseline, threshold):
+    """Return the names of operations slower than the baseline by more than threshold."""
+
+    slower = []
+
+    for name, result in results.items():
+        previous = baseline.get(name)
+
+        if previous is None:
+            continue
+
+        if result["ops_per_sec"] < previous["ops_per_sec"] * (1 - threshold):
+            slower.append(name)
+
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    parser.add_argument("--filter", default=None, help="only run benchmarks containing this")
+    parser.add_argument("--save", default=None, help="save results to a JSON file")
+    parser.add_argument("--compare", default=None, help="compare to results in a JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+
+    print(f"{'benchmark':<26} {'ops/sec':>12} {'peak KiB':>10} {'retained B':>11}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, func in benchmarks(tmpdir):
+            if args.filter is not None and args.filter not in name:
+                continue
+
+            rate, peak, retained = measure(func, min_time=args.min_time)
+
+            results[name] = {"ops_per_sec": rate, "peak_bytes": peak, "retained_bytes": retained}
+
+            print(f"{name:<26} {rate:>12.1f} {peak / 1024:>10.1f} {retained:>11.1f}")
+
+    if args.save is not None:
+        with open(args.save, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+
+        slower = compare(results, baseline, args.threshold)
+
+        for name in slower:
+            print(f"REGRESSION: {name} is more than {args.threshold:.0%} slower than baseline")
+
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 import logging
 import signal
+import time
 
 import click
 from prometheus_client import start_http_server
@@ -12,56 +13,403 @@ from .recorder import DataRecorder
 
 logger = logging.getLogger(__name__)
 
+# config fields that are applied when reloading; others require a restart
+RELOAD_FIELDS = {
+    "stations",
+    "inventory",
+    "credentials",
+    "update_interval",
+    "adaptive",
+    "logging",
+    "shutdown_timeout",
+}
+
 
 class MainApp:
     """Context used during main execution."""
 
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, loader=None):
         self.logger = logger.getChild("MainApp")
 
         self.config = config
 
-        self._initialize_database(config.database)
+        # returns the current AppConfig when reloading (e.g. from the config file)
+        self.loader = loader
+        self._reload_requested = False
+
+        self._initialize_database(config)
+        self._initialize_partitions(config.partitions)
+        self._initialize_archive(config.archive)
+        self._initialize_compactor(config.compact)
+        self._initialize_spool(config.spool)
+        self._initialize_writer(config.pipeline)
+        self._initialize_cluster(config)
         self._initialize_observers(config)
-        self._initialize_metrics(config.metrics)
+        self._initialize_metrics(config.metrics, profiling=config.profiling)
 
     def _initialize_observers(self, config: AppConfig):
-        self.observers = []
+        self.recorders = {}
+        self._station_settings = {}
 
         for station_cfg in config.stations:
             self.logger.info("Initializing observer: %s", station_cfg.name)
 
-            station = station_cfg.initialize()
-            interval = station_cfg.update_interval or config.update_interval
-            recorder = DataRecorder(station, self.database, interval)
-            self.observers.append(recorder)
+            self.recorders[station_cfg.name] = self._create_recorder(station_cfg, config)
+            self._station_settings[station_cfg.name] = self._settings(station_cfg, config)
 
-    def _initialize_database(self, dburl):
-        from .database import WeatherDatabase
+    def _settings(self, station_cfg, config: AppConfig):
+        """Return the effective settings of a station, for detecting changes on reload."""
+        return (station_cfg, config.update_interval, config.adaptive)
+
+    def _create_recorder(self, station_cfg, config: AppConfig):
+        station = station_cfg.create()
+        interval = station_cfg.update_interval or config.update_interval
+
+        adaptive = station_cfg.adaptive
+        if adaptive is None:
+            adaptive = config.adaptive
+
+        return DataRecorder(
+            station,
+            self.writer,
+            interval,
+            leases=self.leases,
+            adaptive=adaptive,
+            deadline=station_cfg.deadline,
+        )
+
+    @property
+    def observers(self):
+        return list(self.recorders.values())
+
+    def _initialize_database(self, config: AppConfig):
+        from .database import open_database
 
         self.logger.info("Initializing weather database session")
-        self.database = WeatherDatabase(dburl)
 
-    def _initialize_metrics(self, port=None):
+        options = {}
+
+        if config.partitions is not None:
+            options["partitioned"] = True
+
+        self.database = open_database(config.database, **options)
+
+        if config.replicas is not None:
+            self._initialize_replicas(config.replicas)
+
+    def _initialize_replicas(self, replica_cfg):
+        from .database import WeatherDatabase
+        from .replicas import ReplicaSet
+
+        if not isinstance(self.database, WeatherDatabase):
+            raise ValueError("read replicas require a SQL database")
+
+        self.logger.info("Initializing %d read replicas", len(replica_cfg.urls))
+
+        self.database.replicas = ReplicaSet(
+            self.database.engine,
+            replica_cfg.urls,
+            max_lag=replica_cfg.max_lag,
+            check_interval=replica_cfg.check_interval,
+        )
+
+    def _initialize_partitions(self, partition_cfg):
+        from .database import WeatherDatabase
+        from .partition import PartitionManager
+
+        if partition_cfg is None:
+            self.logger.debug("partitioning disabled by config")
+            self.partitions = None
+            return
+
+        if not isinstance(self.database, WeatherDatabase):
+            raise ValueError("partitioning requires a SQL database")
+
+        self.logger.info("Initializing partition manager")
+
+        self.partitions = PartitionManager(
+            self.database,
+            months_ahead=partition_cfg.months_ahead,
+            retention=partition_cfg.retention,
+            interval=partition_cfg.interval,
+        )
+
+        # partitions must exist before the first reading is saved
+        self.partitions.run_task()
+
+    def _initialize_archive(self, archive_cfg):
+        from .archive import Archive, Archiver
+        from .database import WeatherDatabase
+
+        if archive_cfg is None:
+            self.logger.debug("archive disabled by config")
+            self.archiver = None
+            return
+
+        if not isinstance(self.database, WeatherDatabase):
+            raise ValueError("archive requires a SQL database")
+
+        self.logger.info("Initializing archive: %s", archive_cfg.path)
+
+        self.database.archive = Archive(archive_cfg.path)
+
+        self.archiver = Archiver(
+            self.database,
+            self.database.archive,
+            max_age=archive_cfg.max_age,
+            batch_size=archive_cfg.batch_size,
+            interval=archive_cfg.interval,
+        )
+
+    def _initialize_compactor(self, compact_cfg):
+        from .compact import Compactor
+        from .database import WeatherDatabase
+
+        if compact_cfg is None:
+            self.logger.debug("compaction disabled by config")
+            self.compactor = None
+            return
+
+        if not isinstance(self.database, WeatherDatabase):
+            raise ValueError("compaction requires a SQL database")
+
+        self.logger.info("Initializing compactor: %d tiers", len(compact_cfg.tiers))
+
+        self.compactor = Compactor(
+            self.database,
+            tiers=[(tier.after, tier.resolution) for tier in compact_cfg.tiers],
+            batch_size=compact_cfg.batch_size,
+            pause=compact_cfg.pause,
+            interval=compact_cfg.interval,
+        )
+
+    def _initialize_spool(self, spool_cfg):
+        from .spool import Spool
+
+        if spool_cfg is None:
+            self.logger.debug("local spool disabled by config")
+            self.spool = None
+            return
+
+        self.logger.info("Initializing local spool: %s", spool_cfg.path)
+
+        self.spool = Spool(
+            self.database,
+            path=spool_cfg.path,
+            max_entries=spool_cfg.max_entries,
+            batch_size=spool_cfg.batch_size,
+            interval=spool_cfg.replay_interval,
+        )
+
+    def _initialize_writer(self, pipeline_cfg):
+        from .pipeline import Writer, WriterPool
+
+        if pipeline_cfg is None:
+            self.logger.debug("writer pool disabled by config")
+            self.writer = Writer(self.database, self.spool)
+            return
+
+        self.logger.info("Initializing writer pool: %d writers", pipeline_cfg.writers)
+
+        self.writer = WriterPool(
+            self.database,
+            self.spool,
+            workers=pipeline_cfg.writers,
+            queue_size=pipeline_cfg.queue_size,
+            policy=pipeline_cfg.policy,
+            block_timeout=pipeline_cfg.block_timeout,
+            batch_size=pipeline_cfg.batch_size,
+        )
+
+    def _initialize_cluster(self, config: AppConfig):
+        from .cluster import LeaseManager
+        from .database import WeatherDatabase
+
+        if config.cluster is None:
+            self.logger.debug("cluster mode disabled by config")
+            self.leases = None
+            return
+
+        # leases are shared between nodes through the SQL database
+        if not isinstance(self.database, WeatherDatabase):
+            raise ValueError("cluster mode requires a SQL database")
+
+        self.logger.info("Initializing cluster leases")
+
+        self.leases = LeaseManager(
+            self.database,
+            [station.name for station in config.stations],
+            node_id=config.cluster.node_id,
+            heartbeat=config.cluster.heartbeat,
+            ttl=config.cluster.lease_ttl,
+        )
+
+    def _initialize_metrics(self, port=None, profiling=False):
         if port is None:
             self.logger.debug("metrics server disabled by config")
+        elif profiling:
+            from .profiling import start_debug_server
+
+            self.logger.info("Initializing app metrics with profiling: %d", port)
+            start_debug_server(port)
         else:
             self.logger.info("Initializing app metrics: %d", port)
             start_http_server(port)
 
+    @property
+    def services(self):
+        """Return the background services in the order they are started."""
+
+        services = [
+            self.spool,
+            self.writer,
+            self.partitions,
+            self.archiver,
+            self.compactor,
+            self.leases,
+        ]
+
+        return [service for service in services if service is not None]
+
+    def reload(self, config: AppConfig):
+        """Apply station changes from the given config to the running app.
+
+        Only stations that were added, removed or changed are started or stopped;
+        other recorders, the database and background services keep running.
+        """
+
+        for field in AppConfig.model_fields:
+            if field not in RELOAD_FIELDS and getattr(config, field) != getattr(self.config, field):
+                self.logger.warning("ignoring change to '%s'; restart to apply", field)
+
+        stations = {station_cfg.name: station_cfg for station_cfg in config.stations}
+
+        removed = [name for name in self.recorders if name not in stations]
+        changed = [
+            name
+            for name, station_cfg in stations.items()
+            if name in self.recorders
+            and self._settings(station_cfg, config) != self._station_settings[name]
+        ]
+        added = [name for name in stations if name not in self.recorders]
+
+        self.logger.info(
+            "reloading stations: %d added, %d changed, %d removed",
+            len(added),
+            len(changed),
+            len(removed),
+        )
+
+        for name in removed + changed:
+            self.logger.info("Stopping observer: %s", name)
+            self.recorders.pop(name).stop()
+            del self._station_settings[name]
+
+        if self.leases is not None:
+            self.leases.stations = list(stations)
+
+        for name in changed + added:
+            self.logger.info("Initializing observer: %s", name)
+
+            recorder = self._create_recorder(stations[name], config)
+            recorder.start()
+
+            self.recorders[name] = recorder
+            self._station_settings[name] = self._settings(stations[name], config)
+
+        self.config = self.config.model_copy(
+            update={field: getattr(config, field) for field in RELOAD_FIELDS}
+        )
+
+    def _request_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _reload_from_loader(self):
+        self._reload_requested = False
+
+        try:
+            config = self.loader()
+        except Exception:
+            self.logger.exception("Unable to reload config; keeping current stations")
+            return
+
+        self.reload(config)
+
     def __call__(self):
         self.logger.debug("Starting main app")
 
+        for service in self.services:
+            service.start()
+
         for obs in self.observers:
             obs.start()
 
+        if self.loader is not None:
+            signal.signal(signal.SIGHUP, self._request_reload)
+
+        # treat SIGTERM (e.g. from Kubernetes) the same as an interrupt
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
         try:
-            signal.pause()
+            while True:
+                signal.pause()
+
+                if self._reload_requested:
+                    self._reload_from_loader()
+
         except KeyboardInterrupt:
             self.logger.debug("canceled by user")
 
+        # shutdown is already bounded; don't let another signal interrupt it
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+        self.shutdown(self.config.shutdown_timeout)
+
+    def shutdown(self, timeout):
+        """Stop recorders and services within timeout seconds.
+
+        All recorders are signaled at once, so they stop in parallel.  Readings
+        that could not be saved in time are spooled (if configured) or dropped.
+        Returns True if all pending work was completed.
+        """
+
+        self.logger.info("Shutting down; timeout %f sec", timeout)
+
+        started = time.monotonic()
+        deadline = started + timeout
+
+        def remaining():
+            return max(deadline - time.monotonic(), 0)
+
         for obs in self.observers:
-            obs.stop()
+            obs.cancel()
+
+        abandoned = [obs.station.name for obs in self.observers if not obs.join(remaining())]
+
+        dropped = 0
+
+        # stop in reverse order, so the spool remains available until writers finish
+        for service in reversed(self.services):
+            if service is self.writer:
+                dropped = self.writer.stop(timeout=remaining())
+            else:
+                service.stop(timeout=remaining())
+
+        if self.spool is not None:
+            self.spool.close()
+
+        if abandoned:
+            self.logger.warning(
+                "%d recorders did not stop in time: %s", len(abandoned), ", ".join(abandoned)
+            )
+
+        if dropped:
+            self.logger.warning("%d pending readings were dropped", dropped)
+
+        self.logger.info("Shutdown complete in %f sec", time.monotonic() - started)
+
+        return not abandoned and not dropped
 
 
 @click.command()
@@ -74,7 +422,12 @@ class MainApp:
 def main(config):
     cfg = AppConfig.load(config)
 
-    app = MainApp(cfg)
+    if cfg.workers is None:
+        app = MainApp(cfg, loader=lambda: AppConfig.load(config))
+    else:
+        from .supervisor import Supervisor
+
+        app = Supervisor(cfg, config_file=config)
 
     app()
 
@@ -0,0 +1,207 @@
+"""Tiered archival of old readings to Parquet files.
+
+Readings older than a configured age are moved out of the database into Parquet
+files partitioned by station and month:
+
+    <path>/<provider>/<station_id>/<YYYY-MM>/part-<first_id>-<last_id>.parquet
+
+Each batch is written to the archive before it is deleted from the database, so an
+interrupted batch is archived again (under the same file name) on the next run.
+
+Requires the optional pyarrow package (`pip install wxdat[archive]`).
+"""
+
+import logging
+import os
+import re
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import sqlalchemy as sql
+
+from .database import CurrentConditions, WeatherDatabase, as_utc
+from .metrics import ARCHIVE_FILES, ARCHIVE_ROWS
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = CurrentConditions.fields()
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def _schema():
+    import pyarrow as pa
+
+    fields = []
+    columns = CurrentConditions.__table__.columns
+
+    # station identifiers are stored in each file rather than the station key
+    for name in COLUMNS:
+        column = columns.get(name)
+
+        if column is None:
+            fields.append(pa.field(name, pa.string()))
+        elif isinstance(column.type, sql.DateTime):
+            fields.append(pa.field(name, pa.timestamp("us", tz="UTC")))
+        elif isinstance(column.type, sql.Integer):
+            fields.append(pa.field(name, pa.int64()))
+        elif isinstance(column.type, sql.Float):
+            fields.append(pa.field(name, pa.float64()))
+        else:
+            fields.append(pa.field(name, pa.string()))
+
+    return pa.schema(fields)
+
+
+class Archive:
+    """Read and write archived readings."""
+
+    def __init__(self, path):
+        import pyarrow  # noqa: F401 -- fail early if the package is not installed
+
+        self.path = Path(path)
+        self.schema = _schema()
+
+        self.logger = logger.getChild("Archive")
+
+    def station_path(self, provider, station_id) -> Path:
+        return self.path / _safe_name(str(provider)) / _safe_name(str(station_id))
+
+    def write(self, entries: list[CurrentConditions]) -> int:
+        """Write entries to the archive; returns the number of files written."""
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        partitions = {}
+
+        for entry in entries:
+            timestamp = as_utc(entry.timestamp)
+            key = (entry.provider, entry.station_id, timestamp.strftime("%Y-%m"))
+            partitions.setdefault(key, []).append(entry)
+
+        for (provider, station_id, month), rows in partitions.items():
+            folder = self.station_path(provider, station_id) / month
+            folder.mkdir(parents=True, exist_ok=True)
+
+            ids = [entry.id for entry in rows]
+            filename = folder / f"part-{min(ids)}-{max(ids)}.parquet"
+
+            data = {column: [getattr(entry, column) for entry in rows] for column in COLUMNS}
+            data["timestamp"] = [as_utc(entry.timestamp) for entry in rows]
+
+            table = pa.Table.from_pydict(data, schema=self.schema)
+
+            # write to a temporary file first so readers never see a partial file
+            tmpfile = filename.with_suffix(".tmp")
+            pq.write_table(table, tmpfile)
+            os.replace(tmpfile, filename)
+
+            self.logger.debug("archived %d readings to %s", len(rows), filename)
+
+        return len(partitions)
+
+    def query(self, provider, station_id, start=None, end=None) -> list[CurrentConditions]:
+        """Return archived readings from the given station in the time range [start, end)."""
+
+        import pyarrow.dataset as ds
+
+        folder = self.station_path(provider, station_id)
+
+        if not folder.is_dir():
+            return []
+
+        start = None if start is None else as_utc(start)
+        end = None if end is None else as_utc(end)
+
+        # skip months outside the requested range without opening the files
+        first = None if start is None else start.strftime("%Y-%m")
+        last = None if end is None else end.strftime("%Y-%m")
+
+        files = [
+            str(part)
+            for month in sorted(folder.iterdir())
+            if (first is None or month.name >= first) and (last is None or month.name <= last)
+            for part in sorted(month.glob("*.parquet"))
+        ]
+
+        if not files:
+            return []
+
+        dataset = ds.dataset(files, schema=self.schema, format="parquet")
+
+        expr = None
+
+        if start is not None:
+            expr = ds.field("timestamp") >= start
+
+        if end is not None:
+            cond = ds.field("timestamp") < end
+            expr = cond if expr is None else expr & cond
+
+        table = dataset.to_table(filter=expr).sort_by("timestamp")
+
+        return [CurrentConditions(**row) for row in table.to_pylist()]
+
+
+class Archiver(PeriodicTask):
+    """Move readings older than max_age (in days) from the database to the archive."""
+
+    def __init__(
+        self,
+        database: WeatherDatabase,
+        archive: Archive,
+        max_age=365,
+        batch_size=5000,
+        interval=3600,
+    ):
+        super().__init__("archiver", interval)
+
+        self.database = database
+        self.archive = archive
+        self.max_age = timedelta(days=max_age)
+        self.batch_size = batch_size
+
+        self.logger = logger.getChild("Archiver")
+
+    def run_task(self):
+        """Archive old readings."""
+        self.archive_before(datetime.now(UTC) - self.max_age)
+
+    def archive_before(self, cutoff: datetime) -> int:
+        """Move readings older than cutoff to the archive; returns the number moved."""
+
+        total = 0
+
+        while not self.thread_ctl.is_set():
+            stmt = (
+                sql.select(CurrentConditions)
+                .where(CurrentConditions.timestamp < cutoff)
+                .order_by(CurrentConditions.id)
+                .limit(self.batch_size)
+            )
+
+            with self.database.session() as session:
+                entries = list(session.scalars(stmt))
+
+                if not entries:
+                    break
+
+                files = self.archive.write(entries)
+
+                ids = [entry.id for entry in entries]
+                session.execute(sql.delete(CurrentConditions).where(CurrentConditions.id.in_(ids)))
+                session.commit()
+
+            total += len(entries)
+
+            ARCHIVE_ROWS.inc(len(entries))
+            ARCHIVE_FILES.inc(files)
+
+        if total > 0:
+            self.logger.info("archived %d readings older than %s", total, cutoff)
+
+        return total
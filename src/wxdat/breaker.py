@@ -0,0 +1,131 @@
+"""Circuit breakers for remote weather providers."""
+
+import logging
+import random
+import threading
+import time
+from enum import IntEnum
+
+from .metrics import CIRCUIT_REJECTED, CIRCUIT_STATE, CIRCUIT_TRIPS
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """Stop calling a remote host after consecutive failures.
+
+    Once the breaker opens, requests are rejected until the retry delay passes.  A
+    single probe request is then allowed (half-open); if it succeeds, the breaker
+    closes, otherwise it opens again with an exponentially longer delay.  A random
+    jitter is applied to the delay so that probes are spread out over time.
+    """
+
+    __breakers__ = {}
+    __registry_lock__ = threading.Lock()
+
+    def __init__(self, name, threshold=3, base_delay=30, max_delay=900, jitter=0.5, clock=None):
+        self.name = name
+
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+        self.clock = clock or time.monotonic
+
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = None
+
+        self._lock = threading.Lock()
+
+        self.metrics_state = CIRCUIT_STATE.labels(host=name)
+        self.metrics_trips = CIRCUIT_TRIPS.labels(host=name)
+        self.metrics_rejected = CIRCUIT_REJECTED.labels(host=name)
+        self.metrics_state.set(self.state)
+
+        self.logger = logger.getChild("CircuitBreaker")
+
+    @classmethod
+    def for_host(cls, host):
+        """Return the shared circuit breaker for the given host."""
+
+        with cls.__registry_lock__:
+            breaker = cls.__breakers__.get(host)
+
+            if breaker is None:
+                breaker = cls(host)
+                cls.__breakers__[host] = breaker
+
+            return breaker
+
+    def allow(self) -> bool:
+        """Determine if a request should be attempted."""
+
+        with self._lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+
+            if self.state == BreakerState.OPEN and self.clock() >= self.retry_at:
+                self.logger.info("circuit half-open; probing %s", self.name)
+                self._set_state(BreakerState.HALF_OPEN)
+                return True
+
+        # open and waiting, or a probe is already in flight
+        self.metrics_rejected.inc()
+
+        return False
+
+    def success(self):
+        """Record a successful request."""
+
+        with self._lock:
+            if self.state != BreakerState.CLOSED:
+                self.logger.info("circuit closed; %s has recovered", self.name)
+
+            self.failures = 0
+            self.trips = 0
+            self._set_state(BreakerState.CLOSED)
+
+    def release(self):
+        """Record that an allowed request was not sent (e.g. it was skipped locally).
+
+        A probe that was not sent is returned, so the next request may probe again.
+        """
+
+        with self._lock:
+            if self.state == BreakerState.HALF_OPEN:
+                self._set_state(BreakerState.OPEN)
+
+    def failure(self):
+        """Record a failed request."""
+
+        with self._lock:
+            self.failures += 1
+
+            if self.state == BreakerState.HALF_OPEN or self.failures >= self.threshold:
+                self._trip()
+
+    def _trip(self):
+        self.trips += 1
+
+        delay = min(self.base_delay * 2 ** (self.trips - 1), self.max_delay)
+        delay *= 1 - self.jitter * random.random()
+
+        self.retry_at = self.clock() + delay
+
+        self.logger.warning("circuit open for %s; retry in %.1f sec", self.name, delay)
+
+        self._set_state(BreakerState.OPEN)
+        self.metrics_trips.inc()
+
+    def _set_state(self, state: BreakerState):
+        self.state = state
+        self.metrics_state.set(state)
@@ -0,0 +1,192 @@
+"""Distribute stations among multiple wxdat nodes using database leases.
+
+Each node records a heartbeat in the database.  The live nodes are placed on a
+consistent hash ring, which determines the preferred owner of each station.  A
+node claims the lease for each station it prefers (once any previous lease has
+been released or has expired) and only polls stations for which it holds a
+current lease.
+
+Lease times are based on the wall clock of each node, so clocks should be kept
+reasonably in sync (e.g. using NTP).
+"""
+
+import logging
+import socket
+import threading
+import time
+
+import sqlalchemy as sql
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from .database import ClusterNode, StationLease, WeatherDatabase
+from .hashring import HashRing
+from .metrics import CLUSTER_LEASES, CLUSTER_NODES
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+def default_node_id() -> str:
+    """Return the default identifier for this node."""
+    return socket.gethostname()
+
+
+class LeaseManager(PeriodicTask):
+    """Maintain station leases for this node."""
+
+    def __init__(self, database: WeatherDatabase, stations, node_id=None, heartbeat=15, ttl=60):
+        self.node_id = node_id or default_node_id()
+
+        super().__init__(f"lease-{self.node_id}", heartbeat)
+
+        self.database = database
+        self.stations = list(stations)
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._held = frozenset()
+        self._expires = 0
+
+        self.metrics_leases = CLUSTER_LEASES.labels(node=self.node_id)
+        self.metrics_nodes = CLUSTER_NODES.labels(node=self.node_id)
+
+        self.logger = logger.getChild("LeaseManager")
+
+    @property
+    def held(self) -> frozenset:
+        """Return the stations currently leased by this node."""
+
+        with self._lock:
+            if time.time() >= self._expires:
+                return frozenset()
+
+            return self._held
+
+    def holds(self, station: str) -> bool:
+        """Determine if this node currently holds the lease for the given station."""
+        return station in self.held
+
+    def start(self) -> None:
+        # claim leases before recorders start so they do not wait a full heartbeat
+        self.run_task()
+
+        super().start()
+
+    def stop(self, timeout=None) -> None:
+        super().stop(timeout)
+
+        self.release()
+
+    def run_task(self):
+        """Send a heartbeat and update the leases held by this node."""
+
+        now = time.time()
+
+        try:
+            self._heartbeat(now)
+            self._ensure_leases_exist()
+
+            nodes = self._live_nodes(now)
+            ring = HashRing(nodes)
+            wanted = set(ring.partition(self.stations, self.node_id))
+
+            held = self._update_leases(wanted, now)
+
+        except SQLAlchemyError:
+            self.logger.exception("Unable to update station leases")
+            return
+
+        with self._lock:
+            self._held = frozenset(held)
+            self._expires = now + self.ttl
+
+        self.metrics_nodes.set(len(nodes))
+        self.metrics_leases.set(len(held))
+
+        self.logger.debug("%s :: %d nodes; holding %d leases", self.node_id, len(nodes), len(held))
+
+    def release(self):
+        """Release all leases held by this node and leave the cluster."""
+
+        self.logger.info("releasing leases for node: %s", self.node_id)
+
+        with self._lock:
+            self._held = frozenset()
+            self._expires = 0
+
+        try:
+            with self.database.session() as session:
+                session.execute(
+                    sql.update(StationLease)
+                    .where(StationLease.owner == self.node_id)
+                    .values(owner=None, expires=0)
+                )
+
+                session.execute(sql.delete(ClusterNode).where(ClusterNode.node_id == self.node_id))
+
+                session.commit()
+
+        except SQLAlchemyError:
+            self.logger.exception("Unable to release station leases")
+
+        self.metrics_leases.set(0)
+
+    def _heartbeat(self, now):
+        with self.database.session() as session:
+            session.merge(ClusterNode(node_id=self.node_id, heartbeat=now))
+            session.commit()
+
+    def _live_nodes(self, now):
+        with self.database.session() as session:
+            query = sql.select(ClusterNode.node_id).where(ClusterNode.heartbeat >= now - self.ttl)
+            return sorted(session.scalars(query))
+
+    def _ensure_leases_exist(self):
+        with self.database.session() as session:
+            query = sql.select(StationLease.station).where(StationLease.station.in_(self.stations))
+            existing = set(session.scalars(query))
+
+            missing = [station for station in self.stations if station not in existing]
+
+            if not missing:
+                return
+
+            session.add_all(StationLease(station=station, expires=0) for station in missing)
+
+            try:
+                session.commit()
+
+            # another node created the lease at the same time; try again next time
+            except IntegrityError:
+                self.logger.debug("lease creation conflict; will retry")
+                session.rollback()
+
+    def _update_leases(self, wanted, now):
+        with self.database.session() as session:
+            # claim (or renew) the leases we want if they are ours, free or expired
+            session.execute(
+                sql.update(StationLease)
+                .where(StationLease.station.in_(wanted))
+                .where(
+                    sql.or_(
+                        StationLease.owner == self.node_id,
+                        StationLease.owner.is_(None),
+                        StationLease.expires < now,
+                    )
+                )
+                .values(owner=self.node_id, expires=now + self.ttl)
+            )
+
+            # release any leases we hold for stations preferred by another node
+            session.execute(
+                sql.update(StationLease)
+                .where(StationLease.owner == self.node_id)
+                .where(StationLease.station.not_in(wanted))
+                .values(owner=None, expires=0)
+            )
+
+            session.commit()
+
+            query = sql.select(StationLease.station).where(StationLease.owner == self.node_id)
+
+            return set(session.scalars(query))
@@ -0,0 +1,216 @@
+"""Retention and downsampling of raw readings.
+
+Readings older than the age of each tier are replaced by one reading per time
+bucket at the tier's resolution (e.g. 5-minute averages after a week, then hourly
+averages after a month).  Most fields are averaged; wind bearing uses a circular
+mean, wind gusts keep the maximum and accumulated precipitation keeps the last
+value in each bucket.
+
+Work is done one station and one bounded batch at a time, pausing between
+batches so that compaction does not compete with saving new readings.
+"""
+
+import logging
+import math
+import statistics
+from datetime import UTC, datetime, timedelta
+
+import sqlalchemy as sql
+
+from .database import CurrentConditions, StationRecord, WeatherDatabase
+from .metrics import COMPACT_ADDED, COMPACT_REMOVED
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# each tier is the age (in days) and resolution (in seconds) of its readings
+DEFAULT_TIERS = [(7, 300), (30, 3600)]
+
+VALUE_FIELDS = [
+    column.key
+    for column in CurrentConditions.__table__.columns
+    if isinstance(column.type, sql.Float)
+]
+
+# fields that keep the maximum value in each bucket
+MAX_FIELDS = {"wind_gusts"}
+
+# angles (in degrees) are averaged around the circle, so 359 and 1 combine to 0
+CIRCULAR_FIELDS = {"wind_bearing"}
+
+# accumulated totals keep the most recent value in each bucket
+LAST_FIELDS = {"precip_day", "precip_week", "precip_month", "precip_year", "precip_total"}
+
+
+def _epoch(timestamp: datetime) -> float:
+    # some databases (e.g. SQLite) do not keep the timezone of stored timestamps
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+
+    return timestamp.timestamp()
+
+
+def bucket_start(timestamp: datetime, resolution: int) -> datetime:
+    """Return the start of the time bucket containing timestamp."""
+
+    epoch = _epoch(timestamp)
+    return datetime.fromtimestamp(epoch - epoch % resolution, UTC)
+
+
+def circular_mean(degrees: list[float]) -> float:
+    """Return the mean of the given angles (in degrees) in the range [0, 360)."""
+
+    sin = sum(math.sin(math.radians(value)) for value in degrees)
+    cos = sum(math.cos(math.radians(value)) for value in degrees)
+
+    return math.degrees(math.atan2(sin, cos)) % 360
+
+
+def downsample(entries: list[CurrentConditions], resolution: int) -> CurrentConditions:
+    """Combine readings from a single time bucket into one reading."""
+
+    entries = sorted(entries, key=lambda entry: _epoch(entry.timestamp))
+
+    reading = CurrentConditions(
+        timestamp=bucket_start(entries[0].timestamp, resolution),
+        station_key=entries[0].station_key,
+        resolution=resolution,
+    )
+
+    for name in VALUE_FIELDS:
+        values = [getattr(entry, name) for entry in entries]
+        values = [value for value in values if value is not None]
+
+        if not values:
+            continue
+
+        if name in MAX_FIELDS:
+            value = max(values)
+        elif name in LAST_FIELDS:
+            value = values[-1]
+        elif name in CIRCULAR_FIELDS:
+            value = circular_mean(values)
+        else:
+            value = statistics.fmean(values)
+
+        setattr(reading, name, value)
+
+    return reading
+
+
+class Compactor(PeriodicTask):
+    """Replace old readings with time-bucketed averages."""
+
+    def __init__(
+        self,
+        database: WeatherDatabase,
+        tiers=DEFAULT_TIERS,
+        batch_size=1000,
+        pause=0.5,
+        interval=3600,
+    ):
+        super().__init__("compactor", interval)
+
+        self.database = database
+        self.tiers = sorted(tiers)
+        self.batch_size = batch_size
+        self.pause = pause
+
+        self.logger = logger.getChild("Compactor")
+
+    def run_task(self):
+        """Compact readings for all stations."""
+        self.compact(datetime.now(UTC))
+
+    def compact(self, now: datetime) -> int:
+        """Compact readings older than each tier; returns the number of readings removed."""
+
+        with self.database.session() as session:
+            stations = list(session.scalars(sql.select(StationRecord.id)))
+
+        total = 0
+
+        for age, resolution in self.tiers:
+            # only compact buckets that are entirely older than the tier's age
+            cutoff = bucket_start(now - timedelta(days=age), resolution)
+
+            for station_key in stations:
+                total += self.compact_station(station_key, cutoff, resolution)
+
+        if total > 0:
+            self.logger.info("compacted %d readings", total)
+
+        return total
+
+    def compact_station(self, station_key, cutoff: datetime, resolution: int) -> int:
+        """Downsample readings from a station older than cutoff to the given resolution."""
+
+        stmt = self._select(station_key, resolution).where(CurrentConditions.timestamp < cutoff)
+        stmt = stmt.limit(self.batch_size)
+
+        total = 0
+
+        while not self.thread_ctl.is_set():
+            with self.database.session() as session:
+                entries = list(session.scalars(stmt))
+
+            if not entries:
+                break
+
+            buckets = {}
+
+            for entry in entries:
+                buckets.setdefault(bucket_start(entry.timestamp, resolution), []).append(entry)
+
+            # the last bucket may continue past this batch; leave it for the next one, or
+            # read the whole bucket if it does not fit in a single batch
+            if len(entries) == self.batch_size:
+                if len(buckets) > 1:
+                    buckets.pop(max(buckets))
+                else:
+                    start = max(buckets)
+                    buckets[start] = self._bucket(station_key, start, resolution)
+
+            removed = [entry for bucket in buckets.values() for entry in bucket]
+            readings = [downsample(bucket, resolution) for bucket in buckets.values()]
+
+            if not self.database.replace([entry.id for entry in removed], readings):
+                break
+
+            total += len(removed)
+
+            COMPACT_REMOVED.inc(len(removed))
+            COMPACT_ADDED.inc(len(readings))
+
+            # give way to live writes between batches
+            if self.thread_ctl.wait(self.pause):
+                break
+
+        return total
+
+    def _select(self, station_key, resolution: int):
+        """Select readings from a station that are finer than the given resolution."""
+
+        return (
+            sql.select(CurrentConditions)
+            .where(CurrentConditions.station_key == station_key)
+            .where(
+                sql.or_(
+                    CurrentConditions.resolution.is_(None),
+                    CurrentConditions.resolution < resolution,
+                )
+            )
+            .order_by(CurrentConditions.timestamp)
+        )
+
+    def _bucket(self, station_key, start: datetime, resolution: int) -> list[CurrentConditions]:
+        """Return all readings from a station in the bucket starting at start."""
+
+        stmt = (
+            self._select(station_key, resolution)
+            .where(CurrentConditions.timestamp >= start)
+            .where(CurrentConditions.timestamp < start + timedelta(seconds=resolution))
+        )
+
+        with self.database.session() as session:
+            return list(session.scalars(stmt))
@@ -10,6 +10,7 @@ from typing import Annotated, Literal
 import yaml
 from pydantic import BaseModel, Field, validator
 
+from .pipeline import QueuePolicy
 from .providers import (
     WeatherProvider,
     accuweather,
@@ -21,6 +22,9 @@ from .providers import (
 
 logger = logging.getLogger(__name__)
 
+# use the (much faster) libyaml parser when available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class Units(StrEnum):
     IMPERIAL = "imperial"
@@ -35,17 +39,40 @@ class StationConfigBase(BaseModel):
     name: str
     provider: WeatherProvider
     update_interval: int | None = None
+    adaptive: bool | None = None
+
+    connect_timeout: float | None = None
+    read_timeout: float | None = None
+    deadline: float | None = None
+    hedge: bool = False
 
     @abstractmethod
     def initialize(self):
         """Initialize a new instance of the station based on this config."""
 
+    def create(self):
+        """Initialize the station and apply settings common to all providers."""
+
+        station = self.initialize()
+
+        if self.connect_timeout is not None:
+            station.connect_timeout = self.connect_timeout
+
+        if self.read_timeout is not None:
+            station.read_timeout = self.read_timeout
+
+        station.hedge = self.hedge
+
+        return station
+
 
 class AccuWeatherConfig(StationConfigBase):
     """Station configuration for AccuWeather."""
 
     api_key: str
     location: str | int
+    daily_quota: int | None = None
+    quota_file: str | None = None
     provider: Literal[WeatherProvider.ACCUWEATHER]
 
     def initialize(self):
@@ -55,6 +82,8 @@ class AccuWeatherConfig(StationConfigBase):
             name=self.name,
             api_key=self.api_key,
             location=self.location,
+            daily_quota=self.daily_quota,
+            quota_file=self.quota_file,
         )
 
 
@@ -66,6 +95,9 @@ class AmbientWeatherConfig(StationConfigBase):
     device_id: str
     provider: Literal[WeatherProvider.AMBIENT]
 
+    realtime: bool = False
+    realtime_url: str | None = None
+
     def initialize(self):
         """Initialize a new Ambient Weather station based on this config."""
 
@@ -74,6 +106,8 @@ class AmbientWeatherConfig(StationConfigBase):
             app_key=self.app_key,
             user_key=self.user_key,
             device_id=self.device_id,
+            realtime=self.realtime,
+            realtime_url=self.realtime_url,
         )
 
 
@@ -98,6 +132,7 @@ class OpenWeatherMapConfig(StationConfigBase):
     api_key: str
     latitude: float
     longitude: float
+    calls_per_minute: int = 60
     provider: Literal[WeatherProvider.OPENWEATHERMAP]
 
     def initialize(self):
@@ -108,6 +143,7 @@ class OpenWeatherMapConfig(StationConfigBase):
             api_key=self.api_key,
             latitude=self.latitude,
             longitude=self.longitude,
+            calls_per_minute=self.calls_per_minute,
         )
 
 
@@ -138,15 +174,107 @@ StationConfig = Annotated[
 ]
 
 
+class ClusterConfig(BaseModel):
+    """Configuration for distributing stations among multiple nodes."""
+
+    node_id: str | None = None
+    heartbeat: int = 15
+    lease_ttl: int = 60
+
+
+class SpoolConfig(BaseModel):
+    """Configuration for the local spool used while the database is unavailable."""
+
+    path: str = "wxdat-spool.db"
+    max_entries: int = 100000
+    batch_size: int = 500
+    replay_interval: int = 30
+
+
+class PipelineConfig(BaseModel):
+    """Configuration for the pool of database writers."""
+
+    writers: int = Field(default=2, ge=1)
+    queue_size: int = Field(default=1000, ge=1)
+    policy: QueuePolicy = QueuePolicy.BLOCK
+    block_timeout: float | None = None
+    batch_size: int = Field(default=100, ge=1)
+
+
+class ArchiveConfig(BaseModel):
+    """Configuration for archiving old readings to Parquet files."""
+
+    path: str = "wxdat-archive"
+    max_age: int = Field(default=365, ge=1)
+    batch_size: int = Field(default=5000, ge=1)
+    interval: int = 3600
+
+
+class CompactTier(BaseModel):
+    """Downsample readings older than `after` days to one per `resolution` seconds."""
+
+    after: int = Field(ge=1)
+    resolution: int = Field(ge=1)
+
+
+class CompactConfig(BaseModel):
+    """Configuration for downsampling old readings."""
+
+    tiers: list[CompactTier] = [
+        CompactTier(after=7, resolution=300),
+        CompactTier(after=30, resolution=3600),
+    ]
+    batch_size: int = Field(default=1000, ge=1)
+    pause: float = 0.5
+    interval: int = 3600
+
+
+class ReplicaConfig(BaseModel):
+    """Configuration for read replicas of the database."""
+
+    urls: list[str]
+    max_lag: float = 30
+    check_interval: float = 10
+
+
+class PartitionConfig(BaseModel):
+    """Configuration for monthly partitions of readings (PostgreSQL only)."""
+
+    months_ahead: int = Field(default=3, ge=1)
+    retention: int | None = Field(default=None, ge=1)
+    interval: int = 86400
+
+
+class InventoryConfig(BaseModel):
+    """Configuration for loading stations from an external inventory."""
+
+    path: str | None = None
+    table: str | None = None
+    database: str | None = None
+
+
 class AppConfig(BaseModel):
     """Application configuration for wxdat."""
 
     database: str = "sqlite:///wxdat.db"
     update_interval: int = 300
+    adaptive: bool = False
     stations: list[StationConfig] = []
+    inventory: InventoryConfig | None = None
+    credentials: dict[str, dict[str, str | int | float]] = {}
     units: Units = Units.METRIC
     logging: dict | None = None
     metrics: int | None = None
+    profiling: bool = False
+    shutdown_timeout: float = Field(default=10, gt=0)
+    workers: int | None = Field(default=None, ge=1)
+    cluster: ClusterConfig | None = None
+    spool: SpoolConfig | None = None
+    pipeline: PipelineConfig | None = None
+    archive: ArchiveConfig | None = None
+    partitions: PartitionConfig | None = None
+    compact: CompactConfig | None = None
+    replicas: ReplicaConfig | None = None
 
     @validator("database", pre=True, always=True)
     def _check_env_for_database_str(cls, val):
@@ -159,9 +287,14 @@ class AppConfig(BaseModel):
             raise FileNotFoundError(f"config file does not exist: {config_file}")
 
         with open(config_file) as fp:
-            data = yaml.load(fp, Loader=yaml.SafeLoader)
+            data = yaml.load(fp, Loader=YAML_LOADER)
             conf = AppConfig(**data)
 
+        if conf.inventory is not None:
+            from .inventory import load_stations
+
+            conf.stations += load_stations(conf.inventory, conf.credentials, conf.database)
+
         logger = cls._configure_logging(conf)
         logger.info("loaded AppConfig from: %s", config_file)
 
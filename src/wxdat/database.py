@@ -1,30 +1,53 @@
 """Database connection and models for wxdat."""
 
+import contextlib
 import logging
+import threading
+from datetime import UTC, datetime
+from urllib.parse import urlparse
 
 import sqlalchemy as sql
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import declarative_base, relationship, sessionmaker
 
 from . import metrics
+from .observation import WeatherObservation
 
 logger = logging.getLogger(__name__)
 
+# errors caused by the readings themselves (rather than an unavailable database); the
+# time-series store raises ValueError for readings it cannot store
+DATA_ERRORS = (DataError, IntegrityError, ValueError)
+
 
 WeatherData = declarative_base()
 MagicSession = sessionmaker()
 
 
+class StationRecord(WeatherData):
+    """Stations referenced by recorded data."""
+
+    __tablename__ = "stations"
+    __table_args__ = (sql.UniqueConstraint("provider", "station_id"),)
+
+    id = sql.Column(sql.Integer, primary_key=True)
+
+    provider = sql.Column(sql.String(256), nullable=False)
+    station_id = sql.Column(sql.String(256), nullable=False)
+
+
 class CurrentConditions(WeatherData):
     """Define data fields for current conditions."""
 
     __tablename__ = "current_conditions"
+    __table_args__ = (sql.Index("ix_current_conditions_station_time", "station_key", "timestamp"),)
 
     id = sql.Column(sql.Integer, primary_key=True)
 
     timestamp = sql.Column(sql.DateTime(True))
-    provider = sql.Column(sql.String(256))
-    station_id = sql.Column(sql.String(256))
+    station_key = sql.Column(sql.Integer, sql.ForeignKey("stations.id"), nullable=False)
+
+    station = relationship(StationRecord, lazy="joined")
 
     temperature = sql.Column(sql.Float())
     feels_like = sql.Column(sql.Float())
@@ -32,9 +55,9 @@ class CurrentConditions(WeatherData):
 
     wind_speed = sql.Column(sql.Float())
     wind_gusts = sql.Column(sql.Float())
-    wind_bearing = sql.Column(sql.Float())
+    wind_bearing = sql.Column(sql.REAL())
 
-    humidity = sql.Column(sql.Float())
+    humidity = sql.Column(sql.REAL())
 
     precip_hour = sql.Column(sql.Float())
     precip_day = sql.Column(sql.Float())
@@ -46,9 +69,9 @@ class CurrentConditions(WeatherData):
     rel_pressure = sql.Column(sql.Float())
     abs_pressure = sql.Column(sql.Float())
 
-    cloud_cover = sql.Column(sql.Float())
+    cloud_cover = sql.Column(sql.REAL())
     visibility = sql.Column(sql.Float())
-    uv_index = sql.Column(sql.Float())
+    uv_index = sql.Column(sql.REAL())
     ozone = sql.Column(sql.Float())
 
     solar_lux = sql.Column(sql.Float())
@@ -56,14 +79,150 @@ class CurrentConditions(WeatherData):
 
     remarks = sql.Column(sql.Text())
 
+    # width (in seconds) of the time bucket averaged into this reading; None if raw
+    resolution = sql.Column(sql.Integer(), nullable=True)
+
+    # station identifiers are held on new readings until they are saved, when the
+    # database resolves them to a station_key
+    _provider = None
+    _station_id = None
+
+    @property
+    def provider(self):
+        if self._provider is None and self.station is not None:
+            return self.station.provider
+
+        return self._provider
+
+    @provider.setter
+    def provider(self, value):
+        self._provider = value
+
+    @property
+    def station_id(self):
+        if self._station_id is None and self.station is not None:
+            return self.station.station_id
+
+        return self._station_id
+
+    @station_id.setter
+    def station_id(self, value):
+        self._station_id = value
+
+    @classmethod
+    def fields(cls) -> list[str]:
+        """Return the names of the data fields, including the station identifiers."""
+
+        columns = [column.key for column in cls.__table__.columns if column.key != "station_key"]
+
+        return [*columns[:2], "provider", "station_id", *columns[2:]]
+
+
+# columns set when inserting a reading (the id is assigned by the database)
+INSERT_FIELDS = [
+    column.key
+    for column in CurrentConditions.__table__.columns
+    if column.key not in ("id", "station_key")
+]
+
+
+class ClusterNode(WeatherData):
+    """Nodes participating in station distribution."""
+
+    __tablename__ = "cluster_nodes"
+
+    node_id = sql.Column(sql.String(256), primary_key=True)
+
+    # epoch time (in seconds) of the most recent heartbeat from the node
+    heartbeat = sql.Column(sql.Float(), nullable=False)
+
+
+class StationLease(WeatherData):
+    """Leases held by cluster nodes for polling stations."""
+
+    __tablename__ = "station_leases"
+
+    station = sql.Column(sql.String(256), primary_key=True)
+    owner = sql.Column(sql.String(256), nullable=True)
+
+    # epoch time (in seconds) when the lease expires
+    expires = sql.Column(sql.Float(), nullable=False, default=0)
+
+
+# applied to each SQLite connection; WAL lets readers continue while a reading is
+# written and only fsyncs at checkpoints when synchronous is NORMAL
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -32000,  # in KiB
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,  # in ms
+}
+
+
+def as_utc(timestamp: datetime) -> datetime:
+    """Return the timestamp as an aware datetime in UTC."""
+
+    # some databases (e.g. SQLite) do not keep the timezone of stored timestamps
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=UTC)
+
+    return timestamp.astimezone(UTC)
+
+
+def open_database(url, **kwargs):
+    """Open the storage backend specified by the URL.
+
+    URLs using the `tsstore` scheme (e.g. `tsstore:///var/lib/wxdat`) open an
+    embedded time-series store; all others are passed to SQLAlchemy along with
+    any additional options for WeatherDatabase.
+    """
+
+    parts = urlparse(url)
+
+    if parts.scheme == "tsstore":
+        from .tsstore import TimeSeriesStore
+
+        return TimeSeriesStore(parts.netloc + parts.path)
+
+    return WeatherDatabase(url, **kwargs)
+
 
 class WeatherDatabase:
-    def __init__(self, url):
-        """Connect to a database specified by the connection URL."""
+    def __init__(self, url, pragmas=SQLITE_PRAGMAS, partitioned=False, replicas=None):
+        """Connect to a database specified by the connection URL.
+
+        For SQLite databases, the given pragmas are applied to each connection and
+        writes are serialized so that writer threads do not contend for the lock.
+
+        For PostgreSQL databases, partitioned creates new readings tables with
+        monthly partitions (see wxdat.partition).
+
+        Read-only sessions are routed to replicas (a wxdat.replicas.ReplicaSet) when
+        provided, falling back to this database if none are fresh enough.
+        """
 
         logger.debug("Connecting to database: %s", url)
         self.engine = sql.create_engine(url)
 
+        if partitioned and self.engine.dialect.name != "postgresql":
+            raise ValueError("partitioning requires a PostgreSQL database")
+
+        self.partitioned = partitioned
+        self.replicas = replicas
+
+        self._write_lock = contextlib.nullcontext()
+
+        if self.engine.dialect.name == "sqlite":
+            self._configure_sqlite(pragmas or {})
+
+        # older readings may be moved to an archive (see wxdat.archive)
+        self.archive = None
+
+        # station keys are assigned once and never change
+        self._station_keys = {}
+        self._station_lock = threading.Lock()
+
         self.migrate()
 
         self.metrics = metrics.DatabaseMetrics(self.engine)
@@ -71,26 +230,220 @@ class WeatherDatabase:
         # configure the session class to use our engine
         MagicSession.configure(bind=self.engine)
 
+    def _configure_sqlite(self, pragmas):
+        @sql.event.listens_for(self.engine, "connect")
+        def _set_pragmas(dbapi_conn, _):
+            cursor = dbapi_conn.cursor()
+
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+
+            cursor.close()
+
+        # SQLite allows a single writer at a time
+        self._write_lock = threading.Lock()
+
     def migrate(self):
-        # TODO create / migrate schema as needed
+        inspector = sql.inspect(self.engine)
+
+        # early versions kept the station identifiers in each reading
+        if inspector.has_table("current_conditions"):
+            columns = {column["name"] for column in inspector.get_columns("current_conditions")}
+
+            if "station_key" not in columns:
+                self._migrate_station_keys()
+
+            if "resolution" not in columns:
+                logger.info("Adding resolution to current_conditions")
+
+                with self.engine.begin() as conn:
+                    conn.execute(
+                        sql.text("ALTER TABLE current_conditions ADD COLUMN resolution INTEGER")
+                    )
+
+        elif self.partitioned:
+            from .partition import create_partitioned_table
+
+            with self.engine.begin() as conn:
+                create_partitioned_table(conn)
+
+            return
+
         WeatherData.metadata.create_all(self.engine)
 
+    def _migrate_station_keys(self):
+        """Move station identifiers from current_conditions to the stations table.
+
+        The table is altered in place (rather than rebuilt), so that existing storage
+        (e.g. a Timescale hypertable) is kept.
+        """
+
+        logger.info("Migrating current_conditions to use station keys")
+
+        readings = CurrentConditions.__table__.name
+        stations = StationRecord.__table__
+
+        with self.engine.begin() as conn:
+            stations.create(conn, checkfirst=True)
+
+            conn.execute(
+                sql.text(
+                    f"ALTER TABLE {readings} ADD COLUMN station_key INTEGER "
+                    f"REFERENCES {stations.name} (id)"
+                )
+            )
+
+            conn.execute(
+                sql.text(
+                    f"INSERT INTO {stations.name} (provider, station_id) "
+                    "SELECT DISTINCT COALESCE(provider, ''), COALESCE(station_id, '') "
+                    f"FROM {readings}"
+                )
+            )
+
+            conn.execute(
+                sql.text(
+                    f"UPDATE {readings} SET station_key = ("
+                    f"SELECT s.id FROM {stations.name} s "
+                    f"WHERE s.provider = COALESCE({readings}.provider, '') "
+                    f"AND s.station_id = COALESCE({readings}.station_id, ''))"
+                )
+            )
+
+            conn.execute(sql.text(f"ALTER TABLE {readings} DROP COLUMN provider"))
+            conn.execute(sql.text(f"ALTER TABLE {readings} DROP COLUMN station_id"))
+
+            # SQLite cannot add constraints to existing columns
+            if self.engine.dialect.name == "postgresql":
+                conn.execute(
+                    sql.text(f"ALTER TABLE {readings} ALTER COLUMN station_key SET NOT NULL")
+                )
+
+            for index in CurrentConditions.__table__.indexes:
+                index.create(conn, checkfirst=True)
+
+    def station_key(self, provider, station_id) -> int:
+        """Return the key for the given station, adding it to the stations table if needed."""
+
+        key = (str(provider), str(station_id))
+
+        with self._station_lock:
+            station_key = self._station_keys.get(key)
+
+            if station_key is not None:
+                return station_key
+
+            table = StationRecord.__table__
+            query = sql.select(table.c.id).where(
+                (table.c.provider == key[0]) & (table.c.station_id == key[1])
+            )
+
+            with self.engine.begin() as conn:
+                station_key = conn.scalar(query)
+
+            if station_key is None:
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(sql.insert(table).values(provider=key[0], station_id=key[1]))
+
+                # another process added the station first
+                except IntegrityError:
+                    pass
+
+                with self.engine.begin() as conn:
+                    station_key = conn.scalar(query)
+
+            self._station_keys[key] = station_key
+
+        return station_key
+
+    def _rows(self, entries) -> list[dict]:
+        """Return the column values for inserting new readings.
+
+        Entries may be observations or CurrentConditions; new rows are inserted in
+        bulk without creating ORM instances.
+        """
+
+        rows = []
+
+        for entry in entries:
+            row = {name: getattr(entry, name, None) for name in INSERT_FIELDS}
+
+            station_key = getattr(entry, "station_key", None)
+
+            if station_key is None:
+                station_key = self.station_key(entry.provider, entry.station_id)
+
+            row["station_key"] = station_key
+
+            rows.append(row)
+
+        return rows
+
     def session(self):
         """Starts a new session with the database engine."""
         self.metrics.sessions.inc()
 
         return MagicSession()
 
-    def save(self, entry: WeatherData):
+    def read_session(self):
+        """Starts a new read-only session, using a replica if one is available."""
+
+        if self.replicas is not None:
+            session = self.replicas.session()
+
+            if session is not None:
+                self.metrics.sessions.inc()
+                return session
+
+        return self.session()
+
+    def save(self, entry: WeatherObservation):
+        """Save a new reading."""
+        return self.save_all([entry])
+
+    def save_all(self, entries: list[WeatherObservation], strict=False):
+        """Save multiple new readings in a single transaction.
+
+        If strict, errors are raised (after rolling back) for the caller to handle,
+        instead of being logged and returning False.
+        """
+
+        self.metrics.writes.inc()
+
+        with self._write_lock, self.session() as session:
+            try:
+                session.execute(sql.insert(CurrentConditions), self._rows(entries))
+                session.commit()
+
+            except SQLAlchemyError:
+                session.rollback()
+                self.metrics.errors.inc()
+
+                if strict:
+                    raise
+
+                logger.exception("Error saving entries; rolling back")
+                return False
+
+        self.metrics.commits.inc()
+
+        return True
+
+    def replace(self, ids: list[int], entries: list[CurrentConditions]):
+        """Replace the readings with the given ids by new entries in a single transaction."""
+
         self.metrics.writes.inc()
 
-        with self.session() as session:
+        with self._write_lock, self.session() as session:
             try:
-                session.merge(entry)
+                rows = self._rows(entries)
+                session.execute(sql.delete(CurrentConditions).where(CurrentConditions.id.in_(ids)))
+                session.execute(sql.insert(CurrentConditions), rows)
                 session.commit()
 
             except SQLAlchemyError:
-                logger.exception("Error saving entry; rolling back")
+                logger.exception("Error replacing entries; rolling back")
                 session.rollback()
                 self.metrics.errors.inc()
                 return False
@@ -98,3 +451,39 @@ class WeatherDatabase:
         self.metrics.commits.inc()
 
         return True
+
+    def query(self, provider, station_id, start=None, end=None) -> list[CurrentConditions]:
+        """Return readings from the given station in the time range [start, end)."""
+
+        stmt = (
+            sql.select(CurrentConditions)
+            .join(CurrentConditions.station)
+            .where(StationRecord.provider == str(provider))
+            .where(StationRecord.station_id == str(station_id))
+            .order_by(CurrentConditions.timestamp)
+        )
+
+        if start is not None:
+            stmt = stmt.where(CurrentConditions.timestamp >= start)
+
+        if end is not None:
+            stmt = stmt.where(CurrentConditions.timestamp < end)
+
+        with self.read_session() as session:
+            entries = list(session.scalars(stmt))
+
+        if self.archive is None:
+            return entries
+
+        archived = self.archive.query(provider, station_id, start, end)
+
+        # readings from an interrupted archive batch may still be in the database
+        ids = {entry.id for entry in archived}
+
+        entries = [entry for entry in entries if entry.id not in ids]
+
+        # archived timestamps are always in UTC, so match them before combining
+        for entry in entries:
+            entry.timestamp = as_utc(entry.timestamp)
+
+        return sorted(archived + entries, key=lambda entry: entry.timestamp)
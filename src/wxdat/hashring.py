@@ -0,0 +1,37 @@
+"""Consistent hashing for distributing stations among workers."""
+
+import bisect
+import hashlib
+
+
+def _hash(key: str) -> int:
+    digest = hashlib.md5(key.encode("utf-8"), usedforsecurity=False).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class HashRing:
+    """Map keys to a set of nodes so that few keys move when the nodes change."""
+
+    def __init__(self, nodes, replicas=64):
+        self.nodes = list(nodes)
+
+        points = sorted(
+            (_hash(f"{node}#{idx}"), node) for node in self.nodes for idx in range(replicas)
+        )
+
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def lookup(self, key: str):
+        """Return the node that owns the given key (or None if the ring is empty)."""
+
+        if not self._points:
+            return None
+
+        idx = bisect.bisect(self._points, _hash(key)) % len(self._points)
+
+        return self._owners[idx]
+
+    def partition(self, items, node, key=str):
+        """Return the subset of items owned by the given node."""
+        return [item for item in items if self.lookup(key(item)) == node]
@@ -0,0 +1,116 @@
+"""Latency tracking and hedged requests for remote providers."""
+
+import logging
+import statistics
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .metrics import PROVIDER_HEDGED, PROVIDER_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# shared pool used to run hedged requests
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> ThreadPoolExecutor:
+    """Return the shared executor for hedged requests."""
+
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="wxdat-hedge")
+
+        return _executor
+
+
+class LatencyTracker:
+    """Track recent request latency for a remote host."""
+
+    __trackers__ = {}
+    __registry_lock__ = threading.Lock()
+
+    def __init__(self, name, samples=100, min_samples=20):
+        self.name = name
+        self.min_samples = min_samples
+
+        self._samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+        self.metrics_latency = PROVIDER_LATENCY.labels(host=name)
+        self.metrics_hedged = PROVIDER_HEDGED.labels(host=name)
+
+    @classmethod
+    def for_host(cls, host):
+        """Return the shared latency tracker for the given host."""
+
+        with cls.__registry_lock__:
+            tracker = cls.__trackers__.get(host)
+
+            if tracker is None:
+                tracker = cls(host)
+                cls.__trackers__[host] = tracker
+
+            return tracker
+
+    def record(self, elapsed: float):
+        """Record the latency (in seconds) of a completed request."""
+
+        with self._lock:
+            self._samples.append(elapsed)
+
+        self.metrics_latency.observe(elapsed)
+
+    @property
+    def p95(self) -> float | None:
+        """Return the 95th percentile latency (or None if there are too few samples)."""
+
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+
+            return statistics.quantiles(self._samples, n=20)[-1]
+
+
+def hedged_call(func, tracker: LatencyTracker, timeout=None, hedge=None):
+    """Call func, sending a second attempt if the first takes longer than the p95 latency.
+
+    The second attempt calls hedge instead of func, if given (e.g. to take a rate
+    limit slot first).  The first successful (not None) result is returned.  The
+    slower attempt is left to finish in the background (bounded by its own timeouts)
+    and its result discarded.
+    """
+
+    delay = tracker.p95
+
+    # not enough history to know what "slow" means
+    if delay is None:
+        return func()
+
+    pool = executor()
+    pending = {pool.submit(func)}
+
+    done, pending = wait(pending, timeout=delay)
+
+    if not done:
+        logger.debug("request to %s exceeded %.3f sec; sending hedge", tracker.name, delay)
+        tracker.metrics_hedged.inc()
+        pending.add(pool.submit(hedge or func))
+
+    while True:
+        for future in done:
+            result = future.result()
+
+            if result is not None:
+                return result
+
+        if not pending:
+            return None
+
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            return None
@@ -0,0 +1,88 @@
+"""Load large station inventories from CSV files or database tables.
+
+Each row describes one station using the same fields as the stations in the
+config file; empty values are ignored.  Rows may name a set of credentials in a
+'credentials' column, so that secrets (e.g. api_key) stay in the config file:
+
+    name,provider,credentials,station_id
+    Denver Airport,WUndergroundPWS,wunderground,KDEN
+
+All rows are validated together, which is much faster than validating stations
+one at a time for large inventories.
+"""
+
+import csv
+import logging
+
+import sqlalchemy as sql
+from pydantic import TypeAdapter
+
+from .config import InventoryConfig, StationConfig
+
+logger = logging.getLogger(__name__)
+
+StationList = TypeAdapter(list[StationConfig])
+
+
+def read_csv(path) -> list[dict]:
+    """Read station rows from a CSV file with a header row."""
+
+    with open(path, newline="") as fp:
+        return list(csv.DictReader(fp))
+
+
+def read_table(url, table) -> list[dict]:
+    """Read station rows from a table in the given database."""
+
+    engine = sql.create_engine(url)
+
+    try:
+        source = sql.Table(table, sql.MetaData(), autoload_with=engine)
+
+        with engine.connect() as conn:
+            return [dict(row) for row in conn.execute(sql.select(source)).mappings()]
+
+    finally:
+        engine.dispose()
+
+
+def resolve_credentials(rows, credentials) -> list[dict]:
+    """Merge the named credentials into each row and drop empty values."""
+
+    resolved = []
+
+    for row in rows:
+        fields = {key: value for key, value in row.items() if value not in (None, "")}
+
+        name = fields.pop("credentials", None)
+
+        if name is not None:
+            if name not in credentials:
+                raise ValueError(f"unknown credentials for station {fields.get('name')}: {name}")
+
+            fields = {**credentials[name], **fields}
+
+        resolved.append(fields)
+
+    return resolved
+
+
+def load_stations(inventory: InventoryConfig, credentials, database=None) -> list:
+    """Load and validate all stations in the inventory."""
+
+    rows = []
+
+    if inventory.path is not None:
+        logger.debug("reading station inventory: %s", inventory.path)
+        rows += read_csv(inventory.path)
+
+    if inventory.table is not None:
+        url = inventory.database or database
+        logger.debug("reading station inventory table: %s", inventory.table)
+        rows += read_table(url, inventory.table)
+
+    stations = StationList.validate_python(resolve_credentials(rows, credentials))
+
+    logger.info("loaded %d stations from inventory", len(stations))
+
+    return stations
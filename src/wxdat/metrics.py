@@ -1,6 +1,6 @@
 """Metrics provider for wxdat."""
 
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 PROVIDER_REQUESTS = Counter(
     "wxdat_provider_requests",
@@ -8,6 +8,44 @@ PROVIDER_REQUESTS = Counter(
     labelnames=["station", "provider", "method"],
 )
 
+CIRCUIT_STATE = Gauge(
+    "wxdat_circuit_state",
+    "Circuit breaker state for a provider host (0=closed, 1=half-open, 2=open).",
+    labelnames=["host"],
+    multiprocess_mode="livemax",
+)
+
+CIRCUIT_TRIPS = Counter(
+    "wxdat_circuit_trips",
+    "Number of times the circuit breaker for a provider host has opened.",
+    labelnames=["host"],
+)
+
+CIRCUIT_REJECTED = Counter(
+    "wxdat_circuit_rejected",
+    "Requests skipped because the circuit breaker for a provider host was open.",
+    labelnames=["host"],
+)
+
+PROVIDER_LATENCY = Histogram(
+    "wxdat_provider_latency_seconds",
+    "Latency of completed requests to a provider host.",
+    labelnames=["host"],
+)
+
+PROVIDER_HEDGED = Counter(
+    "wxdat_provider_hedged",
+    "Hedged (duplicate) requests sent to a slow provider host.",
+    labelnames=["host"],
+)
+
+QUOTA_REMAINING = Gauge(
+    "wxdat_quota_remaining",
+    "Calls remaining in the daily quota for a provider API key.",
+    labelnames=["key"],
+    multiprocess_mode="livemin",
+)
+
 STATION_READINGS = Counter(
     "wxdat_station_readings",
     "Readings recorded by the station.",
@@ -26,40 +64,65 @@ STATION_ERRORS = Counter(
     labelnames=["station"],
 )
 
+STATION_CYCLES = Counter(
+    "wxdat_station_cycles",
+    "Update cycles run by the station recorder.",
+    labelnames=["station"],
+)
+
+STATION_OVERFLOW = Counter(
+    "wxdat_station_overflow",
+    "Update cycles that took longer than the update interval.",
+    labelnames=["station"],
+)
+
+STATION_CADENCE = Gauge(
+    "wxdat_station_cadence",
+    "Learned publication period (in seconds) of the station.",
+    labelnames=["station"],
+    multiprocess_mode="livemostrecent",
+)
+
 CURRENT_TEMPERATURE = Gauge(
     "wxdat_current_temperature",
     "Current temperature reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_FEELS_LIKE = Gauge(
     "wxdat_current_feels_like_temperature",
     "Current 'feels like' temperature reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_DEWPOINT = Gauge(
     "wxdat_current_dewpoint",
     "Current dewpoint reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_WIND_SPEED = Gauge(
     "wxdat_current_wind_speed",
     "Current wind speed reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_WIND_GUSTS = Gauge(
     "wxdat_current_wind_gusts",
     "Current wind gusts reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_WIND_BEARING = Gauge(
     "wxdat_current_wind_bearing",
     "Current wind bearing reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 TOTAL_PRECIP = Counter(
@@ -72,65 +135,146 @@ CURRENT_HUMIDITY = Gauge(
     "wxdat_current_humidity",
     "Current humidity reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_REL_PRESSURE = Gauge(
     "wxdat_current_rel_pressure",
     "Current relative pressure reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_ABS_PRESSURE = Gauge(
     "wxdat_current_abs_pressure",
     "Current absolute pressure reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_CLOUDS = Gauge(
     "wxdat_current_clouds",
     "Current cloud cover reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_VISIBILITY = Gauge(
     "wxdat_current_visibility",
     "Current visibility reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_UV_INDEX = Gauge(
     "wxdat_current_uv_index",
     "Current UV index reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_OZONE = Gauge(
     "wxdat_current_ozone",
     "Current ozone reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_SOLAR_LUX = Gauge(
     "wxdat_current_solar_lux",
     "Current solar level reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
 )
 
 CURRENT_SOLAR_RAD = Gauge(
     "wxdat_current_solar_radiation",
     "Current solar radiation reported by the station.",
     labelnames=["station"],
+    multiprocess_mode="livemostrecent",
+)
+
+
+CLUSTER_NODES = Gauge(
+    "wxdat_cluster_nodes",
+    "Live nodes visible to this node.",
+    labelnames=["node"],
+    multiprocess_mode="livemostrecent",
+)
+
+CLUSTER_LEASES = Gauge(
+    "wxdat_cluster_leases",
+    "Station leases held by this node.",
+    labelnames=["node"],
+    multiprocess_mode="livesum",
+)
+
+SPOOL_DEPTH = Gauge(
+    "wxdat_spool_depth",
+    "Entries waiting in the local spool.",
+    multiprocess_mode="livesum",
+)
+
+SPOOL_APPENDED = Counter("wxdat_spool_appended", "Entries added to the local spool")
+SPOOL_REPLAYED = Counter("wxdat_spool_replayed", "Spooled entries saved to the database")
+SPOOL_DROPPED = Counter("wxdat_spool_dropped", "Spooled entries dropped due to size limit")
+SPOOL_DEAD = Counter("wxdat_spool_dead", "Spooled entries rejected by the database")
+
+SPOOL_REPLAY_RATE = Gauge(
+    "wxdat_spool_replay_rate",
+    "Entries per second saved by the most recent replay batch.",
+    multiprocess_mode="livesum",
+)
+
+PIPELINE_DEPTH = Gauge(
+    "wxdat_pipeline_depth",
+    "Readings waiting in the write queue.",
+    multiprocess_mode="livesum",
 )
 
+PIPELINE_DROPPED = Counter("wxdat_pipeline_dropped", "Readings dropped due to a full write queue")
+
+PIPELINE_WAIT = Histogram(
+    "wxdat_pipeline_wait_seconds",
+    "Time spent waiting to add a reading to the write queue.",
+)
+
+ARCHIVE_ROWS = Counter("wxdat_archive_rows", "Readings moved from the database to the archive")
+ARCHIVE_FILES = Counter("wxdat_archive_files", "Parquet files written to the archive")
+
+REPLICA_LAG = Gauge(
+    "wxdat_replica_lag",
+    "Replication lag (in seconds) of a read replica; +Inf if unavailable.",
+    labelnames=["replica"],
+    multiprocess_mode="livemax",
+)
+REPLICA_FALLBACK = Counter(
+    "wxdat_replica_fallback", "Read sessions sent to the primary with no fresh replica"
+)
+
+COMPACT_REMOVED = Counter("wxdat_compact_removed", "Readings replaced by downsampled readings")
+COMPACT_ADDED = Counter("wxdat_compact_added", "Downsampled readings saved by compaction")
+
+PARTITIONS_CREATED = Counter("wxdat_partitions_created", "Monthly partitions created ahead")
+PARTITIONS_DROPPED = Counter("wxdat_partitions_dropped", "Monthly partitions dropped for retention")
+PARTITIONS_EXPIRED_ROWS = Counter(
+    "wxdat_partitions_expired_rows", "Readings deleted from the default partition for retention"
+)
+
+DB_SESSIONS = Counter("wxdat_session_created", "Database sessions created")
+DB_WRITES = Counter("wxdat_session_writes", "Database write attemps")
+DB_COMMITS = Counter("wxdat_session_commits", "Database commits completed")
+DB_ERRORS = Counter("wxdat_session_errors", "Database session errors")
+
 
 class DatabaseMetrics:
     def __init__(self, engine):
         self._engine = engine
 
-        self.sessions = Counter("wxdat_session_created", "Database sessions created")
-        self.writes = Counter("wxdat_session_writes", "Database write attemps")
-        self.commits = Counter("wxdat_session_commits", "Database commits completed")
-        self.errors = Counter("wxdat_session_errors", "Database session errors")
+        self.sessions = DB_SESSIONS
+        self.writes = DB_WRITES
+        self.commits = DB_COMMITS
+        self.errors = DB_ERRORS
 
 
 class BaseStationMetrics:
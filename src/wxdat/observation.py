@@ -0,0 +1,50 @@
+"""Readings passed from the providers to metrics and storage."""
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherObservation:
+    """Current conditions reported by a station.
+
+    Observations are immutable and much lighter than ORM instances; database rows
+    are only created from them when they are saved.
+    """
+
+    timestamp: datetime
+    provider: str
+    station_id: str
+
+    temperature: float | None = None
+    feels_like: float | None = None
+    dew_point: float | None = None
+
+    wind_speed: float | None = None
+    wind_gusts: float | None = None
+    wind_bearing: float | None = None
+
+    humidity: float | None = None
+
+    precip_hour: float | None = None
+    precip_day: float | None = None
+    precip_week: float | None = None
+    precip_month: float | None = None
+    precip_year: float | None = None
+    precip_total: float | None = None
+
+    rel_pressure: float | None = None
+    abs_pressure: float | None = None
+
+    cloud_cover: float | None = None
+    visibility: float | None = None
+    uv_index: float | None = None
+    ozone: float | None = None
+
+    solar_lux: float | None = None
+    solar_rad: float | None = None
+
+    remarks: str | None = None
+
+
+OBSERVATION_FIELDS = [field.name for field in fields(WeatherObservation)]
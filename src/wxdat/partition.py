@@ -0,0 +1,253 @@
+"""Monthly range partitioning of readings for PostgreSQL.
+
+When enabled, current_conditions is created as a table partitioned by timestamp
+with one partition per month.  Partitions are created ahead of time and old
+partitions are detached and dropped for retention, instead of deleting rows.
+
+Partitioning applies when the table is first created; existing tables are left
+unchanged.  Readings outside of the monthly partitions (e.g. very old readings
+replayed from the spool) are kept in a default partition.  They are moved to the
+monthly partition when it is created, and deleted from the default partition
+once past the retention period.
+"""
+
+import logging
+import re
+from datetime import UTC, datetime
+
+import sqlalchemy as sql
+
+from .database import CurrentConditions, StationRecord, WeatherData, WeatherDatabase
+from .metrics import PARTITIONS_CREATED, PARTITIONS_DROPPED, PARTITIONS_EXPIRED_ROWS
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = CurrentConditions.__tablename__
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+
+PARTITION_PATTERN = re.compile(rf"^{PARENT_TABLE}_(\d{{4}})_(\d{{2}})$")
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    """Return the first day of the month count months after the given month."""
+
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=UTC)
+
+
+def month_start(timestamp: datetime) -> datetime:
+    """Return the first day of the month containing timestamp."""
+    return add_months(timestamp, 0)
+
+
+def partition_name(month: datetime) -> str:
+    """Return the name of the partition holding readings for the given month."""
+    return f"{PARENT_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> datetime | None:
+    """Return the month held by the named partition (or None if not a monthly partition)."""
+
+    match = PARTITION_PATTERN.match(name)
+
+    if match is None:
+        return None
+
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=UTC)
+
+
+def retention_cutoff(now: datetime, retention: int) -> datetime:
+    """Return the start of the oldest month kept for the given retention (in months)."""
+    return add_months(month_start(now), -retention)
+
+
+def expired_partitions(names, now: datetime, retention: int) -> list[str]:
+    """Return the partitions whose readings are all older than retention months."""
+
+    cutoff = retention_cutoff(now, retention)
+
+    return sorted(
+        name
+        for name in names
+        if (month := partition_month(name)) is not None and add_months(month, 1) <= cutoff
+    )
+
+
+def partitioned_table(metadata: sql.MetaData) -> sql.Table:
+    """Define current_conditions as a table partitioned by timestamp."""
+
+    # the foreign key to stations must be resolvable in the same metadata
+    StationRecord.__table__.to_metadata(metadata)
+
+    # the partition key must be part of the primary key
+    columns = [sql.Column("id", sql.Integer, autoincrement=True)]
+    columns += [
+        column._copy() for column in CurrentConditions.__table__.columns if column.key != "id"
+    ]
+
+    table = sql.Table(
+        PARENT_TABLE,
+        metadata,
+        *columns,
+        sql.PrimaryKeyConstraint("id", "timestamp"),
+        postgresql_partition_by="RANGE (timestamp)",
+    )
+
+    sql.Index("ix_current_conditions_station_time", table.c.station_key, table.c.timestamp)
+
+    return table
+
+
+def create_partitioned_table(conn):
+    """Create current_conditions as a partitioned table, along with the other tables."""
+
+    logger.info("Creating partitioned table: %s", PARENT_TABLE)
+
+    tables = [table for name, table in WeatherData.metadata.tables.items() if name != PARENT_TABLE]
+    WeatherData.metadata.create_all(conn, tables=tables)
+
+    partitioned_table(sql.MetaData()).create(conn)
+
+    conn.execute(sql.text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+
+class PartitionManager(PeriodicTask):
+    """Create future partitions and drop partitions past the retention period."""
+
+    def __init__(self, database: WeatherDatabase, months_ahead=3, retention=None, interval=86400):
+        super().__init__("partitions", interval)
+
+        self.database = database
+        self.months_ahead = months_ahead
+        self.retention = retention
+
+        self.logger = logger.getChild("PartitionManager")
+
+    def run_task(self):
+        """Maintain partitions for the current time."""
+
+        now = datetime.now(UTC)
+
+        self.create_partitions(now)
+
+        if self.retention is not None:
+            self.drop_partitions(now)
+            self.expire_default(now)
+
+    def partitions(self) -> list[str]:
+        """Return the names of all partitions of the readings table."""
+
+        query = sql.text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        )
+
+        with self.database.engine.connect() as conn:
+            return [row[0] for row in conn.execute(query, {"parent": PARENT_TABLE})]
+
+    def create_partitions(self, now: datetime) -> list[str]:
+        """Create partitions from this month through months_ahead months from now."""
+
+        existing = set(self.partitions())
+        created = []
+
+        for offset in range(self.months_ahead + 1):
+            month = add_months(month_start(now), offset)
+            name = partition_name(month)
+
+            if name in existing:
+                continue
+
+            self.logger.info("creating partition: %s", name)
+
+            with self.database.engine.begin() as conn:
+                self._create_partition(conn, name, month, add_months(month, 1))
+
+            created.append(name)
+
+        PARTITIONS_CREATED.inc(len(created))
+
+        return created
+
+    def _create_partition(self, conn, name, start: datetime, end: datetime):
+        """Create a partition, moving any readings in its range out of the default partition.
+
+        The default partition may not hold readings in the range of an attached
+        partition, so they are moved to the new table before it is attached.
+        """
+
+        bounds = {"start": start, "end": end}
+        values = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+        pending = conn.execute(
+            sql.text(
+                f"SELECT 1 FROM {DEFAULT_PARTITION} "
+                "WHERE timestamp >= :start AND timestamp < :end LIMIT 1"
+            ),
+            bounds,
+        ).first()
+
+        if pending is None:
+            conn.execute(
+                sql.text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} {values}")
+            )
+            return
+
+        conn.execute(
+            sql.text(
+                f"CREATE TABLE IF NOT EXISTS {name} "
+                f"(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+
+        moved = conn.execute(
+            sql.text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+
+        self.logger.info("moved %d readings from %s", moved.rowcount, DEFAULT_PARTITION)
+
+        conn.execute(sql.text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {values}"))
+
+    def expire_default(self, now: datetime) -> int:
+        """Delete readings from the default partition older than the retention period."""
+
+        cutoff = retention_cutoff(now, self.retention)
+
+        with self.database.engine.begin() as conn:
+            result = conn.execute(
+                sql.text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"),
+                {"cutoff": cutoff},
+            )
+
+        if result.rowcount > 0:
+            self.logger.info(
+                "deleted %d expired readings from %s", result.rowcount, DEFAULT_PARTITION
+            )
+
+        PARTITIONS_EXPIRED_ROWS.inc(result.rowcount)
+
+        return result.rowcount
+
+    def drop_partitions(self, now: datetime) -> list[str]:
+        """Detach and drop partitions older than the retention period (in months)."""
+
+        expired = expired_partitions(self.partitions(), now, self.retention)
+
+        for name in expired:
+            self.logger.info("dropping partition: %s", name)
+
+            with self.database.engine.begin() as conn:
+                conn.execute(sql.text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                conn.execute(sql.text(f"DROP TABLE {name}"))
+
+        PARTITIONS_DROPPED.inc(len(expired))
+
+        return expired
@@ -0,0 +1,321 @@
+"""Persistence stage for readings produced by the station recorders."""
+
+import logging
+import queue
+import threading
+import time
+from enum import StrEnum
+
+from .database import DATA_ERRORS, WeatherDatabase
+from .metrics import PIPELINE_DEPTH, PIPELINE_DROPPED, PIPELINE_WAIT
+from .observation import WeatherObservation
+from .providers import BaseStation
+
+logger = logging.getLogger(__name__)
+
+
+def _remaining(deadline):
+    """Return the time left until deadline (or None if there is no deadline)."""
+
+    if deadline is None:
+        return None
+
+    return max(deadline - time.monotonic(), 0)
+
+
+class QueuePolicy(StrEnum):
+    """Behavior when the write queue is full."""
+
+    BLOCK = "block"
+    DROP_NEWEST = "drop_newest"
+    DROP_OLDEST = "drop_oldest"
+
+
+class Writer:
+    """Save readings to the database in the calling thread."""
+
+    def __init__(self, database: WeatherDatabase, spool=None):
+        self.database = database
+        self.spool = spool
+
+        self.logger = logger.getChild("Writer")
+
+    def start(self) -> None:
+        """Start the writer (if needed)."""
+
+    def stop(self, timeout=None) -> int:
+        """Stop the writer, saving any pending readings; returns the number dropped."""
+        return 0
+
+    def submit(self, station: BaseStation, entry: WeatherObservation) -> bool:
+        """Submit a reading from the given station to be saved."""
+        return self.write(station, entry)
+
+    def write(self, station: BaseStation, entry: WeatherObservation) -> bool:
+        """Save a reading to the database, falling back to the spool if configured."""
+
+        # if we succesfully record the data, update the total readings for the station...  it's a bit
+        # hacky to reach into the station this way, but this is the only place we can be sure that the
+        # data has been stored in the database and have reference to the station identifiers
+        if self.database.save(entry):
+            station.metrics.readings.inc()
+            return True
+
+        return self._spool(station, entry)
+
+    def _spool(self, station: BaseStation, entry: WeatherObservation) -> bool:
+        # hold on to the reading until the database is available again
+        if self.spool is not None and self.spool.append(entry):
+            self.logger.debug("-- database unavailable; reading spooled")
+            return True
+
+        station.metrics.failed.inc()
+
+        return False
+
+    def write_batch(self, items: list[tuple[BaseStation, WeatherObservation]]) -> None:
+        """Save readings from multiple stations in a single transaction."""
+
+        if len(items) == 1:
+            self.write(*items[0])
+            return
+
+        try:
+            self.database.save_all([entry for _, entry in items], strict=True)
+
+        except DATA_ERRORS as err:
+            self.logger.warning(
+                "Unable to save batch (%s); saving readings individually", getattr(err, "orig", err)
+            )
+
+            # save the readings individually so that one bad reading does not fail the rest
+            for station, entry in items:
+                self.write(station, entry)
+
+            return
+
+        except Exception as err:
+            self.logger.warning(
+                "Unable to save batch; database unavailable: %s", getattr(err, "orig", err)
+            )
+
+            # retrying each reading would only fail again; spool the batch instead
+            for station, entry in items:
+                self._spool(station, entry)
+
+            return
+
+        for station, _ in items:
+            station.metrics.readings.inc()
+
+
+class WriterPool(Writer):
+    """Save readings using a pool of writer threads fed by a bounded queue.
+
+    This decouples fetching data from the providers from saving it to the database,
+    so a slow database does not delay the next fetch (and vice versa).  When the
+    queue is full, the policy determines whether producers block (backpressure) or
+    readings are dropped.
+
+    Readings that are waiting in the queue when a writer becomes available are
+    saved together (up to batch_size) in a single commit.
+    """
+
+    def __init__(
+        self,
+        database: WeatherDatabase,
+        spool=None,
+        workers=2,
+        queue_size=1000,
+        policy=QueuePolicy.BLOCK,
+        block_timeout=None,
+        batch_size=100,
+    ):
+        super().__init__(database, spool)
+
+        self.policy = QueuePolicy(policy)
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stopping = False
+
+        self.threads = [
+            threading.Thread(name=f"writer-{idx}", target=self.run_loop, daemon=True)
+            for idx in range(workers)
+        ]
+
+        self.logger = logger.getChild("WriterPool")
+
+    def start(self) -> None:
+        """Start the writer threads."""
+
+        self.logger.debug("Starting %d writer threads", len(self.threads))
+
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=None) -> int:
+        """Signal the writer threads to exit once the queue has been drained.
+
+        If the queue is not drained within timeout seconds, pending readings are
+        moved to the spool (if configured) or dropped; returns the number dropped.
+        """
+
+        self.logger.debug("Stopping writer threads; %d pending", self.queue.qsize())
+
+        self.stopping = True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        # a sentinel for each thread, queued behind any pending readings
+        try:
+            for _ in self.threads:
+                self.queue.put(None, timeout=_remaining(deadline))
+        except queue.Full:
+            pass
+
+        for thread in self.threads:
+            thread.join(_remaining(deadline))
+
+        busy = [thread for thread in self.threads if thread.is_alive()]
+
+        if not busy:
+            return 0
+
+        self.logger.warning("%d writers did not finish in time", len(busy))
+
+        return self._abandon_pending()
+
+    def _abandon_pending(self) -> int:
+        dropped = 0
+
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            self.queue.task_done()
+
+            if item is None:
+                continue
+
+            station, entry = item
+
+            if self.spool is not None and self.spool.append(entry):
+                continue
+
+            self._dropped(station)
+            dropped += 1
+
+        PIPELINE_DEPTH.set(self.queue.qsize())
+
+        return dropped
+
+    def submit(self, station: BaseStation, entry: WeatherObservation) -> bool:
+        """Queue a reading from the given station to be saved."""
+
+        # readings queued behind the sentinels would never be saved
+        if self.stopping:
+            return self._submit_late(station, entry)
+
+        item = (station, entry)
+        started = time.monotonic()
+
+        try:
+            if self.policy == QueuePolicy.BLOCK:
+                self.queue.put(item, timeout=self.block_timeout)
+
+            elif self.policy == QueuePolicy.DROP_NEWEST:
+                self.queue.put_nowait(item)
+
+            else:
+                self._put_drop_oldest(item)
+
+        except queue.Full:
+            self.logger.warning("write queue full; dropping reading from %s", station.name)
+            self._dropped(station)
+            return False
+
+        finally:
+            PIPELINE_WAIT.observe(time.monotonic() - started)
+            PIPELINE_DEPTH.set(self.queue.qsize())
+
+        return True
+
+    def _submit_late(self, station: BaseStation, entry: WeatherObservation) -> bool:
+        if self.spool is not None and self.spool.append(entry):
+            return True
+
+        self.logger.warning("writers stopping; dropping reading from %s", station.name)
+        self._dropped(station)
+
+        return False
+
+    def _put_drop_oldest(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+
+            except queue.Full:
+                pass
+
+            try:
+                oldest = self.queue.get_nowait()
+                self.queue.task_done()
+
+            except queue.Empty:
+                continue
+
+            # the pool is stopping; keep the sentinel and drop the new reading instead
+            if oldest is None:
+                self.queue.put(None)
+                raise queue.Full()
+
+            oldest, _ = oldest
+
+            self.logger.warning("write queue full; dropping oldest reading from %s", oldest.name)
+            self._dropped(oldest)
+
+    def _dropped(self, station: BaseStation):
+        PIPELINE_DROPPED.inc()
+        station.metrics.failed.inc()
+
+    def run_loop(self):
+        """Save queued readings until a sentinel is received."""
+
+        running = True
+
+        while running:
+            batch = self._next_batch()
+            items = [item for item in batch if item is not None]
+
+            # each thread takes at most one sentinel (always the last in the batch)
+            running = len(items) == len(batch)
+
+            try:
+                if items:
+                    self.write_batch(items)
+
+            except Exception:
+                self.logger.exception("Unhandled exception saving readings")
+
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+                PIPELINE_DEPTH.set(self.queue.qsize())
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+
+        # group readings that are already waiting, without waiting for more
+        while batch[-1] is not None and len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
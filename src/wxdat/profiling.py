@@ -0,0 +1,167 @@
+"""On-demand profiling of a running process through the metrics server.
+
+When enabled, the metrics server also handles these debug requests:
+
+    /debug/stacks                  current stack of every thread (text)
+    /debug/profile?seconds=N       sample all threads for N seconds (collapsed stacks)
+
+Profiles use the collapsed stack format (one "thread;frame;...;frame count" line
+per unique stack), which can be rendered with flamegraph.pl or speedscope.  The
+optional thread parameter limits a profile to threads whose name contains it
+(e.g. thread=NOAA for the NOAA recorders).
+"""
+
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from prometheus_client import REGISTRY, make_wsgi_app
+from prometheus_client.exposition import ThreadingWSGIServer
+
+logger = logging.getLogger(__name__)
+
+# profiles are limited to this many seconds, to bound the cost of a single request
+MAX_PROFILE_SECONDS = 300
+
+DEFAULT_PROFILE_SECONDS = 10
+DEFAULT_SAMPLE_INTERVAL = 0.01
+
+
+def _thread_names():
+    return {thread.ident: thread.name for thread in threading.enumerate()}
+
+
+def stack_snapshot() -> str:
+    """Return the current stack of every thread as text."""
+
+    names = _thread_names()
+    lines = []
+
+    for ident, frame in sys._current_frames().items():
+        lines.append(f"--- {names.get(ident, 'unknown')} [{ident}]\n")
+        lines.extend(traceback.format_stack(frame))
+        lines.append("\n")
+
+    return "".join(lines)
+
+
+def _collapse(frame) -> list[str]:
+    stack = []
+
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+
+    stack.reverse()
+
+    return stack
+
+
+def sample_stacks(seconds, interval=DEFAULT_SAMPLE_INTERVAL, thread=None) -> Counter:
+    """Sample the stacks of all other threads; returns a count of each collapsed stack."""
+
+    samples = Counter()
+    current = threading.get_ident()
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        names = _thread_names()
+
+        for ident, frame in sys._current_frames().items():
+            if ident == current:
+                continue
+
+            name = names.get(ident, "unknown")
+
+            if thread is not None and thread not in name:
+                continue
+
+            samples[";".join([name, *_collapse(frame)])] += 1
+
+        time.sleep(interval)
+
+    return samples
+
+
+def collapsed_stacks(samples: Counter) -> str:
+    """Format stack samples in the collapsed stack format."""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class DebugApp:
+    """WSGI app that serves debug requests and passes others to the metrics app."""
+
+    def __init__(self, registry=REGISTRY):
+        self.metrics_app = make_wsgi_app(registry)
+
+        # only one profile at a time; sampling is expensive with many threads
+        self._profile_lock = threading.Lock()
+
+        self.logger = logger.getChild("DebugApp")
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+
+        if path == "/debug/stacks":
+            return self._respond(start_response, "200 OK", stack_snapshot())
+
+        if path == "/debug/profile":
+            return self._profile(environ, start_response)
+
+        return self.metrics_app(environ, start_response)
+
+    def _profile(self, environ, start_response):
+        params = parse_qs(environ.get("QUERY_STRING", ""))
+
+        try:
+            seconds = float(params.get("seconds", [DEFAULT_PROFILE_SECONDS])[0])
+            interval = float(params.get("interval", [DEFAULT_SAMPLE_INTERVAL])[0])
+        except ValueError:
+            return self._respond(start_response, "400 Bad Request", "invalid parameter\n")
+
+        if not 0 < seconds <= MAX_PROFILE_SECONDS or interval <= 0:
+            return self._respond(start_response, "400 Bad Request", "parameter out of range\n")
+
+        if not self._profile_lock.acquire(blocking=False):
+            return self._respond(start_response, "409 Conflict", "profile already running\n")
+
+        try:
+            self.logger.info("profiling threads for %f sec", seconds)
+            thread = params.get("thread", [None])[0]
+            samples = sample_stacks(seconds, interval=interval, thread=thread)
+        finally:
+            self._profile_lock.release()
+
+        return self._respond(start_response, "200 OK", collapsed_stacks(samples))
+
+    def _respond(self, start_response, status, body: str):
+        data = body.encode("utf-8")
+
+        start_response(
+            status,
+            [("Content-Type", "text/plain; charset=utf-8"), ("Content-Length", str(len(data)))],
+        )
+
+        return [data]
+
+
+class _SilentHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_debug_server(port, addr="0.0.0.0", registry=REGISTRY):
+    """Start the metrics server with debug requests enabled in a daemon thread."""
+
+    httpd = make_server(addr, port, DebugApp(registry), ThreadingWSGIServer, _SilentHandler)
+
+    thread = threading.Thread(name="debug-server", target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    return httpd
@@ -1,22 +1,21 @@
 """Base funcionality for weather providers."""
 
 import logging
+import threading
+import time
 from abc import ABC, abstractproperty
-from dataclasses import dataclass
-from datetime import datetime
+from contextlib import contextmanager
 from enum import StrEnum
+from urllib.parse import urlparse
 
 import requests
 from ratelimit import limits, sleep_and_retry
-from requests.exceptions import ConnectionError
-from wamu.distance import Distance
-from wamu.pressure import Pressure
-from wamu.rate import Rate
-from wamu.temperature import Temperature
-from wamu.velocity import Velocity
-
-from ..database import CurrentConditions
+from requests.exceptions import ConnectionError, Timeout
+
+from ..breaker import CircuitBreaker
+from ..hedge import LatencyTracker, hedged_call
 from ..metrics import BaseStationMetrics
+from ..observation import WeatherObservation
 from ..version import __pkgname__, __version__
 
 logger = logging.getLogger(__name__)
@@ -37,80 +36,273 @@ class Precipitation(StrEnum):
     MIXED = "mixed"
 
 
-@dataclass
-class WeatherObservation:
-    """Current weather observations from a Station."""
+class RequestSkipped(Exception):
+    """A request was not sent (e.g. the station was cancelled or its deadline passed)."""
+
+
+@sleep_and_retry
+@limits(calls=1, period=1)
+def _rate_limit():
+    """Wait for a slot in the one request per second limit shared by all stations."""
+
+
+class SharedRequest:
+    """Share the result of a provider request among stations for a short time.
+
+    The first caller after the result expires performs the request; concurrent and
+    subsequent callers reuse its result (including failures) until it expires.
+    """
+
+    def __init__(self, fetch, ttl):
+        self.fetch = fetch
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._result = None
+        self._fetched = None
+
+    def get(self, *args, **kwargs):
+        """Return the shared result, calling fetch with the given arguments if expired."""
+
+        with self._lock:
+            now = time.monotonic()
 
-    timestamp: datetime
-    station: "BaseStation"
+            if self._fetched is None or now - self._fetched >= self.ttl:
+                self._result = self.fetch(*args, **kwargs)
 
-    temperature: Temperature | None = None
-    feels_like: Temperature | None = None
-    dew_point: Temperature | None = None
+                # the result is fresh from when it was received, not when requested
+                self._fetched = time.monotonic()
 
-    abs_pressure: Pressure | None = None
-    rel_pressure: Pressure | None = None
+            return self._result
 
-    wind_speed: Velocity | None = None
-    wind_gust: Velocity | None = None
-    wind_bearing: float | None = None
 
-    precip_rate: Rate | None = None
-    precip_type: Precipitation | None = None
-    precip_total: Distance | None = None
+class RateLimiter:
+    """Space calls evenly to stay within a quota; safe to share among threads."""
 
-    cloud_cover: float | None = None
-    cloud_ceiling: Distance | None = None
-    cloud_base: Distance | None = None
+    def __init__(self, calls, period):
+        self.spacing = period / calls
 
-    humidity: float | None = None
-    uv_index: float | None = None
-    visibility: Distance | None = None
+        self._lock = threading.Lock()
+        self._next_slot = 0
 
-    remarks: str | None = None
+    def acquire(self):
+        """Wait until the next call is allowed."""
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.spacing
+
+        if slot > now:
+            time.sleep(slot - now)
 
 
 class BaseStation(ABC):
+    # default timeouts (in seconds) for connecting to and reading from the provider
+    connect_timeout = 5.0
+    read_timeout = 30.0
+
     def __init__(self, name):
         self.name = name
 
+        # send a second request when the first is slower than usual
+        self.hedge = False
+
+        # monotonic time by which the current cycle must complete (if any)
+        self.deadline = None
+
+        # set when shutting down; no further requests are made
+        self.cancelled = False
+
         self.metrics = BaseStationMetrics(self)
 
         self.logger = logger.getChild("WeatherStation")
         self.logger.debug("new station: %s", name)
 
     @abstractproperty
-    def observe(self) -> CurrentConditions:
+    def observe(self) -> WeatherObservation:
         """Return the current conditions for this WeatherStation."""
 
     @abstractproperty
     def provider(self) -> WeatherProvider:
         """Return the provider name for this WeatherStation."""
 
+    @property
+    def streaming(self) -> bool:
+        """Determine if the station is currently pushing readings (instead of polling)."""
+        return False
+
+    def listen(self, callback, timeout=None) -> bool:
+        """Call callback with each reading pushed by the station.
+
+        If no reading is pushed within timeout seconds, the station is no longer
+        considered to be streaming (and is polled instead).
+
+        Returns False if the station does not support pushed readings.
+        """
+        return False
+
+    def unlisten(self):
+        """Stop receiving pushed readings."""
+        self.logger.debug("%s :: not listening for pushed readings", self.name)
+
     @property
     def user_agent(self):
         """Return the User-Agent string for this WeatherStation."""
         return f"{__pkgname__}/{__version__} (+https://github.com/jheddings/wxdat)"
 
-    @sleep_and_retry
-    @limits(calls=1, period=1)
-    def safer_get(self, url, params=None, headers=None):
-        """Convenience method to retrive a URL safely with a one second rate limit."""
+    def cancel(self):
+        """Skip any further requests (e.g. while shutting down)."""
+        self.cancelled = True
 
-        self.logger.debug("GET => %s", url)
+    @contextmanager
+    def cycle_deadline(self, seconds):
+        """Limit the time spent on requests made within this context."""
+
+        self.deadline = time.monotonic() + seconds
+
+        try:
+            yield
+        finally:
+            self.deadline = None
+
+    @property
+    def timeout(self):
+        """Return the (connect, read) timeout for the next request, honoring the deadline.
+
+        Returns None if the deadline has already passed.
+        """
+
+        if self.deadline is None:
+            return (self.connect_timeout, self.read_timeout)
 
-        resp = None
+        remaining = self.deadline - time.monotonic()
 
+        if remaining <= 0:
+            return None
+
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+    def safer_get(self, url, params=None, headers=None, rate_limit=True, timeout=None):
+        """Convenience method to retrive a URL safely.
+
+        Requests are guarded by a circuit breaker for the remote host, so that an
+        unavailable provider is not called repeatedly (and does not consume the
+        shared rate limit).  Callers that apply their own rate limit (such as batch
+        requests) may bypass the shared one.
+
+        An explicit (connect, read) timeout replaces the station's cycle deadline,
+        for requests made on behalf of other stations.
+        """
+
+        host = urlparse(url).netloc
+        breaker = CircuitBreaker.for_host(host)
+
+        if not breaker.allow():
+            self.logger.debug("Skipping request; circuit open for %s", breaker.name)
+            return None
+
+        try:
+            if rate_limit:
+                resp = self._limited_get(url, params, headers, timeout)
+            else:
+                resp = self._get(url, params, headers, timeout)
+
+        # requests that were never sent say nothing about the provider
+        except RequestSkipped:
+            breaker.release()
+            return None
+
+        # client errors (e.g. a bad API key) do not indicate a problem with the provider
+        if resp is None or resp.status_code >= 500 or resp.status_code == 429:
+            breaker.failure()
+        else:
+            breaker.success()
+
+        if resp is None:
+            return None
+
+        if not resp.ok:
+            self.logger.warning("Unable to download data; HTTP %d", resp.status_code)
+            self.metrics.errors.inc()
+            return None
+
+        return resp
+
+    def _limited_get(self, url, params=None, headers=None, timeout=None):
+        """Retrieve a URL with a one second rate limit; returns None on connection errors."""
+
+        _rate_limit()
+
+        return self._get(url, params, headers, timeout, rate_limit=True)
+
+    def _hedge_timeout(self, timeout=None):
+        """Return the time to wait for a hedged request, honoring the cycle deadline."""
+
+        if timeout is not None:
+            return timeout[1]
+
+        if self.deadline is None:
+            return self.read_timeout
+
+        return max(min(self.read_timeout, self.deadline - time.monotonic()), 0)
+
+    def _get(self, url, params=None, headers=None, timeout=None, rate_limit=False):
         full_headers = {"User-Agent": self.user_agent}
 
         if headers is not None:
             full_headers.update(headers)
 
+        tracker = LatencyTracker.for_host(urlparse(url).netloc)
+
+        def _attempt():
+            return self._http_get(url, params, full_headers, tracker, timeout)
+
+        # the second request counts against the rate limit like any other
+        def _hedge():
+            if rate_limit:
+                _rate_limit()
+
+            # the first request is still in flight
+            try:
+                return _attempt()
+            except RequestSkipped:
+                return None
+
+        if self.hedge:
+            return hedged_call(
+                _attempt, tracker, timeout=self._hedge_timeout(timeout), hedge=_hedge
+            )
+
+        return _attempt()
+
+    def _http_get(self, url, params, headers, tracker: LatencyTracker, timeout=None):
+        if self.cancelled:
+            self.logger.debug("Skipping request; station canceled")
+            raise RequestSkipped("station canceled")
+
+        if timeout is None:
+            timeout = self.timeout
+
+        if timeout is None:
+            self.logger.warning("Unable to download data; cycle deadline exceeded")
+            self.metrics.errors.inc()
+            raise RequestSkipped("cycle deadline exceeded")
+
+        self.logger.debug("GET => %s", url)
+
+        started = time.monotonic()
+
         try:
-            resp = requests.get(url, params=params, headers=full_headers)
+            resp = requests.get(url, params=params, headers=headers, timeout=timeout)
             self.logger.debug("=> HTTP %d: %s", resp.status_code, resp.reason)
             self.metrics.requests.inc()
 
+        except Timeout:
+            self.logger.warning("Unable to download data; request timed out")
+            self.metrics.errors.inc()
+            return None
+
         except ConnectionError:
             self.logger.warning("Unable to download data; connection error")
             self.metrics.errors.inc()
@@ -121,9 +313,6 @@ class BaseStation(ABC):
             self.metrics.errors.inc()
             return None
 
-        if not resp.ok:
-            self.logger.warning("Unable to download data; HTTP %d", resp.status_code)
-            self.metrics.errors.inc()
-            return None
+        tracker.record(time.monotonic() - started)
 
         return resp
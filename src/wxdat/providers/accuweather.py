@@ -10,7 +10,8 @@ from enum import StrEnum
 from pydantic import BaseModel, TypeAdapter
 from wamu import Fahrenheit, Inch, InchesMercury, Mile, MilesPerHour
 
-from ..database import CurrentConditions
+from ..observation import WeatherObservation
+from ..quota import DEFAULT_QUOTA_FILE, QuotaBudget
 from . import BaseStation, WeatherProvider
 
 logger = logging.getLogger(__name__)
@@ -88,7 +89,7 @@ API_Observations = TypeAdapter(list[API_Observation])
 
 
 class Station(BaseStation):
-    def __init__(self, name, *, api_key, location):
+    def __init__(self, name, *, api_key, location, daily_quota=None, quota_file=None):
         super().__init__(name)
 
         self.logger = logger.getChild("AccuWeather")
@@ -97,13 +98,27 @@ class Station(BaseStation):
         self.api_key = api_key
         self.location = location
 
+        if daily_quota is None:
+            self.quota = None
+        else:
+            self.quota = QuotaBudget.get(api_key, daily_quota, quota_file or DEFAULT_QUOTA_FILE)
+            self.quota.register(self)
+
+    def cancel(self):
+        """Skip any further requests and release this station's share of the quota."""
+
+        super().cancel()
+
+        if self.quota is not None:
+            self.quota.unregister(self)
+
     @property
     def provider(self) -> WeatherProvider:
         """Return the provider for this WeatherStation."""
         return WeatherProvider.ACCUWEATHER
 
     @property
-    def observe(self) -> CurrentConditions:
+    def observe(self) -> WeatherObservation:
         weather = self._api_get_current_weather()
 
         if weather is None:
@@ -119,7 +134,7 @@ class Station(BaseStation):
         pressure = InchesMercury(weather.Pressure.Imperial.Value)
         visibility = Mile(weather.Visibility.Imperial.Value)
 
-        return CurrentConditions(
+        return WeatherObservation(
             timestamp=weather.LocalObservationDateTime,
             provider=self.provider,
             station_id=self.location,
@@ -141,6 +156,10 @@ class Station(BaseStation):
     def _api_get_current_weather(self) -> API_Observation:
         self.logger.debug("getting current weather")
 
+        if self.quota is not None and not self.quota.acquire(self):
+            self.logger.debug("skipping update; waiting for quota budget")
+            return None
+
         url = f"{API_CURRENT_WX}/{self.location}"
 
         params = {
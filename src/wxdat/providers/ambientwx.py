@@ -4,18 +4,32 @@ https://ambientweather.docs.apiary.io/
 """
 
 import logging
+import threading
+import time
 from datetime import datetime
 
 from pydantic import BaseModel, TypeAdapter
 from wamu import Fahrenheit, Inch, InchesMercury, InchesPerHour, MilesPerHour
 
-from ..database import CurrentConditions
-from . import BaseStation, WeatherProvider
+from ..observation import WeatherObservation
+from . import BaseStation, SharedRequest, WeatherProvider
 
 logger = logging.getLogger(__name__)
 
 API_ENDPOINT = "https://rt.ambientweather.net/v1"
 
+# https://ambientweather.docs.apiary.io/#reference/ambient-realtime-api
+REALTIME_ENDPOINT = "https://rt2.ambientweather.net"
+
+# upper bound (in seconds) between attempts to connect to the realtime API
+REALTIME_MAX_RETRY = 300
+
+# devices report every minute; stations on the same account share results this long
+DEVICE_CACHE_TTL = 30
+
+# minimum time (in seconds) without a pushed reading before falling back to polling
+REALTIME_PUSH_TIMEOUT = 120
+
 
 # https://github.com/ambient-weather/api-docs/wiki/Device-Data-Specs
 class API_DeviceData(BaseModel):
@@ -61,11 +75,243 @@ class API_DeviceData(BaseModel):
     solarradiation: float | None = None
 
 
-API_DeviceDataList = TypeAdapter(list[API_DeviceData])
+# https://github.com/ambient-weather/api-docs/wiki/Device-Data-Specs#devices
+class API_Device(BaseModel):
+    macAddress: str
+    lastData: API_DeviceData | None = None
+
+
+API_DeviceList = TypeAdapter(list[API_Device])
+
+
+# realtime data includes the device address along with the usual fields
+class API_RealtimeData(API_DeviceData):
+    macAddress: str
+
+
+class RealtimeClient:
+    """Receive readings pushed by the Ambient Weather realtime API.
+
+    Requires the optional python-socketio package (`pip install wxdat[realtime]`).
+    One connection is shared by all stations on the same account.  The client
+    reconnects automatically; stations poll while it is not connected (or while
+    their device is not pushing readings).
+    """
+
+    __clients__ = {}
+    __registry_lock__ = threading.Lock()
+
+    def __init__(self, app_key, user_key, url=REALTIME_ENDPOINT, transports=None):
+        import socketio
+
+        self.app_key = app_key
+        self.user_key = user_key
+        self.url = url
+        self.transports = transports
+
+        self.listeners = {}
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+        self.sio = socketio.Client(reconnection=True, reconnection_delay_max=REALTIME_MAX_RETRY)
+        self.sio.on("connect", self._on_connect)
+        self.sio.on("disconnect", self._on_disconnect)
+        self.sio.on("subscribed", self._on_subscribed)
+        self.sio.on("data", self._on_data)
+
+        self.logger = logger.getChild("RealtimeClient")
+
+    @classmethod
+    def get(cls, app_key, user_key, url=REALTIME_ENDPOINT):
+        """Return the shared realtime client for the given keys (or None if unavailable)."""
+
+        with cls.__registry_lock__:
+            client = cls.__clients__.get((app_key, user_key, url))
+
+            if client is None:
+                try:
+                    client = cls(app_key, user_key, url)
+                except ModuleNotFoundError:
+                    logger.warning("python-socketio not installed; realtime updates disabled")
+                    return None
+
+                cls.__clients__[(app_key, user_key, url)] = client
+
+            return client
+
+    @property
+    def connected(self) -> bool:
+        """Determine if the client is currently connected."""
+        return self.sio.connected
+
+    def subscribe(self, device_id, callback):
+        """Call callback with the API_DeviceData for each reading pushed by the device."""
+
+        with self._lock:
+            self.listeners[device_id.lower()] = callback
+
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(
+                    name="ambient-realtime", target=self._connect_loop, daemon=True
+                )
+                self._thread.start()
+
+    def unsubscribe(self, device_id):
+        """Stop delivering readings for the given device."""
+
+        with self._lock:
+            self.listeners.pop(device_id.lower(), None)
+
+            if self.listeners:
+                return
+
+            self._thread = None
+
+        self.stop()
+
+    def stop(self):
+        """Disconnect from the realtime API."""
+
+        self._stopped.set()
+
+        if self.sio.connected:
+            self.sio.disconnect()
+
+    def _connect_loop(self):
+        delay = 1
+
+        # the client only reconnects on its own once the first connection succeeds
+        while not self._stopped.is_set():
+            try:
+                self.sio.connect(
+                    f"{self.url}/?api=1&applicationKey={self.app_key}",
+                    transports=self.transports,
+                )
+
+            except Exception as err:
+                self.logger.warning("Unable to connect to realtime API: %s", err)
+
+                if self._stopped.wait(delay):
+                    break
+
+                delay = min(delay * 2, REALTIME_MAX_RETRY)
+                continue
+
+            self.sio.wait()
+
+            # wait() returns once the client is disconnected and no longer reconnecting
+            delay = 1
+
+    def _on_connect(self):
+        self.logger.info("connected to realtime API; subscribing")
+        self.sio.emit("subscribe", {"apiKeys": [self.user_key]})
+
+    def _on_disconnect(self, *args):
+        self.logger.info("disconnected from realtime API")
+
+    def _on_subscribed(self, data):
+        devices = data.get("devices", []) if isinstance(data, dict) else []
+
+        self.logger.debug("subscribed to %d devices", len(devices))
+
+        for device in API_DeviceList.validate_python(devices):
+            if device.lastData is not None:
+                self._dispatch(device.macAddress, device.lastData)
+
+    def _on_data(self, data):
+        try:
+            reading = API_RealtimeData.model_validate(data)
+
+        except ValueError:
+            self.logger.warning("Unable to parse realtime data")
+            return
+
+        self._dispatch(reading.macAddress, reading)
+
+    def _dispatch(self, device_id, reading: API_DeviceData):
+        callback = self.listeners.get(device_id.lower())
+
+        if callback is None:
+            return
+
+        try:
+            callback(reading)
+        except Exception:
+            self.logger.exception("Unhandled exception handling realtime data")
+
+
+class Account:
+    """Latest data for all devices on an Ambient Weather account.
+
+    The API rate limits requests per user key, so stations that share an account
+    are served by a single /devices request per update cycle.
+    """
+
+    __accounts__ = {}
+    __registry_lock__ = threading.Lock()
+
+    def __init__(self, app_key, user_key, ttl=DEVICE_CACHE_TTL):
+        self.app_key = app_key
+        self.user_key = user_key
+
+        self._devices = SharedRequest(self._api_get_devices, ttl)
+
+        self.logger = logger.getChild("Account")
+
+    @classmethod
+    def get(cls, app_key, user_key):
+        """Return the shared account for the given keys."""
+
+        with cls.__registry_lock__:
+            account = cls.__accounts__.get((app_key, user_key))
+
+            if account is None:
+                account = cls(app_key, user_key)
+                cls.__accounts__[(app_key, user_key)] = account
+
+            return account
+
+    def device_data(self, station: BaseStation, device_id) -> API_DeviceData:
+        """Return the latest data for the given device, using station to make requests."""
+
+        devices = self._devices.get(station)
+
+        if devices is None:
+            return None
+
+        return devices.get(device_id.lower())
+
+    def _api_get_devices(self, station: BaseStation):
+        self.logger.debug("getting current weather for all devices")
+
+        url = f"{API_ENDPOINT}/devices"
+
+        params = {
+            "apiKey": self.user_key,
+            "applicationKey": self.app_key,
+        }
+
+        resp = station.safer_get(url, params)
+
+        if resp is None:
+            return None
+
+        data = resp.json()
+
+        device_list = API_DeviceList.validate_python(data)
+
+        return {
+            device.macAddress.lower(): device.lastData
+            for device in device_list
+            if device.lastData is not None
+        }
 
 
 class Station(BaseStation):
-    def __init__(self, name, *, app_key, user_key, device_id):
+    def __init__(self, name, *, app_key, user_key, device_id, realtime=False, realtime_url=None):
         super().__init__(name)
 
         self.logger = logger.getChild("AmbientWeather")
@@ -75,18 +321,79 @@ class Station(BaseStation):
         self.user_key = user_key
         self.device_id = device_id
 
+        self.account = Account.get(app_key, user_key)
+
+        self.realtime = None
+
+        if realtime:
+            self.realtime = RealtimeClient.get(app_key, user_key, realtime_url or REALTIME_ENDPOINT)
+
+        self._last_pushed = None
+
+        # monotonic time of the latest pushed reading, and how long it stays current
+        self._pushed_at = None
+        self._push_timeout = REALTIME_PUSH_TIMEOUT
+
     @property
     def provider(self) -> WeatherProvider:
         """Return the provider for this WeatherStation."""
         return WeatherProvider.AMBIENT
 
     @property
-    def observe(self) -> CurrentConditions:
+    def streaming(self) -> bool:
+        """Determine if readings are currently being pushed by the realtime API.
+
+        A connected client is not enough; the device must also have pushed a reading
+        recently (e.g. it may not be on the subscribed account).
+        """
+
+        if self.realtime is None or not self.realtime.connected:
+            return False
+
+        if self._pushed_at is None:
+            return False
+
+        return time.monotonic() - self._pushed_at < self._push_timeout
+
+    def listen(self, callback, timeout=None) -> bool:
+        """Call callback with the WeatherObservation for each reading pushed by the device."""
+
+        if self.realtime is None:
+            return False
+
+        # devices push about once a minute, which may be longer than the timeout
+        self._push_timeout = max(timeout or 0, REALTIME_PUSH_TIMEOUT)
+
+        def _on_reading(conditions: API_DeviceData):
+            self._pushed_at = time.monotonic()
+
+            # the same reading may be delivered again (e.g. after reconnecting)
+            if self._last_pushed is not None and conditions.dateutc <= self._last_pushed:
+                return
+
+            self._last_pushed = conditions.dateutc
+            callback(self._convert(conditions))
+
+        self.realtime.subscribe(self.device_id, _on_reading)
+
+        return True
+
+    def unlisten(self):
+        """Stop receiving pushed readings."""
+
+        if self.realtime is not None:
+            self.realtime.unsubscribe(self.device_id)
+
+    @property
+    def observe(self) -> WeatherObservation:
         conditions = self._api_get_current_weather()
 
         if conditions is None:
             return None
 
+        return self._convert(conditions)
+
+    def _convert(self, conditions: API_DeviceData) -> WeatherObservation:
         # read fields using correct units
         temperature = Fahrenheit(conditions.tempf)
         feels_like = Fahrenheit(conditions.feelsLike)
@@ -102,7 +409,7 @@ class Station(BaseStation):
         rel_pressure = InchesMercury(conditions.baromrelin)
         abs_pressure = InchesMercury(conditions.baromabsin)
 
-        return CurrentConditions(
+        return WeatherObservation(
             timestamp=conditions.date,
             provider=self.provider,
             station_id=self.device_id,
@@ -128,21 +435,9 @@ class Station(BaseStation):
     def _api_get_current_weather(self) -> API_DeviceData:
         self.logger.debug("getting current weather")
 
-        url = f"{API_ENDPOINT}/devices/{self.device_id}"
-
-        params = {
-            "apiKey": self.user_key,
-            "applicationKey": self.app_key,
-            "limit": 1,
-        }
-
-        resp = self.safer_get(url, params)
-
-        if resp is None:
-            return None
-
-        data = resp.json()
+        data = self.account.device_data(self, self.device_id)
 
-        data_list = API_DeviceDataList.validate_python(data)
+        if data is None:
+            self.logger.debug("no data for device: %s", self.device_id)
 
-        return data_list[0] if len(data_list) > 0 else None
+        return data
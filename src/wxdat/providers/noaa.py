@@ -10,7 +10,6 @@ from typing import Any
 from pydantic import BaseModel
 from wamu import Celsius, Meter, MetersPerSecond, MillimetersPerHour, Pascal
 
-from ..database import CurrentConditions
 from . import BaseStation, WeatherObservation, WeatherProvider
 
 logger = logging.getLogger(__name__)
@@ -113,7 +112,7 @@ class Station(BaseStation):
         rel_pressure = Pascal(props.seaLevelPressure.value)
         visibility = Meter(props.visibility.value)
 
-        return CurrentConditions(
+        return WeatherObservation(
             timestamp=props.timestamp,
             provider=self.provider,
             station_id=self.station,
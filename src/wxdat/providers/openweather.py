@@ -8,18 +8,28 @@ data from various API endpoints.
 """
 
 import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from wamu import Fahrenheit, Hectopascal, Meter, MilesPerHour
 
-from ..database import CurrentConditions
-from . import BaseStation, WeatherProvider
+from ..observation import WeatherObservation
+from . import BaseStation, RateLimiter, WeatherProvider
 
 logger = logging.getLogger(__name__)
 
 API_CURRENT_WX = "https://api.openweathermap.org/data/2.5/weather"
 
+# stations on the same API key share the results of a batch this long
+BATCH_CACHE_TTL = 30
+
+# maximum number of concurrent requests in a batch
+BATCH_CONCURRENCY = 8
+
 
 class API_Main(BaseModel):
     temp: float
@@ -102,8 +112,227 @@ class API_CurrentWeather(BaseModel):
         return f"{wx.main}: {wx.description} [{wx.id}]"
 
 
+class Batch:
+    """Fetch current weather for all locations that share an API key.
+
+    OpenWeatherMap does not offer a batch endpoint for arbitrary coordinates (the
+    group endpoint requires city IDs), so the locations are fetched concurrently,
+    paced to stay within the per-minute quota of the key.
+
+    Each location is only fetched when its result is older than ttl seconds.  When a
+    station needs a new result, the batch also includes other stations that have not
+    been fetched yet or are expected to poll within the ttl, so that requests from
+    stations that are out of phase are coalesced (without refetching locations that
+    are not needed yet).
+
+    Batches run in their own thread, so a large batch is not bound to the cycle
+    deadline of whichever station started it; stations wait for a batch in progress
+    only until their own deadline.
+    """
+
+    __batches__ = {}
+    __registry_lock__ = threading.Lock()
+
+    def __init__(self, api_key, calls_per_minute=60, ttl=BATCH_CACHE_TTL, clock=None):
+        self.api_key = api_key
+        self.calls_per_minute = calls_per_minute
+        self.ttl = ttl
+
+        self.clock = clock or time.monotonic
+
+        self.limiter = RateLimiter(calls_per_minute, 60)
+        self.stations = weakref.WeakSet()
+
+        self._lock = threading.Lock()
+
+        # station_id => (time fetched, result)
+        self._results = {}
+
+        # station_id => (time of the latest request, time between requests)
+        self._requests = {}
+
+        # station_id => completion event of the batch fetching the station
+        self._pending = {}
+
+        self.logger = logger.getChild("Batch")
+
+    @classmethod
+    def get(cls, api_key, calls_per_minute=60):
+        """Return the shared batch for the given API key.
+
+        Stations on the same key share its quota; if they are configured with
+        different limits, the lowest one applies.
+        """
+
+        with cls.__registry_lock__:
+            batch = cls.__batches__.get(api_key)
+
+            if batch is None:
+                batch = cls(api_key, calls_per_minute)
+                cls.__batches__[api_key] = batch
+
+            elif calls_per_minute != batch.calls_per_minute:
+                logger.warning(
+                    "conflicting calls_per_minute for the same API key: %d, %d; using the lower",
+                    batch.calls_per_minute,
+                    calls_per_minute,
+                )
+
+                if calls_per_minute < batch.calls_per_minute:
+                    batch.calls_per_minute = calls_per_minute
+                    batch.limiter = RateLimiter(calls_per_minute, 60)
+
+            return batch
+
+    def register(self, station: "Station"):
+        """Include the given station in future batches."""
+        self.stations.add(station)
+
+    def current_weather(self, station: "Station") -> API_CurrentWeather:
+        """Return the current weather for the given station.
+
+        Returns None if the batch did not complete before the station's deadline
+        (or did not include the station); it will be included in the next batch.
+        """
+
+        done = self._refresh(station)
+
+        if station.deadline is None:
+            wait = station.read_timeout
+        else:
+            wait = max(station.deadline - time.monotonic(), 0)
+
+        if not done.wait(wait):
+            self.logger.debug("batch in progress; skipping %s", station.station_id)
+            return None
+
+        with self._lock:
+            _, result = self._results.get(station.station_id, (None, None))
+
+        return result
+
+    def _refresh(self, station: "Station") -> threading.Event:
+        """Start a batch if the result for station has expired; returns its completion event."""
+
+        with self._lock:
+            now = self.clock()
+
+            last = self._requests.get(station.station_id)
+            interval = None if last is None else now - last[0]
+            self._requests[station.station_id] = (now, interval)
+
+            if not self._expired(station.station_id, now):
+                done = threading.Event()
+                done.set()
+                return done
+
+            pending = self._pending.get(station.station_id)
+
+            if pending is not None:
+                return pending
+
+            stations = [station] + [
+                other
+                for other in self.stations
+                if other.station_id != station.station_id and self._due(other.station_id, now)
+            ]
+
+            done = threading.Event()
+
+            for member in stations:
+                self._pending[member.station_id] = done
+
+        thread = threading.Thread(
+            name="owm-batch", target=self._run_batch, args=(stations, done), daemon=True
+        )
+        thread.start()
+
+        return done
+
+    def _expired(self, station_id, now) -> bool:
+        fetched, _ = self._results.get(station_id, (None, None))
+        return fetched is None or now - fetched >= self.ttl
+
+    def _due(self, station_id, now) -> bool:
+        """Determine if a station should be included in a batch that is starting now."""
+
+        if station_id in self._pending or not self._expired(station_id, now):
+            return False
+
+        # stations that have not been fetched yet will poll soon
+        if station_id not in self._results:
+            return True
+
+        last, interval = self._requests.get(station_id, (None, None))
+
+        # include stations expected to poll before this batch expires
+        return interval is not None and last + interval < now + self.ttl
+
+    def _run_batch(self, stations, done: threading.Event):
+        try:
+            results = self._api_get_current_weather(stations)
+        except Exception:
+            self.logger.exception("Unhandled exception in batch")
+            results = {station.station_id: None for station in stations}
+
+        with self._lock:
+            fetched = self.clock()
+
+            for station_id, result in results.items():
+                self._results[station_id] = (fetched, result)
+
+                if self._pending.get(station_id) is done:
+                    del self._pending[station_id]
+
+        done.set()
+
+    def _api_get_location(self, station: "Station"):
+        self.limiter.acquire()
+
+        params = {
+            "lat": station.latitude,
+            "lon": station.longitude,
+            "appid": self.api_key,
+            "units": "imperial",
+        }
+
+        # the batch is not bound to the deadline of any one station
+        timeout = (station.connect_timeout, station.read_timeout)
+
+        resp = station.safer_get(API_CURRENT_WX, params, rate_limit=False, timeout=timeout)
+
+        if resp is None:
+            return None
+
+        return resp.json()
+
+    def _api_get_current_weather(self, stations):
+        self.logger.debug("getting current weather for %d locations", len(stations))
+
+        workers = max(1, min(BATCH_CONCURRENCY, len(stations)))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="owm-batch") as pool:
+            responses = list(pool.map(self._api_get_location, stations))
+
+        # stations without a valid response (e.g. an error) are reported as None
+        results = {}
+
+        for station, data in zip(stations, responses, strict=True):
+            results[station.station_id] = None
+
+            if data is None:
+                continue
+
+            try:
+                results[station.station_id] = API_CurrentWeather.model_validate(data)
+            except ValidationError:
+                self.logger.warning("Invalid response for location: %s", station.station_id)
+
+        return results
+
+
 class Station(BaseStation):
-    def __init__(self, name, *, api_key, latitude, longitude):
+    def __init__(self, name, *, api_key, latitude, longitude, calls_per_minute=60):
         super().__init__(name)
 
         self.logger = logger.getChild("OpenWeatherMap")
@@ -116,13 +345,16 @@ class Station(BaseStation):
         # generate a station ID for database entries
         self.station_id = f"{latitude},{longitude}"
 
+        self.batch = Batch.get(api_key, calls_per_minute)
+        self.batch.register(self)
+
     @property
     def provider(self) -> WeatherProvider:
         """Return the provider name for this WeatherStation."""
         return WeatherProvider.OPENWEATHERMAP
 
     @property
-    def observe(self) -> CurrentConditions:
+    def observe(self) -> WeatherObservation:
         conditions = self._api_get_current_weather()
 
         if conditions is None:
@@ -140,7 +372,7 @@ class Station(BaseStation):
         rel_pressure = Hectopascal(main.sea_level)
         visibility = Meter(conditions.visibility)
 
-        return CurrentConditions(
+        return WeatherObservation(
             timestamp=conditions.dt,
             provider=self.provider,
             station_id=self.station_id,
@@ -159,18 +391,4 @@ class Station(BaseStation):
 
     def _api_get_current_weather(self) -> API_CurrentWeather:
         self.logger.debug("getting current weather")
-
-        params = {
-            "lat": self.latitude,
-            "lon": self.longitude,
-            "appid": self.api_key,
-            "units": "imperial",
-        }
-
-        resp = self.safer_get(API_CURRENT_WX, params)
-
-        if resp is None:
-            return None
-
-        data = resp.json()
-        return API_CurrentWeather.model_validate(data)
+        return self.batch.current_weather(self)
@@ -9,7 +9,7 @@ from datetime import datetime
 from pydantic import BaseModel
 from wamu import Fahrenheit, Inch, InchesMercury, InchesPerHour, MilesPerHour
 
-from ..database import CurrentConditions
+from ..observation import WeatherObservation
 from . import BaseStation, WeatherProvider
 
 logger = logging.getLogger(__name__)
@@ -86,7 +86,7 @@ class Station(BaseStation):
         return WeatherProvider.WUNDERGROUND
 
     @property
-    def observe(self) -> CurrentConditions:
+    def observe(self) -> WeatherObservation:
         weather = self._api_get_current_weather()
 
         if weather is None:
@@ -104,7 +104,7 @@ class Station(BaseStation):
         precip_rate = InchesPerHour(conditions.precipRate)
         precip_day = Inch(conditions.precipTotal)
 
-        return CurrentConditions(
+        return WeatherObservation(
             timestamp=weather.obsTimeUtc,
             provider=self.provider,
             station_id=self.station_id,
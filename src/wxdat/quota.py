@@ -0,0 +1,229 @@
+"""Daily request budgets for metered providers."""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+
+from .metrics import QUOTA_REMAINING
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUOTA_FILE = "wxdat-quota.json"
+
+# budgets for different keys may share the same file (across processes, the file
+# is also locked with flock)
+_file_lock = threading.Lock()
+
+
+def key_id(api_key: str) -> str:
+    """Return a short identifier for an API key that is safe to log and export."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+
+
+class QuotaBudget:
+    """Spread a daily request quota across the rest of the day.
+
+    The remaining calls for the day are divided evenly over the time left until the
+    quota resets (midnight UTC).  Stations sharing an API key share the budget, with
+    each station limited to its fair share so that one station cannot starve the
+    others.  Usage is saved to a file so that restarts do not reset the budget; the
+    file is locked while usage is counted, so worker processes sharing a key also
+    share its usage.
+    """
+
+    __budgets__ = {}
+    __registry_lock__ = threading.Lock()
+
+    def __init__(self, api_key, daily_limit, path=DEFAULT_QUOTA_FILE, clock=None):
+        self.key = key_id(api_key)
+        self.daily_limit = daily_limit
+        self.path = path
+
+        self.clock = clock or time.time
+
+        self.day = None
+        self.used = 0
+        self.stations = {}
+
+        self._lock = threading.Lock()
+
+        self.metrics_remaining = QUOTA_REMAINING.labels(key=self.key)
+
+        self.logger = logger.getChild("QuotaBudget")
+
+        self._load()
+
+    @classmethod
+    def get(cls, api_key, daily_limit, path=DEFAULT_QUOTA_FILE):
+        """Return the shared budget for the given API key.
+
+        The limit and file of an existing budget are updated to the given values
+        (e.g. after the configuration is reloaded).
+        """
+
+        with cls.__registry_lock__:
+            budget = cls.__budgets__.get(api_key)
+
+            if budget is None:
+                budget = cls(api_key, daily_limit, path)
+                cls.__budgets__[api_key] = budget
+
+            else:
+                budget.update(daily_limit, path)
+
+            return budget
+
+    def update(self, daily_limit, path):
+        """Apply a new daily limit and quota file to this budget."""
+
+        with self._lock:
+            if daily_limit != self.daily_limit:
+                self.logger.info("daily quota for %s: %d", self.key, daily_limit)
+                self.daily_limit = daily_limit
+
+            if path != self.path:
+                self.logger.info("quota file for %s: %s", self.key, path)
+                self.path = path
+
+                # continue counting from the usage recorded in the new file
+                self.used = 0
+                self._load()
+
+        self.metrics_remaining.set(self.remaining)
+
+    @property
+    def remaining(self) -> int:
+        """Return the number of calls remaining today."""
+        return max(self.daily_limit - self.used, 0)
+
+    def register(self, station):
+        """Share this budget with the given station."""
+
+        with self._lock:
+            self.stations.setdefault(station, None)
+
+    def unregister(self, station):
+        """Stop sharing this budget with the given station (e.g. when it is removed)."""
+
+        with self._lock:
+            self.stations.pop(station, None)
+
+    def acquire(self, station) -> bool:
+        """Determine if the given station may make a call now (and count it if so)."""
+
+        with self._lock, self._locked():
+            now = self.clock()
+
+            self._rollover(now)
+
+            # other processes may have used part of the budget since the last call
+            data = self._read()
+            self._merge(data)
+
+            if self.remaining <= 0:
+                return False
+
+            # each station gets an equal share of the remaining calls for the day
+            shares = max(len(self.stations), 1)
+            spacing = self._seconds_until_reset(now) * shares / self.remaining
+
+            last_call = self.stations.get(station)
+
+            if last_call is not None and now - last_call < spacing:
+                return False
+
+            self.stations[station] = now
+            self.used += 1
+
+            self._write(data)
+
+        self.metrics_remaining.set(self.remaining)
+
+        return True
+
+    def _today(self, now):
+        return datetime.fromtimestamp(now, UTC).date().isoformat()
+
+    def _seconds_until_reset(self, now):
+        today = datetime.fromtimestamp(now, UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (today + timedelta(days=1)).timestamp() - now
+
+    def _rollover(self, now):
+        today = self._today(now)
+
+        if self.day != today:
+            self.logger.debug("resetting quota for %s", self.key)
+            self.day = today
+            self.used = 0
+
+            # start the new day with a fresh share for each station
+            self.stations = dict.fromkeys(self.stations)
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock on the quota file, shared with other processes."""
+
+        with _file_lock:
+            try:
+                lockfile = open(f"{self.path}.lock", "a")
+            except OSError:
+                self.logger.warning("Unable to lock quota file: %s", self.path)
+                yield
+                return
+
+            with lockfile:
+                fcntl.flock(lockfile, fcntl.LOCK_EX)
+
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path) as fp:
+                return json.load(fp)
+
+        except FileNotFoundError:
+            return {}
+
+        except (OSError, ValueError):
+            self.logger.warning("Unable to read quota file: %s", self.path)
+            return {}
+
+    def _merge(self, data):
+        usage = data.get(self.key)
+
+        if usage is not None and usage.get("day") == self.day:
+            self.used = max(self.used, usage.get("used", 0))
+
+    def _load(self):
+        self._rollover(self.clock())
+
+        with self._locked():
+            self._merge(self._read())
+
+        self.logger.debug("loaded quota for %s: %d used", self.key, self.used)
+
+        self.metrics_remaining.set(self.remaining)
+
+    def _write(self, data):
+        data[self.key] = {"day": self.day, "used": self.used}
+
+        # write to a temporary file first so an interrupted write does not lose usage
+        tmpfile = f"{self.path}.tmp"
+
+        try:
+            with open(tmpfile, "w") as fp:
+                json.dump(data, fp)
+
+            os.replace(tmpfile, self.path)
+
+        except OSError:
+            self.logger.warning("Unable to save quota file: %s", self.path)
@@ -2,11 +2,12 @@
 
 import logging
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from .database import WeatherDatabase
-from .metrics import WeatherConditionMetrics
+from .metrics import STATION_CADENCE, STATION_CYCLES, STATION_OVERFLOW, WeatherConditionMetrics
+from .pipeline import Writer
 from .providers import BaseStation
+from .schedule import AdaptiveSchedule, FixedSchedule
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +17,43 @@ class DataRecorder:
 
     __thread_count__ = 0
 
-    def __init__(self, station: BaseStation, database: WeatherDatabase, interval):
+    def __init__(
+        self,
+        station: BaseStation,
+        writer: Writer,
+        interval,
+        leases=None,
+        adaptive=False,
+        deadline=None,
+    ):
         DataRecorder.__thread_count__ += 1
 
         self.station = station
-        self.database = database
+        self.writer = writer
         self.interval = interval
+        self.leases = leases
+
+        # limit the time spent fetching data in each cycle
+        self.deadline = deadline or interval
+
+        if adaptive:
+            self.schedule = AdaptiveSchedule(interval)
+        else:
+            self.schedule = FixedSchedule(interval)
+
+        # readings may be repeated (e.g. shared or cached results); only new ones are saved
+        self.last_timestamp = None
+        self._last_lock = threading.Lock()
 
         self.thread_ctl = threading.Event()
-        self.loop_thread = threading.Thread(name=self.id, target=self.run_loop)
+        # daemon threads, so a request in flight does not hold up exiting the process
+        self.loop_thread = threading.Thread(name=self.id, target=self.run_loop, daemon=True)
         self.loop_last_exec = None
 
         self.metrics = WeatherConditionMetrics(station)
+        self.metrics_cadence = STATION_CADENCE.labels(station=station.name)
+        self.metrics_cycles = STATION_CYCLES.labels(station=station.name)
+        self.metrics_overflow = STATION_OVERFLOW.labels(station=station.name)
 
         self.logger = logger.getChild("DataRecorder")
 
@@ -41,18 +67,39 @@ class DataRecorder:
         self.logger.debug("Starting WeatherApp thread")
 
         self.thread_ctl.clear()
+
+        # stations that push readings only need polling while readings are not arriving
+        if self.station.listen(self.record_pushed_conditions, self.interval):
+            self.logger.info("Listening for realtime updates -- %s", self.station.name)
+
         self.loop_thread.start()
 
     def stop(self) -> None:
         """Signal the thread to stop and wait for it to exit."""
 
+        self.cancel()
+        self.join(self.interval)
+
+    def cancel(self) -> None:
+        """Signal the thread to stop, without waiting for it to exit."""
+
         self.logger.debug("Stopping WeatherApp thread")
 
         self.thread_ctl.set()
-        self.loop_thread.join(self.interval)
+        self.station.unlisten()
+        self.station.cancel()
+
+    def join(self, timeout=None) -> bool:
+        """Wait for the thread to exit; returns False if it is still running."""
+
+        if self.loop_thread.is_alive():
+            self.loop_thread.join(timeout)
 
         if self.loop_thread.is_alive():
             self.logger.warning("Thread failed to complete")
+            return False
+
+        return True
 
     def run_loop(self):
         """Manage the lifecycle of the thread loop."""
@@ -62,15 +109,26 @@ class DataRecorder:
         while not self.thread_ctl.is_set():
             self.loop_last_exec = datetime.now()
 
-            self.record_current_conditions()
+            # in cluster mode, only the node holding the lease polls the station
+            if not self.holds_lease:
+                self.logger.debug("%s :: lease held by another node", self.station.name)
+            elif self.station.streaming:
+                self.logger.debug("%s :: receiving realtime updates", self.station.name)
+            else:
+                self.record_current_conditions()
 
             # figure out when to run the next step
-            elapsed = (datetime.now() - self.loop_last_exec).total_seconds()
-            next_loop_time = self.loop_last_exec + timedelta(seconds=self.interval)
-            next_loop_sleep = (next_loop_time - datetime.now()).total_seconds()
+            now = datetime.now()
+            elapsed = (now - self.loop_last_exec).total_seconds()
+            next_loop_sleep = self.schedule.next_delay(
+                self.loop_last_exec.timestamp(), now.timestamp()
+            )
+
+            self.metrics_cycles.inc()
 
             if next_loop_sleep <= 0:
                 self.logger.warning("loop time exceeded interval; overflow")
+                self.metrics_overflow.inc()
                 next_loop_sleep = 0
 
             self.logger.debug(
@@ -86,11 +144,42 @@ class DataRecorder:
 
         self.logger.debug("END -- %s :: run_loop", self.station.name)
 
+    @property
+    def holds_lease(self) -> bool:
+        """Determine if this node is responsible for recording the station."""
+        return self.leases is None or self.leases.holds(self.station.name)
+
+    def record_pushed_conditions(self, obs):
+        """Record conditions pushed by the station."""
+
+        if self.thread_ctl.is_set() or not self.holds_lease:
+            return False
+
+        self.logger.info("Received current condition -- %s", self.station.name)
+
+        if not self._advance(obs):
+            return False
+
+        self.metrics.update(obs)
+
+        self.logger.debug("-- saving pushed data @ %s", obs.timestamp)
+
+        self.writer.submit(self.station, obs)
+
+        return True
+
     def record_current_conditions(self):
         """Record the current conditions from the internal station."""
 
         self.logger.info("Reading current condition -- %s", self.station.name)
-        obs = self.station.observe
+
+        with self.station.cycle_deadline(self.deadline):
+            obs = self.station.observe
+
+        self.schedule.update(None if obs is None else obs.timestamp)
+
+        if self.schedule.period is not None:
+            self.metrics_cadence.set(self.schedule.period)
 
         if obs is None:
             self.logger.debug(
@@ -99,16 +188,25 @@ class DataRecorder:
             )
             return False
 
+        if not self._advance(obs):
+            return False
+
         self.metrics.update(obs)
 
         self.logger.debug("-- saving current data @ %s", obs.timestamp)
 
-        # if we succesfully record the data, update the total readings for the station...  it's a bit
-        # hacky to reach into the station this way, but this is the only place we can be sure that the
-        # data has been stored in the database and have reference to the station identifiers
-        if self.database.save(obs):
-            self.station.metrics.readings.inc()
-        else:
-            self.station.metrics.failed.inc()
+        self.writer.submit(self.station, obs)
+
+        return True
+
+    def _advance(self, obs) -> bool:
+        """Determine if the reading is newer than the last one saved (and track it if so)."""
+
+        with self._last_lock:
+            if self.last_timestamp is not None and obs.timestamp <= self.last_timestamp:
+                self.logger.debug("-- skipping repeated reading @ %s", obs.timestamp)
+                return False
+
+            self.last_timestamp = obs.timestamp
 
         return True
@@ -0,0 +1,146 @@
+"""Route read-only sessions to database replicas."""
+
+import itertools
+import logging
+import math
+import threading
+import time
+
+import sqlalchemy as sql
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from .database import CurrentConditions
+from .metrics import REPLICA_FALLBACK, REPLICA_LAG
+
+logger = logging.getLogger(__name__)
+
+# on a PostgreSQL standby, the time since the last replayed transaction; a standby
+# that has replayed everything it received is caught up, even if the primary is idle
+PG_REPLAY_LAG = sql.text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+NEWEST_READING = sql.select(sql.func.max(CurrentConditions.timestamp))
+
+
+class Replica:
+    """A read-only copy of the database."""
+
+    def __init__(self, name, url):
+        self.name = name
+        self.engine = sql.create_engine(url)
+        self.sessionmaker = sessionmaker(bind=self.engine)
+
+        self.lag = math.inf
+
+        self.metrics_lag = REPLICA_LAG.labels(replica=name)
+
+    def session(self):
+        return self.sessionmaker()
+
+
+class ReplicaSet:
+    """Balance reads across replicas that are no more than max_lag seconds behind.
+
+    Replication lag is measured at most every check_interval seconds, by a single
+    caller and without blocking other reads.  PostgreSQL standbys report the time
+    since the last replayed transaction (or none if caught up); for other databases,
+    the newest reading on the replica is compared to the primary.
+    """
+
+    def __init__(self, primary: sql.Engine, urls, max_lag=30, check_interval=10, clock=None):
+        self.primary = primary
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        self.clock = clock or time.monotonic
+
+        self.replicas = [Replica(f"replica-{idx}", url) for idx, url in enumerate(urls)]
+        self._next = itertools.cycle(self.replicas)
+
+        self._lock = threading.Lock()
+        self._last_check = None
+
+        self.logger = logger.getChild("ReplicaSet")
+
+    def session(self):
+        """Return a session on a fresh replica, or None if no replica is available."""
+
+        if self._check_due():
+            self.check()
+
+        with self._lock:
+            for _ in self.replicas:
+                replica = next(self._next)
+
+                if replica.lag <= self.max_lag:
+                    return replica.session()
+
+        REPLICA_FALLBACK.inc()
+
+        return None
+
+    def _check_due(self) -> bool:
+        """Determine if the lag should be measured now (claiming the check if so)."""
+
+        with self._lock:
+            now = self.clock()
+
+            if self._last_check is not None and now - self._last_check < self.check_interval:
+                return False
+
+            self._last_check = now
+
+        return True
+
+    def check(self):
+        """Measure the replication lag of each replica."""
+
+        primary_newest = None
+        lags = {}
+
+        # replicas are probed without holding the lock, so a slow replica does not block reads
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    if replica.engine.dialect.name == "postgresql":
+                        lag = float(conn.scalar(PG_REPLAY_LAG))
+                    else:
+                        if primary_newest is None:
+                            primary_newest = self._newest(self.primary)
+
+                        lag = self._reading_lag(primary_newest, conn.scalar(NEWEST_READING))
+
+            except SQLAlchemyError as err:
+                self.logger.warning("Unable to check %s: %s", replica.name, err)
+                lag = math.inf
+
+            if lag > self.max_lag:
+                self.logger.debug("%s is %f sec behind; skipping", replica.name, lag)
+
+            lags[replica] = lag
+
+        with self._lock:
+            for replica, lag in lags.items():
+                replica.lag = lag
+                replica.metrics_lag.set(lag)
+
+    def _newest(self, engine):
+        with engine.connect() as conn:
+            return conn.scalar(NEWEST_READING)
+
+    def _reading_lag(self, primary, replica):
+        if primary is None:
+            return 0.0
+
+        if replica is None:
+            return math.inf
+
+        return max((primary - replica).total_seconds(), 0.0)
+
+    def dispose(self):
+        for replica in self.replicas:
+            replica.engine.dispose()
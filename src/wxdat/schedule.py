@@ -0,0 +1,107 @@
+"""Scheduling policies for polling weather stations."""
+
+import logging
+import math
+import statistics
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class FixedSchedule:
+    """Poll a station at a fixed interval."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    @property
+    def period(self) -> float | None:
+        """Return the learned publication period of the station (if known)."""
+        return None
+
+    def update(self, timestamp: datetime | None) -> None:
+        """Update the schedule with the timestamp of the latest observation."""
+
+    def next_delay(self, started: float, now: float) -> float:
+        """Return the number of seconds to wait before the next poll."""
+        return started + self.interval - now
+
+
+class AdaptiveSchedule(FixedSchedule):
+    """Learn the publication cadence of a station and poll just after new data is expected.
+
+    The cadence is learned from the timestamps of observations as they change.  Once
+    enough samples are available, polls are aligned to the expected publication time
+    (plus a short lag).  If the data has not changed when expected, polling backs off
+    exponentially.  The configured interval is the upper bound for every delay, and
+    failed polls (no observation) simply wait for the interval.
+    """
+
+    def __init__(self, interval, lag=30, min_delay=10, samples=8, min_samples=3):
+        super().__init__(interval)
+
+        self.lag = lag
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+
+        self.periods = deque(maxlen=samples)
+        self.last_timestamp = None
+        self.stale_polls = 0
+        self.failed = False
+
+        self.logger = logger.getChild("AdaptiveSchedule")
+
+    @property
+    def period(self) -> float | None:
+        """Return the learned publication period of the station (if known)."""
+
+        if len(self.periods) < self.min_samples:
+            return None
+
+        return statistics.median(self.periods)
+
+    def update(self, timestamp: datetime | None) -> None:
+        """Update the schedule with the timestamp of the latest observation."""
+
+        # a failed poll says nothing about whether the data is stale
+        self.failed = timestamp is None
+
+        if timestamp is None:
+            return
+
+        ts = timestamp.timestamp()
+
+        if self.last_timestamp is not None and ts <= self.last_timestamp:
+            self.stale_polls += 1
+            return
+
+        if self.last_timestamp is not None:
+            self.periods.append(ts - self.last_timestamp)
+
+        self.last_timestamp = ts
+        self.stale_polls = 0
+
+    def next_delay(self, started: float, now: float) -> float:
+        """Return the number of seconds to wait before the next poll."""
+
+        period = self.period
+
+        # use the configured interval until we have learned the cadence (or after errors)
+        if period is None or self.failed:
+            return super().next_delay(started, now)
+
+        period = max(period, self.min_delay)
+
+        if self.stale_polls > 0:
+            backoff = self.min_delay * 2 ** (self.stale_polls - 1)
+            return min(backoff, self.interval)
+
+        # align the next poll just after the next expected publication
+        expected = self.last_timestamp + period + self.lag
+
+        # if the station is running behind, skip ahead to the next publication
+        if expected < now:
+            expected += period * math.ceil((now - expected) / period)
+
+        return min(max(expected - now, self.min_delay), self.interval)
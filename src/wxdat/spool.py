@@ -0,0 +1,227 @@
+"""Durable local spool for readings that could not be saved to the database.
+
+Entries are appended to a local SQLite file while the database is unavailable and
+replayed in batches once it returns.  Replay is at-least-once: if the process stops
+after a batch is committed to the database but before it is removed from the spool,
+that batch will be saved again.
+
+Entries that the database rejects (e.g. a constraint violation) are moved to a
+dead-letter table, so that they do not block replaying the rest of the spool.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from .database import DATA_ERRORS, WeatherDatabase
+from .metrics import (
+    SPOOL_APPENDED,
+    SPOOL_DEAD,
+    SPOOL_DEPTH,
+    SPOOL_DROPPED,
+    SPOOL_REPLAY_RATE,
+    SPOOL_REPLAYED,
+)
+from .observation import OBSERVATION_FIELDS, WeatherObservation
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize(entry: WeatherObservation) -> str:
+    data = {}
+
+    for name in OBSERVATION_FIELDS:
+        value = getattr(entry, name)
+
+        if isinstance(value, datetime):
+            value = value.isoformat()
+
+        data[name] = value
+
+    return json.dumps(data)
+
+
+def _deserialize(text: str) -> WeatherObservation:
+    data = json.loads(text)
+
+    # entries spooled by earlier versions may include other columns (e.g. id)
+    data = {name: data.get(name) for name in OBSERVATION_FIELDS}
+
+    if data["timestamp"] is not None:
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+
+    return WeatherObservation(**data)
+
+
+class Spool(PeriodicTask):
+    """Hold readings on local disk until they can be saved to the database."""
+
+    def __init__(
+        self,
+        database: WeatherDatabase,
+        path="wxdat-spool.db",
+        max_entries=100000,
+        batch_size=500,
+        interval=30,
+    ):
+        super().__init__("spool-replay", interval)
+
+        self.database = database
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool (id INTEGER PRIMARY KEY AUTOINCREMENT, entry TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool_dead (id INTEGER PRIMARY KEY, entry TEXT, error TEXT)"
+        )
+
+        self.logger = logger.getChild("Spool")
+
+        SPOOL_DEPTH.set(len(self))
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()
+
+        return count
+
+    def append(self, entry: WeatherObservation) -> bool:
+        """Add an entry to the spool, dropping the oldest entries if it is full."""
+
+        try:
+            text = _serialize(entry)
+
+            with self._lock, self._conn:
+                self._conn.execute("INSERT INTO spool (entry) VALUES (?)", (text,))
+
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()
+                overflow = count - self.max_entries
+
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM spool WHERE id IN (SELECT id FROM spool ORDER BY id LIMIT ?)",
+                        (overflow,),
+                    )
+
+        except (sqlite3.Error, TypeError, ValueError):
+            self.logger.exception("Unable to spool entry")
+            return False
+
+        if overflow > 0:
+            self.logger.warning("spool is full; dropped %d oldest entries", overflow)
+            SPOOL_DROPPED.inc(overflow)
+            count -= overflow
+
+        SPOOL_APPENDED.inc()
+        SPOOL_DEPTH.set(count)
+
+        return True
+
+    def run_task(self):
+        """Replay spooled entries to the database."""
+        self.replay()
+
+    def replay(self) -> int:
+        """Save spooled entries to the database in batches; returns the number saved."""
+
+        total = 0
+
+        while not self.thread_ctl.is_set():
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, entry FROM spool ORDER BY id LIMIT ?",
+                    (self.batch_size,),
+                ).fetchall()
+
+            if not rows:
+                break
+
+            started = time.monotonic()
+
+            try:
+                self.database.save_all([_deserialize(text) for _, text in rows], strict=True)
+                saved, complete = len(rows), True
+
+            except DATA_ERRORS as err:
+                self.logger.warning(
+                    "Unable to replay batch (%s); replaying entries individually",
+                    getattr(err, "orig", err),
+                )
+                saved, complete = self._replay_each(rows)
+
+            except Exception:
+                self.logger.debug("database unavailable; replay deferred")
+                break
+
+            if complete:
+                with self._lock, self._conn:
+                    self._conn.execute("DELETE FROM spool WHERE id <= ?", (rows[-1][0],))
+
+            elapsed = time.monotonic() - started
+            total += saved
+
+            SPOOL_REPLAYED.inc(saved)
+            SPOOL_REPLAY_RATE.set(saved / elapsed if elapsed > 0 else 0)
+
+            if not complete:
+                break
+
+        if total > 0:
+            self.logger.info("replayed %d spooled entries", total)
+
+        SPOOL_DEPTH.set(len(self))
+
+        return total
+
+    def _replay_each(self, rows) -> tuple[int, bool]:
+        """Replay entries one at a time, moving those that are rejected to the dead-letter table.
+
+        Returns the number saved and whether all rows were handled (replay stops early
+        if the database becomes unavailable).
+        """
+
+        saved = 0
+
+        for row_id, text in rows:
+            try:
+                self.database.save_all([_deserialize(text)], strict=True)
+                saved += 1
+
+            except DATA_ERRORS as err:
+                self.logger.warning("spooled entry %d rejected; moving to spool_dead", row_id)
+
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "INSERT INTO spool_dead (id, entry, error) VALUES (?, ?, ?)",
+                        (row_id, text, str(getattr(err, "orig", err))),
+                    )
+                    self._conn.execute("DELETE FROM spool WHERE id = ?", (row_id,))
+
+                SPOOL_DEAD.inc()
+                continue
+
+            except Exception:
+                self.logger.debug("database unavailable; replay deferred")
+                return saved, False
+
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM spool WHERE id = ?", (row_id,))
+
+        return saved, True
+
+    def close(self):
+        """Close the spool file."""
+
+        with self._lock:
+            self._conn.close()
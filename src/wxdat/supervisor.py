@@ -0,0 +1,344 @@
+"""Distribute station recorders across multiple worker processes."""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import time
+from multiprocessing.connection import wait
+
+from .cluster import default_node_id
+from .config import AppConfig
+from .hashring import HashRing
+
+logger = logging.getLogger(__name__)
+
+# workers that exit sooner than this (in seconds) are considered to be crash looping
+MIN_WORKER_UPTIME = 30
+
+# upper bound (in seconds) for the delay between worker restarts
+MAX_RESTART_DELAY = 300
+
+# time (in seconds) allowed for workers to exit after their shutdown timeout
+WORKER_EXIT_GRACE = 2
+
+
+def station_shard(config: AppConfig, index: int, count: int):
+    """Return the stations assigned to a specific worker."""
+
+    # in cluster mode, each worker joins the cluster as a separate node
+    if config.cluster is not None:
+        return config.stations
+
+    ring = HashRing(range(count))
+
+    return ring.partition(config.stations, index, key=lambda station: station.name)
+
+
+def worker_config(config: AppConfig, index: int, count: int) -> AppConfig:
+    """Return the config used by a single worker."""
+
+    stations = station_shard(config, index, count)
+
+    shard = config.model_copy(update={"stations": stations, "workers": None, "metrics": None})
+
+    # only one worker needs to archive or compact old readings (or manage partitions)
+    if index > 0:
+        shard.archive = None
+        shard.compact = None
+        shard.partitions = None
+
+        # each worker replays its own spool, so readings are not replayed twice
+        if config.spool is not None:
+            shard.spool = config.spool.model_copy(update={"path": f"{config.spool.path}.{index}"})
+
+    if config.cluster is not None:
+        node_id = config.cluster.node_id or default_node_id()
+        shard.cluster = config.cluster.model_copy(update={"node_id": f"{node_id}-{index}"})
+
+    return shard
+
+
+def _run_worker(config: AppConfig, index: int, count: int, config_file=None):
+    """Entry point for a worker process; runs the recorders for a single shard."""
+
+    # imported here to avoid a circular import with the main module
+    from .__main__ import MainApp
+
+    AppConfig._configure_logging(config)
+
+    shard = worker_config(config, index, count)
+    logger.info("worker %d/%d starting with %d stations", index, count, len(shard.stations))
+
+    loader = None
+
+    # on reload, each worker picks up its own shard of the new stations
+    if config_file is not None:
+
+        def loader():
+            return worker_config(AppConfig.load(config_file), index, count)
+
+    app = MainApp(shard, loader=loader)
+    app()
+
+
+class WorkerProcess:
+    """Manage the lifecycle of a single worker process."""
+
+    def __init__(self, config: AppConfig, index: int, count: int, config_file=None):
+        self.config = config
+        self.index = index
+        self.count = count
+        self.config_file = config_file
+
+        self.process = None
+        self.started = None
+        self.restart_delay = 1
+
+        # monotonic time when the worker should be started again (if it has exited)
+        self.restart_at = None
+
+        self.logger = logger.getChild("WorkerProcess")
+
+    @property
+    def name(self) -> str:
+        return f"wxdat-worker-{self.index}"
+
+    @property
+    def sentinel(self):
+        return self.process.sentinel
+
+    def start(self):
+        """Start a new process for this worker."""
+
+        ctx = multiprocessing.get_context("spawn")
+
+        self.process = ctx.Process(
+            name=self.name,
+            target=_run_worker,
+            args=(self.config, self.index, self.count, self.config_file),
+        )
+
+        self.process.start()
+        self.started = time.monotonic()
+        self.restart_at = None
+
+        self.logger.info("started worker %s [%d]", self.name, self.process.pid)
+
+    def restart(self):
+        """Schedule a restart of the worker, backing off if it appears to be crash looping.
+
+        The worker is started again by the supervisor once restart_at has passed.
+        """
+
+        now = time.monotonic()
+
+        if now - self.started < MIN_WORKER_UPTIME:
+            self.logger.warning(
+                "worker %s is crash looping; delay %d sec", self.name, self.restart_delay
+            )
+            self.restart_at = now + self.restart_delay
+            self.restart_delay = min(self.restart_delay * 2, MAX_RESTART_DELAY)
+        else:
+            self.restart_delay = 1
+            self.restart_at = now
+
+    def stop(self, timeout=None):
+        """Signal the worker to exit and wait for it to finish."""
+
+        self.interrupt()
+        self.join(timeout)
+
+    def interrupt(self):
+        """Signal the worker to exit, without waiting for it to finish."""
+
+        if self.process is None or not self.process.is_alive():
+            return
+
+        self.logger.debug("stopping worker %s [%d]", self.name, self.process.pid)
+
+        # workers treat SIGINT as a request to shut down cleanly
+        os.kill(self.process.pid, signal.SIGINT)
+
+    def join(self, timeout=None):
+        """Wait for the worker to exit, terminating it after timeout seconds."""
+
+        if self.process is None or not self.process.is_alive():
+            return
+
+        self.process.join(timeout)
+
+        if self.process.is_alive():
+            self.logger.warning("worker %s did not exit; terminating", self.name)
+            self.process.terminate()
+            self.process.join()
+
+    def reload(self, config: AppConfig):
+        """Signal the worker to reload its stations; restarts will use the new config."""
+
+        self.config = config
+
+        if self.process is None or not self.process.is_alive():
+            return
+
+        os.kill(self.process.pid, signal.SIGHUP)
+
+
+class Supervisor:
+    """Run the configured stations across a pool of worker processes."""
+
+    def __init__(self, config: AppConfig, config_file=None):
+        self.logger = logger.getChild("Supervisor")
+
+        self.config = config
+        self.config_file = config_file
+
+        self._initialize_metrics(config.metrics)
+
+        self.workers = [
+            WorkerProcess(config, index, config.workers, config_file)
+            for index in range(config.workers)
+        ]
+
+    def _initialize_metrics(self, port=None):
+        self.metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+        self._owns_metrics_dir = False
+
+        if self.metrics_dir is None:
+            self.metrics_dir = tempfile.mkdtemp(prefix="wxdat-metrics-")
+            self._owns_metrics_dir = True
+
+        # workers inherit the environment and write their metrics to this folder
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = self.metrics_dir
+
+        if port is None:
+            self.logger.debug("metrics server disabled by config")
+            return
+
+        from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+        self.logger.info("Initializing multiprocess metrics: %d", port)
+
+        # workers do not serve metrics, so there is nothing to profile here
+        if self.config.profiling:
+            self.logger.warning("profiling is not available when running with workers")
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=self.metrics_dir)
+        start_http_server(port, registry=registry)
+
+    def _reap(self, worker: WorkerProcess):
+        from prometheus_client import multiprocess
+
+        # the sentinel is ready, so this will not block; it does update the exit code
+        worker.process.join()
+
+        self.logger.warning(
+            "worker %s [%d] exited with code %s",
+            worker.name,
+            worker.process.pid,
+            worker.process.exitcode,
+        )
+
+        multiprocess.mark_process_dead(worker.process.pid, path=self.metrics_dir)
+
+    def _supervise(self):
+        """Reap workers that have exited and start those that are due for a restart."""
+
+        # only wait on running workers; others are waiting to be restarted
+        sentinels = {
+            worker.sentinel: worker for worker in self.workers if worker.restart_at is None
+        }
+
+        for sentinel in wait(list(sentinels), self._restart_timeout()):
+            worker = sentinels[sentinel]
+            self._reap(worker)
+            worker.restart()
+
+        now = time.monotonic()
+
+        for worker in self.workers:
+            if worker.restart_at is not None and worker.restart_at <= now:
+                worker.start()
+
+    def _restart_timeout(self):
+        """Return the time (in seconds) until the next pending restart, or None."""
+
+        pending = [worker.restart_at for worker in self.workers if worker.restart_at is not None]
+
+        if not pending:
+            return None
+
+        return max(min(pending) - time.monotonic(), 0)
+
+    def reload(self, signum=None, frame=None):
+        """Reload the config file and forward the reload to all workers."""
+
+        try:
+            config = AppConfig.load(self.config_file)
+        except Exception:
+            self.logger.exception("Unable to reload config; keeping current stations")
+            return
+
+        if config.workers != self.config.workers:
+            self.logger.warning("ignoring change to 'workers'; restart to apply")
+
+        self.logger.info("reloading %d workers", len(self.workers))
+
+        self.config = config.model_copy(update={"workers": self.config.workers})
+
+        for worker in self.workers:
+            worker.reload(config)
+
+    def _prepare_database(self):
+        """Create the partitioned readings table (if needed) before the workers start.
+
+        Only the first worker manages partitions, so the others would create a plain
+        table if they were first to connect to a new database.
+        """
+
+        if self.config.partitions is None:
+            return
+
+        from .database import open_database
+
+        database = open_database(self.config.database, partitioned=True)
+        database.engine.dispose()
+
+    def __call__(self):
+        self.logger.debug("Starting supervisor with %d workers", len(self.workers))
+
+        self._prepare_database()
+
+        for worker in self.workers:
+            worker.start()
+
+        if self.config_file is not None:
+            signal.signal(signal.SIGHUP, self.reload)
+
+        # treat SIGTERM (e.g. from Kubernetes) the same as an interrupt
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+        try:
+            while True:
+                self._supervise()
+
+        except KeyboardInterrupt:
+            self.logger.debug("canceled by user")
+
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+        # workers shut down in parallel, each within the same timeout
+        deadline = time.monotonic() + self.config.shutdown_timeout + WORKER_EXIT_GRACE
+
+        for worker in self.workers:
+            worker.interrupt()
+
+        for worker in self.workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+        if self._owns_metrics_dir:
+            shutil.rmtree(self.metrics_dir, ignore_errors=True)
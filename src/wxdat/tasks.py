@@ -0,0 +1,61 @@
+"""Background tasks that run at a regular interval."""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask(ABC):
+    """Run a task in a background thread at a fixed interval."""
+
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+
+        self.thread_ctl = threading.Event()
+        self.loop_thread = threading.Thread(name=name, target=self.run_loop, daemon=True)
+
+        self.logger = logger.getChild("PeriodicTask")
+
+    def start(self) -> None:
+        """Start the task thread."""
+
+        self.logger.debug("Starting task thread: %s", self.name)
+
+        self.thread_ctl.clear()
+        self.loop_thread.start()
+
+    def stop(self, timeout=None) -> None:
+        """Signal the task to stop and wait for it to exit (by default, up to interval)."""
+
+        self.logger.debug("Stopping task thread: %s", self.name)
+
+        self.thread_ctl.set()
+
+        if self.loop_thread.is_alive():
+            self.loop_thread.join(self.interval if timeout is None else timeout)
+
+        if self.loop_thread.is_alive():
+            self.logger.warning("Task thread failed to complete: %s", self.name)
+
+    def run_loop(self):
+        """Run the task until signaled to stop."""
+
+        self.logger.debug("BEGIN -- %s :: run_loop @ %f sec", self.name, self.interval)
+
+        while not self.thread_ctl.is_set():
+            try:
+                self.run_task()
+            except Exception:
+                self.logger.exception("Unhandled exception in task: %s", self.name)
+
+            if self.thread_ctl.wait(self.interval):
+                self.logger.debug("received exit signal; run_loop exiting")
+
+        self.logger.debug("END -- %s :: run_loop", self.name)
+
+    @abstractmethod
+    def run_task(self):
+        """Perform a single iteration of the task."""
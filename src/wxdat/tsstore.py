@@ -0,0 +1,288 @@
+"""Embedded time-series store for readings, using memory-mapped column files.
+
+Each station has a directory containing a time index (`timestamp.f64`) and one
+column file per field (`<field>.f64`).  Every file is a flat array of native
+doubles, so appending a reading writes one value to each file and range reads
+map the files into memory and bisect the time index without copying.
+
+Missing values are stored as NaN.  Text fields (e.g. remarks) are not stored.
+Readings must arrive in time order for each station; readings that are not
+newer than the last saved reading are skipped.
+"""
+
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+
+import sqlalchemy as sql
+
+from .database import CurrentConditions
+from .metrics import DB_COMMITS, DB_ERRORS, DB_WRITES
+from .observation import WeatherObservation
+
+logger = logging.getLogger(__name__)
+
+TIME_INDEX = "timestamp"
+
+# numeric fields of CurrentConditions stored as columns
+FIELDS = [
+    column.key
+    for column in CurrentConditions.__table__.columns
+    if isinstance(column.type, sql.Float)
+]
+
+_DOUBLE = struct.Struct("=d")
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def _pack(value) -> bytes:
+    return _DOUBLE.pack(math.nan if value is None else value)
+
+
+@contextmanager
+def _mapped(path: Path):
+    """Map a column file as a read-only array of doubles."""
+
+    with open(path, "rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+
+        # empty files cannot be mapped
+        if size < _DOUBLE.size:
+            yield memoryview(b"").cast("d")
+            return
+
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm).cast("d")
+
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+class _Series:
+    """Column files for a single station."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+
+        self._files = {}
+        self.last_timestamp = None
+
+        self._repair()
+
+    def column(self, name) -> Path:
+        return self.path / f"{name}.f64"
+
+    def _repair(self):
+        """Truncate all columns to the length of the time index.
+
+        The time index is written last, so an interrupted append leaves some
+        column files longer than the index.
+        """
+
+        index = self.column(TIME_INDEX)
+        index.touch()
+
+        length = index.stat().st_size // _DOUBLE.size
+
+        with open(index, "r+b") as fp:
+            fp.truncate(length * _DOUBLE.size)
+
+        for name in FIELDS:
+            column = self.column(name)
+
+            with open(column, "ab") as fp:
+                if fp.tell() < length * _DOUBLE.size:
+                    # pad columns that were added since the station was created
+                    fp.write(_pack(None) * (length - fp.tell() // _DOUBLE.size))
+
+                fp.truncate(length * _DOUBLE.size)
+
+        if length > 0:
+            with _mapped(index) as timestamps:
+                self.last_timestamp = timestamps[-1]
+
+        for name in [*FIELDS, TIME_INDEX]:
+            self._files[name] = open(self.column(name), "ab")
+
+    def append(self, entries):
+        """Append readings to the column files; returns the number appended."""
+
+        rows = []
+        last = self.last_timestamp
+
+        for entry in entries:
+            timestamp = entry.timestamp.timestamp()
+
+            if last is not None and timestamp <= last:
+                continue
+
+            rows.append((timestamp, entry))
+            last = timestamp
+
+        if not rows:
+            return 0
+
+        for name in FIELDS:
+            self._files[name].write(b"".join(_pack(getattr(entry, name)) for _, entry in rows))
+            self._files[name].flush()
+
+        self._files[TIME_INDEX].write(b"".join(_pack(timestamp) for timestamp, _ in rows))
+        self._files[TIME_INDEX].flush()
+
+        self.last_timestamp = last
+
+        return len(rows)
+
+    def close(self):
+        for fp in self._files.values():
+            fp.close()
+
+        self._files.clear()
+
+
+class TimeSeriesStore:
+    """Save and query readings using memory-mapped column files."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._series = {}
+        self._lock = threading.Lock()
+
+        self.logger = logger.getChild("TimeSeriesStore")
+        self.logger.debug("Opened time-series store: %s", self.path)
+
+    def _get_series(self, provider, station_id) -> _Series:
+        key = (str(provider), str(station_id))
+
+        with self._lock:
+            series = self._series.get(key)
+
+            if series is None:
+                path = self.path / _safe_name(key[0]) / _safe_name(key[1])
+                series = _Series(path)
+                self._series[key] = series
+
+            return series
+
+    def save(self, entry: WeatherObservation):
+        return self.save_all([entry])
+
+    def save_all(self, entries: list[WeatherObservation], strict=False):
+        """Append multiple readings to their stations; errors are raised if strict."""
+
+        DB_WRITES.inc()
+
+        by_station = {}
+
+        for entry in entries:
+            by_station.setdefault((entry.provider, entry.station_id), []).append(entry)
+
+        try:
+            for (provider, station_id), readings in by_station.items():
+                series = self._get_series(provider, station_id)
+
+                with series.lock:
+                    saved = series.append(readings)
+
+                if saved < len(readings):
+                    self.logger.debug(
+                        "skipped %d old readings for %s", len(readings) - saved, station_id
+                    )
+
+        except (OSError, ValueError):
+            DB_ERRORS.inc()
+
+            if strict:
+                raise
+
+            self.logger.exception("Error saving entries")
+            return False
+
+        DB_COMMITS.inc()
+
+        return True
+
+    @contextmanager
+    def series(self, provider, station_id, field, start=None, end=None):
+        """Map the readings of a single field in the given time range.
+
+        Yields (timestamps, values) as read-only memoryviews of doubles that are
+        valid only within the context.
+        """
+
+        station = self._get_series(provider, station_id)
+
+        with (
+            _mapped(station.column(TIME_INDEX)) as timestamps,
+            _mapped(station.column(field)) as values,
+        ):
+            lo, hi = self._range(timestamps, start, end)
+
+            ts_view = timestamps[lo:hi]
+            val_view = values[lo:hi]
+
+            try:
+                yield ts_view, val_view
+            finally:
+                ts_view.release()
+                val_view.release()
+
+    def query(self, provider, station_id, start=None, end=None) -> list[CurrentConditions]:
+        """Return readings from the given station in the time range [start, end)."""
+
+        station = self._get_series(provider, station_id)
+
+        with _mapped(station.column(TIME_INDEX)) as timestamps:
+            lo, hi = self._range(timestamps, start, end)
+            times = timestamps[lo:hi].tolist()
+
+        entries = [
+            CurrentConditions(
+                timestamp=datetime.fromtimestamp(timestamp, UTC),
+                provider=provider,
+                station_id=station_id,
+            )
+            for timestamp in times
+        ]
+
+        for name in FIELDS:
+            with _mapped(station.column(name)) as column:
+                values = column[lo:hi].tolist()
+
+            for entry, value in zip(entries, values, strict=True):
+                setattr(entry, name, None if math.isnan(value) else value)
+
+        return entries
+
+    def _range(self, timestamps, start, end):
+        lo = 0 if start is None else bisect_left(timestamps, start.timestamp())
+        hi = len(timestamps) if end is None else bisect_left(timestamps, end.timestamp())
+
+        return lo, max(lo, hi)
+
+    def close(self):
+        """Close all open column files."""
+
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+
+            self._series.clear()
@@ -1,10 +1,21 @@
 """Unit tests for the Ambient Weather provider."""
 
+import json
 import os
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
 
 import pytest
+import requests
+import yaml
 
+from wxdat import providers
 from wxdat.providers import ambientwx
+from wxdat.recorder import DataRecorder
 
 
 @pytest.fixture(scope="module")
@@ -39,10 +50,52 @@ def station():
     )
 
 
-@pytest.mark.vcr()
-def test_ambientwx_bad_api_key():
+CASSETTES = Path(__file__).parent / "cassettes"
+
+
+def recorded_reading():
+    """Return the reading recorded from the single device endpoint (/devices/{macAddress}).
+
+    The /devices responses in these tests are built from it, since they have not
+    been recorded.
+    """
+
+    with open(CASSETTES / "ambientwx_device.yaml") as fp:
+        cassette = yaml.safe_load(fp)
+
+    body = cassette["interactions"][0]["response"]["body"]["string"]
+
+    return json.loads(body)[0]
+
+
+def fake_api(monkeypatch, status, body):
+    """Answer Ambient Weather requests with the given response; returns requested URLs."""
+
+    urls = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        urls.append(url)
+
+        resp = requests.Response()
+        resp.url = url
+        resp.status_code = status
+        resp.reason = "OK" if status == 200 else "Unauthorized"
+        resp.headers["Content-Type"] = "application/json; charset=utf-8"
+        resp._content = json.dumps(body).encode("utf-8")
+
+        return resp
+
+    monkeypatch.setattr(providers.requests, "get", fake_get)
+
+    return urls
+
+
+def test_ambientwx_bad_api_key(monkeypatch):
     """Verify bad Ambient Weather keys return properly."""
 
+    # the error recorded for an invalid key
+    urls = fake_api(monkeypatch, 401, {"error": "applicationKey-invalid"})
+
     station = ambientwx.Station(
         "Invalid Key",
         app_key="xyz123",
@@ -51,6 +104,33 @@ def test_ambientwx_bad_api_key():
     )
 
     assert station.observe is None
+    assert urls == [f"{ambientwx.API_ENDPOINT}/devices"]
+
+
+def test_ambientwx_device_list(monkeypatch):
+    """Verify a station reads its own device from the /devices response."""
+
+    reading = recorded_reading()
+
+    devices = [
+        {"macAddress": "98:CD:AC:22:F4:07", "lastData": reading},
+        {"macAddress": "98:CD:AC:22:F4:08", "lastData": {**reading, "tempf": 50.0}},
+    ]
+
+    fake_api(monkeypatch, 200, devices)
+
+    station = ambientwx.Station(
+        "Device List",
+        app_key="app",
+        user_key="device-list",
+        device_id="98:cd:ac:22:f4:07",
+    )
+
+    conditions = station.observe
+
+    assert conditions is not None
+    assert conditions.timestamp == datetime(2025, 1, 8, 18, 10, tzinfo=UTC)
+    assert conditions.humidity == 56
 
 
 @pytest.mark.vcr()
@@ -61,3 +141,172 @@ def test_ambientwx_conditions(station: ambientwx.Station):
 
     assert conditions is not None
     assert conditions.timestamp is not None
+
+
+def test_ambientwx_shared_account(monkeypatch):
+    """Verify stations on the same account share a single request."""
+
+    calls = []
+
+    class FakeResponse:
+        def json(self):
+            return [
+                {"macAddress": "AA:00", "lastData": {"dateutc": 0, "date": "2025-01-08T18:10:00Z"}},
+                {"macAddress": "BB:00", "lastData": {"dateutc": 0, "date": "2025-01-08T18:10:00Z"}},
+            ]
+
+    def fake_get(self, url, params=None, headers=None):
+        calls.append(url)
+        return FakeResponse()
+
+    monkeypatch.setattr(ambientwx.Station, "safer_get", fake_get)
+
+    stations = [
+        ambientwx.Station(f"Device {mac}", app_key="app", user_key="shared", device_id=mac)
+        for mac in ("aa:00", "bb:00", "cc:00")
+    ]
+
+    readings = [station.observe for station in stations]
+
+    assert len(calls) == 1
+    assert calls[0].endswith("/devices")
+    assert readings[0] is not None
+    assert readings[1] is not None
+    assert readings[2] is None
+
+
+class RealtimeServer:
+    """Local stand-in for the Ambient Weather realtime API."""
+
+    def __init__(self, devices):
+        import socketio
+
+        self.devices = devices
+        self.sessions = []
+
+        self.sio = socketio.Server(async_mode="threading")
+        self.sio.on("connect", self._on_connect)
+        self.sio.on("subscribe", self._on_subscribe)
+
+        class Server(ThreadingMixIn, WSGIServer):
+            daemon_threads = True
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        self.httpd = make_server(
+            "127.0.0.1",
+            0,
+            socketio.WSGIApp(self.sio),
+            server_class=Server,
+            handler_class=QuietHandler,
+        )
+
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def _on_connect(self, sid, environ, auth=None):
+        self.sessions.append(sid)
+
+    def _on_subscribe(self, sid, data):
+        self.sio.emit("subscribed", {"devices": self.devices}, to=sid)
+
+    def push(self, reading):
+        self.sio.emit("data", reading)
+
+    def drop(self):
+        for sid in self.sessions:
+            self.sio.disconnect(sid)
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeWriter:
+    def __init__(self):
+        self.saved = []
+
+    def submit(self, station, obs):
+        self.saved.append(obs)
+
+
+def wait_for(condition, timeout=10):
+    expires = time.monotonic() + timeout
+
+    while not condition():
+        if time.monotonic() > expires:
+            return False
+
+        time.sleep(0.05)
+
+    return True
+
+
+def test_ambientwx_realtime_server(monkeypatch):
+    """Verify readings pushed by a realtime server are converted and saved."""
+
+    pytest.importorskip("socketio")
+
+    reading = {"macAddress": "AA:00", "dateutc": 1000, "date": "2025-01-08T18:10:00Z", "tempf": 50}
+
+    server = RealtimeServer([{"macAddress": "AA:00", "lastData": reading}])
+
+    # the stand-in server only supports long polling
+    client = ambientwx.RealtimeClient("app", "realtime", server.url, transports=["polling"])
+    monkeypatch.setitem(
+        ambientwx.RealtimeClient.__clients__, ("app", "realtime", server.url), client
+    )
+
+    # stations poll until readings arrive; the API itself is not available here
+    monkeypatch.setattr(ambientwx.Station, "safer_get", lambda self, *args, **kwargs: None)
+    monkeypatch.setattr(ambientwx, "REALTIME_PUSH_TIMEOUT", 1)
+
+    station = ambientwx.Station(
+        "Realtime Device",
+        app_key="app",
+        user_key="realtime",
+        device_id="aa:00",
+        realtime=True,
+        realtime_url=server.url,
+    )
+
+    writer = FakeWriter()
+    recorder = DataRecorder(station, writer, 0.5)
+
+    try:
+        recorder.start()
+
+        # the latest reading is delivered when subscribing
+        assert wait_for(lambda: len(writer.saved) == 1)
+        assert station.streaming
+
+        server.push(reading)
+        server.push({**reading, "macAddress": "BB:00", "dateutc": 2000})
+        server.push({**reading, "dateutc": 2000, "date": "2025-01-08T18:11:00Z", "tempf": 51})
+
+        assert wait_for(lambda: len(writer.saved) == 2)
+
+        assert writer.saved[0].temperature == 50
+        assert writer.saved[1].temperature == 51
+        assert writer.saved[1].station_id == "aa:00"
+
+        # the client reconnects after the server drops the connection
+        server.drop()
+
+        assert wait_for(lambda: len(server.sessions) == 2 and client.connected)
+
+        server.push({**reading, "dateutc": 3000, "date": "2025-01-08T18:12:00Z", "tempf": 52})
+
+        assert wait_for(lambda: len(writer.saved) == 3)
+        assert writer.saved[2].temperature == 52
+
+        # connected, but the device stopped pushing readings; fall back to polling
+        assert wait_for(lambda: not station.streaming)
+        assert client.connected
+
+    finally:
+        recorder.stop()
+        server.stop()
@@ -0,0 +1,79 @@
+"""Unit tests for archiving old readings."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from wxdat.database import CurrentConditions, WeatherDatabase
+
+pytest.importorskip("pyarrow")
+
+from wxdat.archive import Archive, Archiver  # noqa: E402
+
+
+def make_entry(month, day, temperature):
+    return CurrentConditions(
+        timestamp=datetime(2024, month, day, 12, 0, tzinfo=UTC),
+        provider="NOAA",
+        station_id="KDEN",
+        temperature=temperature,
+    )
+
+
+@pytest.fixture(scope="function")
+def database(tmp_path):
+    database = WeatherDatabase(f"sqlite:///{tmp_path}/weather.db")
+    database.archive = Archive(tmp_path / "archive")
+
+    yield database
+
+
+def test_archive_moves_old_rows(database, tmp_path):
+    """Verify old readings are moved to monthly files and removed from the database."""
+
+    database.save_all([make_entry(month, 1, float(month)) for month in (1, 2, 3, 4)])
+
+    archiver = Archiver(database, database.archive, batch_size=2)
+    moved = archiver.archive_before(datetime(2024, 3, 15, tzinfo=UTC))
+
+    assert moved == 3
+
+    months = sorted(path.name for path in tmp_path.glob("archive/NOAA/KDEN/*"))
+    assert months == ["2024-01", "2024-02", "2024-03"]
+
+    with database.session() as session:
+        assert session.query(CurrentConditions).count() == 1
+
+
+def test_archive_query_reads_both_tiers(database):
+    """Verify queries combine archived readings with the database."""
+
+    database.save_all([make_entry(month, 1, float(month)) for month in (1, 2, 3, 4)])
+
+    archiver = Archiver(database, database.archive)
+    archiver.archive_before(datetime(2024, 3, 15, tzinfo=UTC))
+
+    readings = database.query("NOAA", "KDEN", start=datetime(2024, 2, 1, tzinfo=UTC))
+
+    assert [entry.temperature for entry in readings] == [2.0, 3.0, 4.0]
+    assert readings[0].timestamp == datetime(2024, 2, 1, 12, 0, tzinfo=UTC)
+
+
+def test_archive_query_spans_cutoff(database):
+    """Verify readings on both sides of the archive cutoff are combined in order."""
+
+    database.save_all([make_entry(month, 1, float(month)) for month in (1, 2, 3, 4)])
+
+    archiver = Archiver(database, database.archive)
+    archiver.archive_before(datetime(2024, 3, 15, tzinfo=UTC))
+
+    # a late reading that has not been archived yet
+    database.save(make_entry(2, 15, 2.5))
+
+    readings = database.query(
+        "NOAA", "KDEN", start=datetime(2024, 2, 1, tzinfo=UTC), end=datetime(2024, 5, 1, tzinfo=UTC)
+    )
+
+    assert [entry.temperature for entry in readings] == [2.0, 2.5, 3.0, 4.0]
+    assert all(entry.timestamp.tzinfo is not None for entry in readings)
+    assert readings[-1].timestamp == datetime(2024, 4, 1, 12, 0, tzinfo=UTC)
@@ -0,0 +1,117 @@
+"""Unit tests for provider circuit breakers."""
+
+import pytest
+
+from wxdat.breaker import BreakerState, CircuitBreaker
+from wxdat.providers import noaa
+
+
+class FakeClock:
+    """Manually advanced clock for testing."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def clock():
+    yield FakeClock()
+
+
+@pytest.fixture(scope="function")
+def breaker(clock):
+    yield CircuitBreaker("test.local", threshold=3, base_delay=10, jitter=0, clock=clock)
+
+
+def test_opens_after_threshold(breaker):
+    """Verify the breaker opens after consecutive failures."""
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.failure()
+
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_failures(breaker):
+    """Verify that a success resets the consecutive failure count."""
+
+    breaker.failure()
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_half_open_probe(breaker, clock):
+    """Verify a single probe is allowed after the retry delay."""
+
+    for _ in range(3):
+        breaker.failure()
+
+    clock.now = 10
+
+    assert breaker.allow()
+    assert breaker.state == BreakerState.HALF_OPEN
+
+    # only one probe at a time
+    assert not breaker.allow()
+
+    breaker.success()
+
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_backs_off(breaker, clock):
+    """Verify that a failed probe reopens the breaker with a longer delay."""
+
+    for _ in range(3):
+        breaker.failure()
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.failure()
+
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.retry_at == 30
+
+
+def test_skipped_requests_do_not_trip(breaker, clock, monkeypatch):
+    """Verify requests skipped by a cancelled station do not count as failures."""
+
+    monkeypatch.setitem(CircuitBreaker.__breakers__, "test.local", breaker)
+
+    station = noaa.Station("Breaker Test Station", station="KDEN")
+    station.cancel()
+
+    for _ in range(5):
+        assert station.safer_get("https://test.local/latest", rate_limit=False) is None
+
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.failures == 0
+
+
+def test_skipped_probe_is_released(breaker, clock, monkeypatch):
+    """Verify a probe skipped after the cycle deadline does not hold the breaker."""
+
+    monkeypatch.setitem(CircuitBreaker.__breakers__, "test.local", breaker)
+
+    for _ in range(3):
+        breaker.failure()
+
+    clock.now = 10
+
+    station = noaa.Station("Breaker Test Station", station="KDEN")
+
+    with station.cycle_deadline(0):
+        assert station.safer_get("https://test.local/latest", rate_limit=False) is None
+
+    # the next request may probe the host
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.allow()
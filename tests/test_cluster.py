@@ -0,0 +1,61 @@
+"""Unit tests for distributing stations among cluster nodes."""
+
+import pytest
+
+from wxdat.cluster import LeaseManager
+from wxdat.database import WeatherDatabase
+
+STATIONS = [f"Station {idx}" for idx in range(50)]
+
+
+@pytest.fixture(scope="function")
+def database(tmp_path):
+    """Return a new database for cluster tests."""
+
+    yield WeatherDatabase(f"sqlite:///{tmp_path}/cluster.db")
+
+
+def test_single_node_holds_all_leases(database):
+    """Verify that a single node claims every station."""
+
+    node = LeaseManager(database, STATIONS, node_id="alpha")
+    node.run_task()
+
+    assert node.held == set(STATIONS)
+
+
+def test_nodes_share_stations(database):
+    """Verify that stations are split between nodes without overlap."""
+
+    alpha = LeaseManager(database, STATIONS, node_id="alpha")
+    bravo = LeaseManager(database, STATIONS, node_id="bravo")
+
+    alpha.run_task()
+    bravo.run_task()
+
+    # alpha releases the stations preferred by bravo, then bravo claims them
+    alpha.run_task()
+    bravo.run_task()
+
+    assert alpha.held
+    assert bravo.held
+    assert not alpha.held & bravo.held
+    assert alpha.held | bravo.held == set(STATIONS)
+
+
+def test_released_leases_are_claimed(database):
+    """Verify that leases are reclaimed when a node leaves."""
+
+    alpha = LeaseManager(database, STATIONS, node_id="alpha")
+    bravo = LeaseManager(database, STATIONS, node_id="bravo")
+
+    alpha.run_task()
+    bravo.run_task()
+    alpha.run_task()
+    bravo.run_task()
+
+    bravo.release()
+    alpha.run_task()
+
+    assert alpha.held == set(STATIONS)
+    assert not bravo.held
@@ -0,0 +1,114 @@
+"""Unit tests for downsampling old readings."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from wxdat.compact import Compactor, bucket_start, downsample
+from wxdat.database import CurrentConditions, WeatherDatabase
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+
+def make_entry(minute, temperature, gusts=None, precip=None, bearing=None):
+    return CurrentConditions(
+        timestamp=START + timedelta(minutes=minute),
+        provider="NOAA",
+        station_id="KDEN",
+        temperature=temperature,
+        wind_gusts=gusts,
+        wind_bearing=bearing,
+        precip_day=precip,
+    )
+
+
+@pytest.fixture(scope="function")
+def database(tmp_path):
+    yield WeatherDatabase(f"sqlite:///{tmp_path}/weather.db")
+
+
+def test_compact_downsample():
+    """Verify fields are combined according to their meaning."""
+
+    entries = [
+        make_entry(0, 10.0, gusts=5.0, precip=0.1),
+        make_entry(1, 20.0, gusts=15.0, precip=0.2),
+        make_entry(2, None, gusts=10.0, precip=0.3),
+    ]
+
+    reading = downsample(entries, 300)
+
+    assert reading.timestamp == START
+    assert reading.resolution == 300
+    assert reading.temperature == 15.0
+    assert reading.wind_gusts == 15.0
+    assert reading.precip_day == 0.3
+    assert reading.humidity is None
+
+
+def test_compact_downsample_bearing():
+    """Verify wind bearing is averaged around the circle."""
+
+    entries = [make_entry(0, 1.0, bearing=359.0), make_entry(1, 1.0, bearing=1.0)]
+
+    reading = downsample(entries, 300)
+
+    assert reading.wind_bearing % 360 == pytest.approx(0.0, abs=1e-9)
+
+
+def test_compact_bucket_start():
+    """Verify timestamps are aligned to the start of their bucket."""
+
+    assert bucket_start(START + timedelta(minutes=7), 300) == START + timedelta(minutes=5)
+    assert bucket_start(START + timedelta(minutes=59), 3600) == START
+
+
+def test_compact_tiers(database):
+    """Verify old readings are replaced by coarser readings for each tier."""
+
+    # one reading per minute for two hours
+    database.save_all([make_entry(minute, float(minute)) for minute in range(120)])
+
+    compactor = Compactor(database, tiers=[(7, 300), (30, 3600)], batch_size=50, pause=0)
+
+    # after a week, only the 5 minute tier applies
+    removed = compactor.compact(START + timedelta(days=8))
+    readings = database.query("NOAA", "KDEN")
+
+    assert removed == 120
+    assert len(readings) == 24
+    assert {entry.resolution for entry in readings} == {300}
+    assert readings[0].temperature == 2.0
+
+    # after a month, the hourly tier replaces the 5 minute readings
+    compactor.compact(START + timedelta(days=31))
+    readings = database.query("NOAA", "KDEN")
+
+    assert [entry.resolution for entry in readings] == [3600, 3600]
+    assert readings[0].temperature == pytest.approx(29.5)
+
+
+def test_compact_keeps_recent(database):
+    """Verify readings newer than the tier age are not changed."""
+
+    database.save_all([make_entry(minute, 1.0) for minute in range(10)])
+
+    compactor = Compactor(database, tiers=[(7, 300)], pause=0)
+
+    assert compactor.compact(START + timedelta(days=6)) == 0
+    assert len(database.query("NOAA", "KDEN")) == 10
+
+
+def test_compact_large_bucket(database):
+    """Verify a bucket larger than the batch size is compacted to a single reading."""
+
+    database.save_all([make_entry(minute, float(minute)) for minute in range(60)])
+
+    compactor = Compactor(database, tiers=[(7, 3600)], batch_size=25, pause=0)
+
+    assert compactor.compact(START + timedelta(days=8)) == 60
+
+    readings = database.query("NOAA", "KDEN")
+
+    assert len(readings) == 1
+    assert readings[0].temperature == pytest.approx(29.5)
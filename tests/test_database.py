@@ -0,0 +1,125 @@
+"""Unit tests for the weather database."""
+
+from datetime import UTC, datetime
+
+import sqlalchemy as sql
+
+from wxdat.database import StationRecord, WeatherDatabase
+from wxdat.observation import WeatherObservation
+
+
+def make_entry(idx, station_id="KDEN"):
+    return WeatherObservation(
+        timestamp=datetime(2024, 1, 1, 12, idx, tzinfo=UTC),
+        provider="NOAA",
+        station_id=station_id,
+        temperature=32.0 + idx,
+        humidity=0.5,
+    )
+
+
+def test_database_station_keys(tmp_path):
+    """Verify readings from the same station share a single station record."""
+
+    database = WeatherDatabase(f"sqlite:///{tmp_path}/weather.db")
+
+    assert database.save(make_entry(0))
+    assert database.save_all([make_entry(1), make_entry(2, "KBJC")])
+
+    with database.session() as session:
+        assert session.query(StationRecord).count() == 2
+
+    readings = database.query("NOAA", "KDEN")
+
+    assert [entry.temperature for entry in readings] == [32.0, 33.0]
+    assert readings[0].station_id == "KDEN"
+    assert readings[0].humidity == 0.5
+
+
+def legacy_table(metadata):
+    """Define current_conditions as it was before station keys (and resolution)."""
+
+    columns = [
+        sql.Column("id", sql.Integer, primary_key=True),
+        sql.Column("timestamp", sql.DateTime(True)),
+        sql.Column("provider", sql.String(256)),
+        sql.Column("station_id", sql.String(256)),
+    ]
+
+    columns += [
+        sql.Column(name, sql.Float())
+        for name in (
+            "temperature",
+            "feels_like",
+            "dew_point",
+            "wind_speed",
+            "wind_gusts",
+            "wind_bearing",
+            "humidity",
+            "precip_hour",
+            "precip_day",
+            "precip_week",
+            "precip_month",
+            "precip_year",
+            "precip_total",
+            "rel_pressure",
+            "abs_pressure",
+            "cloud_cover",
+            "visibility",
+            "uv_index",
+            "ozone",
+            "solar_lux",
+            "solar_rad",
+        )
+    ]
+
+    return sql.Table("current_conditions", metadata, *columns, sql.Column("remarks", sql.Text()))
+
+
+def test_database_migrates_station_columns(tmp_path):
+    """Verify readings saved with the original schema are migrated in place."""
+
+    url = f"sqlite:///{tmp_path}/weather.db"
+    engine = sql.create_engine(url)
+
+    table = legacy_table(sql.MetaData())
+
+    with engine.begin() as conn:
+        table.create(conn)
+        rows = [
+            (1, datetime(2024, 1, 1, 12, 0), "KDEN", 32.0, None),
+            (2, datetime(2024, 1, 1, 12, 5), "KBJC", 40.0, None),
+            (3, datetime(2024, 1, 1, 12, 10), "KDEN", 33.0, "clear"),
+        ]
+
+        for idx, timestamp, station_id, temperature, remarks in rows:
+            conn.execute(
+                sql.insert(table).values(
+                    id=idx,
+                    timestamp=timestamp,
+                    provider="NOAA",
+                    station_id=station_id,
+                    temperature=temperature,
+                    remarks=remarks,
+                )
+            )
+
+    engine.dispose()
+
+    database = WeatherDatabase(url)
+
+    readings = database.query("NOAA", "KDEN")
+
+    assert [entry.id for entry in readings] == [1, 3]
+    assert readings[1].remarks == "clear"
+
+    # new readings are numbered after the migrated ones
+    assert database.save_all([make_entry(20)])
+    assert [entry.id for entry in database.query("NOAA", "KDEN")] == [1, 3, 4]
+
+    columns = {
+        column["name"] for column in sql.inspect(database.engine).get_columns("current_conditions")
+    }
+
+    assert "provider" not in columns
+    assert {"station_key", "resolution"} <= columns
@@ -0,0 +1,101 @@
+"""Unit tests for hedged provider requests."""
+
+import itertools
+import time
+
+from wxdat.hedge import LatencyTracker, hedged_call
+from wxdat.providers import noaa
+
+
+def make_tracker(name, latency):
+    """Return a tracker with a consistent latency history."""
+
+    tracker = LatencyTracker(name, min_samples=5)
+
+    for _ in range(10):
+        tracker.record(latency)
+
+    return tracker
+
+
+def test_no_hedge_without_history():
+    """Verify requests are not hedged until the latency is known."""
+
+    tracker = LatencyTracker("nohistory.local")
+    calls = itertools.count()
+
+    assert hedged_call(lambda: next(calls), tracker) == 0
+    assert next(calls) == 1
+
+
+def test_hedge_returns_fastest():
+    """Verify a slow request is hedged and the faster result is used."""
+
+    tracker = make_tracker("slow.local", 0.05)
+    calls = itertools.count()
+
+    def request():
+        attempt = next(calls)
+
+        # the first attempt hangs well past the usual latency
+        if attempt == 0:
+            time.sleep(2)
+
+        return attempt
+
+    started = time.monotonic()
+    result = hedged_call(request, tracker, timeout=5)
+
+    assert result == 1
+    assert time.monotonic() - started < 1
+
+
+def test_hedge_ignores_failed_result():
+    """Verify a failed attempt does not win the race."""
+
+    tracker = make_tracker("flaky.local", 0.05)
+    calls = itertools.count()
+
+    def request():
+        attempt = next(calls)
+
+        if attempt == 0:
+            time.sleep(0.2)
+            return "slow"
+
+        return None
+
+    assert hedged_call(request, tracker, timeout=5) == "slow"
+
+
+def test_hedge_uses_hedge_function():
+    """Verify the second attempt calls the hedge function (e.g. to take a rate limit slot)."""
+
+    tracker = make_tracker("limited.local", 0.05)
+    hedges = []
+
+    def request():
+        time.sleep(1)
+        return "first"
+
+    def hedge():
+        hedges.append(True)
+        return "hedge"
+
+    assert hedged_call(request, tracker, timeout=5, hedge=hedge) == "hedge"
+    assert hedges == [True]
+
+
+def test_hedge_timeout_honors_deadline():
+    """Verify hedged requests do not wait past the cycle deadline."""
+
+    station = noaa.Station("Hedge Test Station", station="KDEN")
+
+    assert station._hedge_timeout() == station.read_timeout
+
+    with station.cycle_deadline(2):
+        assert station._hedge_timeout() <= 2
+
+    # explicit timeouts (e.g. for batch requests) replace the deadline
+    with station.cycle_deadline(2):
+        assert station._hedge_timeout((5, 10)) == 10
@@ -0,0 +1,85 @@
+"""Unit tests for loading station inventories."""
+
+import pytest
+import sqlalchemy as sql
+
+from wxdat.config import AppConfig, InventoryConfig, NOAA_Config, WeatherUndergroundConfig
+from wxdat.inventory import load_stations
+
+CREDENTIALS = {"wunderground": {"api_key": "SECRET"}}
+
+INVENTORY_CSV = """name,provider,credentials,station,station_id,update_interval
+Denver NOAA,NOAA,,KDEN,,600
+Denver PWS,WUndergroundPWS,wunderground,,KDEN,
+"""
+
+
+def test_load_csv(tmp_path):
+    """Verify stations are loaded from CSV rows with referenced credentials."""
+
+    path = tmp_path / "stations.csv"
+    path.write_text(INVENTORY_CSV)
+
+    stations = load_stations(InventoryConfig(path=str(path)), CREDENTIALS)
+
+    assert len(stations) == 2
+
+    assert isinstance(stations[0], NOAA_Config)
+    assert stations[0].station == "KDEN"
+    assert stations[0].update_interval == 600
+
+    assert isinstance(stations[1], WeatherUndergroundConfig)
+    assert stations[1].api_key == "SECRET"
+    assert stations[1].update_interval is None
+
+
+def test_load_table(tmp_path):
+    """Verify stations are loaded from a database table."""
+
+    url = f"sqlite:///{tmp_path}/inventory.db"
+    engine = sql.create_engine(url)
+
+    with engine.begin() as conn:
+        conn.execute(sql.text("CREATE TABLE inventory (name TEXT, provider TEXT, station TEXT)"))
+        conn.execute(sql.text("INSERT INTO inventory VALUES ('Seattle', 'NOAA', 'KSEA')"))
+
+    engine.dispose()
+
+    stations = load_stations(InventoryConfig(table="inventory"), {}, database=url)
+
+    assert [station.name for station in stations] == ["Seattle"]
+
+
+def test_unknown_credentials(tmp_path):
+    """Verify rows must reference credentials from the config."""
+
+    path = tmp_path / "stations.csv"
+    path.write_text(INVENTORY_CSV)
+
+    with pytest.raises(ValueError, match="unknown credentials"):
+        load_stations(InventoryConfig(path=str(path)), {})
+
+
+def test_config_includes_inventory(tmp_path):
+    """Verify inventory stations are added to the stations in the config file."""
+
+    (tmp_path / "stations.csv").write_text(INVENTORY_CSV)
+
+    config_file = tmp_path / "wxdat.yaml"
+    config_file.write_text(
+        f"""
+stations:
+  - name: Boise
+    provider: NOAA
+    station: KBOI
+inventory:
+  path: {tmp_path}/stations.csv
+credentials:
+  wunderground:
+    api_key: SECRET
+"""
+    )
+
+    config = AppConfig.load(str(config_file))
+
+    assert [station.name for station in config.stations] == ["Boise", "Denver NOAA", "Denver PWS"]
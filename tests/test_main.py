@@ -0,0 +1,156 @@
+"""Unit tests for the main app."""
+
+import pytest
+
+from wxdat import __main__
+from wxdat.__main__ import MainApp
+from wxdat.config import AppConfig
+
+
+class FakeRecorder:
+    """Stand-in for DataRecorder that does not poll the station."""
+
+    def __init__(self, station, writer, interval, **kwargs):
+        self.station = station
+        self.interval = interval
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.cancel()
+
+    def cancel(self):
+        self.running = False
+        self.station.cancel()
+
+    def join(self, timeout=None):
+        return True
+
+
+def make_config(tmp_path, stations, **kwargs):
+    stations = [
+        {"name": name, "provider": "NOAA", "station": station} for name, station in stations
+    ]
+
+    return AppConfig(database=f"sqlite:///{tmp_path}/wxdat.db", stations=stations, **kwargs)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(__main__, "DataRecorder", FakeRecorder)
+
+    config = make_config(tmp_path, [("Denver", "KDEN"), ("Seattle", "KSEA"), ("Boise", "KBOI")])
+    app = MainApp(config)
+
+    for obs in app.observers:
+        obs.start()
+
+    return app
+
+
+def test_reload_only_changed_stations(app, tmp_path):
+    """Verify reloading only replaces recorders for stations that changed."""
+
+    before = dict(app.recorders)
+
+    config = make_config(tmp_path, [("Denver", "KDEN"), ("Seattle", "KBFI"), ("Portland", "KPDX")])
+    app.reload(config)
+
+    assert set(app.recorders) == {"Denver", "Seattle", "Portland"}
+
+    # unchanged stations keep the same recorder
+    assert app.recorders["Denver"] is before["Denver"]
+
+    assert app.recorders["Seattle"] is not before["Seattle"]
+    assert app.recorders["Seattle"].station.station == "KBFI"
+
+    assert not before["Seattle"].running
+    assert not before["Boise"].running
+
+    assert all(obs.running for obs in app.observers)
+
+
+def test_reload_releases_quota(app, tmp_path):
+    """Verify stations removed by a reload no longer share the quota budget."""
+
+    def accuweather(*locations):
+        stations = [
+            {
+                "name": f"accu-{location}",
+                "provider": "AccuWeather",
+                "api_key": "reload-quota",
+                "location": location,
+                "daily_quota": 50,
+                "quota_file": f"{tmp_path}/quota.json",
+            }
+            for location in locations
+        ]
+
+        return AppConfig(database=f"sqlite:///{tmp_path}/wxdat.db", stations=stations)
+
+    app.reload(accuweather(1, 2))
+
+    budget = app.recorders["accu-1"].station.quota
+    assert len(budget.stations) == 2
+
+    # each reload replaces one of the stations
+    for location in range(3, 6):
+        app.reload(accuweather(1, location))
+
+        assert len(budget.stations) == 2
+        assert set(budget.stations) == {obs.station for obs in app.observers}
+
+
+def test_reload_global_interval(app, tmp_path):
+    """Verify a change to the default interval restarts the affected recorders."""
+
+    before = dict(app.recorders)
+
+    config = make_config(
+        tmp_path,
+        [("Denver", "KDEN"), ("Seattle", "KSEA"), ("Boise", "KBOI")],
+        update_interval=60,
+    )
+    app.reload(config)
+
+    for name, recorder in app.recorders.items():
+        assert recorder is not before[name]
+        assert recorder.interval == 60
+
+    assert app.config.update_interval == 60
+
+
+def test_reload_ignores_database(app, tmp_path):
+    """Verify settings that need a restart are not applied by a reload."""
+
+    database = app.config.database
+
+    config = make_config(tmp_path, [("Denver", "KDEN")])
+    config.database = "sqlite:///other.db"
+
+    app.reload(config)
+
+    assert app.config.database == database
+    assert set(app.recorders) == {"Denver"}
+
+
+def test_shutdown_is_bounded(app):
+    """Verify shutdown signals all recorders and reports those that do not stop."""
+
+    stuck = app.recorders["Seattle"]
+    stuck.join = lambda timeout=None: False
+
+    assert not app.shutdown(1)
+
+    assert all(not obs.running for obs in app.observers)
+
+
+def test_partitions_require_sql_database(tmp_path):
+    """Verify partitioning is rejected for databases other than SQL."""
+
+    config = AppConfig(database=f"tsstore://{tmp_path}/store", partitions={})
+
+    with pytest.raises(ValueError, match="requires a SQL database"):
+        MainApp(config)
@@ -0,0 +1,33 @@
+"""Unit tests for weather observations."""
+
+import dataclasses
+from datetime import UTC, datetime
+
+import pytest
+
+from wxdat.observation import OBSERVATION_FIELDS, WeatherObservation
+
+
+def test_observation_is_immutable():
+    """Verify observations cannot be modified once created."""
+
+    obs = WeatherObservation(
+        timestamp=datetime(2024, 1, 1, tzinfo=UTC),
+        provider="NOAA",
+        station_id="KDEN",
+        temperature=32.0,
+    )
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        obs.temperature = 40.0
+
+    # slotted instances do not carry a per-instance dict
+    assert not hasattr(obs, "__dict__")
+
+
+def test_observation_fields_match_database():
+    """Verify every observation field is stored by the database."""
+
+    from wxdat.database import CurrentConditions
+
+    assert set(OBSERVATION_FIELDS) <= set(CurrentConditions.fields())
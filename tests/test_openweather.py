@@ -1,6 +1,7 @@
 """Unit tests for the OpenWeatherMap provider."""
 
 import os
+import threading
 
 import pytest
 
@@ -53,3 +54,140 @@ def test_openweather_conditions(station: openweather.Station):
 
     assert conditions is not None
     assert conditions.timestamp is not None
+
+
+class FakeResponse:
+    def __init__(self, lat, lon):
+        self.lat = lat
+        self.lon = lon
+
+    def json(self):
+        # a response without the required fields for this latitude
+        if self.lat == 0:
+            return {"dt": 1736359800}
+
+        return {
+            "dt": 1736359800,
+            "id": 5419384,
+            "name": "Denver",
+            "timezone": -25200,
+            "coord": {"lat": self.lat, "lon": self.lon},
+            "main": {"temp": 30.6, "humidity": 56, "pressure": 1028},
+            "wind": {"deg": 157, "speed": 2.2},
+            "clouds": {"all": 0},
+            "visibility": 10000,
+        }
+
+
+def make_grid(api_key, latitudes):
+    return [
+        openweather.Station(
+            f"Grid {lat}",
+            api_key=api_key,
+            latitude=lat,
+            longitude=-105.0,
+            calls_per_minute=6000,
+        )
+        for lat in latitudes
+    ]
+
+
+def test_openweather_batch(monkeypatch):
+    """Verify stations on the same key are fetched together in one batch."""
+
+    calls = []
+
+    def fake_get(self, url, params=None, headers=None, rate_limit=True, timeout=None):
+        calls.append((params["lat"], params["lon"]))
+        return FakeResponse(params["lat"], params["lon"])
+
+    monkeypatch.setattr(openweather.Station, "safer_get", fake_get)
+
+    stations = make_grid("batch-test", [39.0, 40.0, 41.0])
+
+    readings = [station.observe for station in stations]
+
+    assert len(calls) == 3
+    assert [reading.station_id for reading in readings] == [s.station_id for s in stations]
+
+
+def test_openweather_batch_invalid_item(monkeypatch):
+    """Verify one malformed response does not fail the batch for other stations."""
+
+    def fake_get(self, url, params=None, headers=None, rate_limit=True, timeout=None):
+        return FakeResponse(params["lat"], params["lon"])
+
+    monkeypatch.setattr(openweather.Station, "safer_get", fake_get)
+
+    bad, good = make_grid("invalid-item-test", [0, 39.0])
+
+    assert bad.observe is None
+    assert good.observe is not None
+
+
+def test_openweather_batch_ignores_station_deadline(monkeypatch):
+    """Verify a slow batch runs once and is not bound to a station's deadline."""
+
+    calls = []
+    release = threading.Event()
+
+    def fake_get(self, url, params=None, headers=None, rate_limit=True, timeout=None):
+        calls.append(timeout)
+        release.wait(5)
+        return FakeResponse(params["lat"], params["lon"])
+
+    monkeypatch.setattr(openweather.Station, "safer_get", fake_get)
+
+    stations = make_grid("slow-batch-test", [39.0, 40.0])
+
+    # the batch is still running when each station's deadline passes
+    for station in stations:
+        with station.cycle_deadline(0.05):
+            assert station.observe is None
+
+    release.set()
+
+    with stations[0].cycle_deadline(5):
+        assert stations[0].observe is not None
+
+    assert len(calls) == 2
+    assert all(timeout == (5.0, 30.0) for timeout in calls)
+
+
+def test_openweather_batch_stale_locations(monkeypatch):
+    """Verify stations polling on different intervals only refetch stale locations."""
+
+    calls = []
+
+    def fake_get(self, url, params=None, headers=None, rate_limit=True, timeout=None):
+        calls.append(params["lat"])
+        return FakeResponse(params["lat"], params["lon"])
+
+    monkeypatch.setattr(openweather.Station, "safer_get", fake_get)
+
+    fast, slow = make_grid("stale-batch-test", [39.0, 40.0])
+
+    now = 0
+    fast.batch.clock = lambda: now
+
+    # the fast station polls every 30 seconds, the slow station every 300
+    for now in range(0, 601, 30):
+        assert fast.observe is not None
+
+        if now % 300 == 0:
+            assert slow.observe is not None
+
+    assert calls.count(39.0) == 21
+
+    # the slow station joins the fast station's batch once its interval is known
+    assert calls.count(40.0) == 3
+
+
+def test_openweather_batch_conflicting_limits():
+    """Verify the lowest rate limit applies to stations sharing an API key."""
+
+    first = openweather.Batch.get("limit-test", 600)
+    second = openweather.Batch.get("limit-test", 60)
+
+    assert first is second
+    assert first.calls_per_minute == 60
@@ -0,0 +1,66 @@
+"""Unit tests for monthly partitions of readings."""
+
+from datetime import UTC, datetime
+
+import pytest
+import sqlalchemy as sql
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from wxdat.database import WeatherDatabase
+from wxdat.partition import (
+    add_months,
+    expired_partitions,
+    partition_month,
+    partition_name,
+    partitioned_table,
+)
+
+
+def test_partition_months():
+    """Verify month arithmetic across year boundaries."""
+
+    month = datetime(2024, 11, 1, tzinfo=UTC)
+
+    assert add_months(month, 2) == datetime(2025, 1, 1, tzinfo=UTC)
+    assert add_months(month, -11) == datetime(2023, 12, 1, tzinfo=UTC)
+
+    assert partition_name(month) == "current_conditions_2024_11"
+    assert partition_month("current_conditions_2024_11") == month
+    assert partition_month("current_conditions_default") is None
+
+
+def test_partition_retention():
+    """Verify only partitions entirely past the retention period expire."""
+
+    names = [
+        "current_conditions_default",
+        "current_conditions_2023_12",
+        "current_conditions_2024_01",
+        "current_conditions_2024_02",
+        "current_conditions_2024_03",
+    ]
+
+    now = datetime(2024, 3, 15, tzinfo=UTC)
+
+    assert expired_partitions(names, now, retention=2) == [
+        "current_conditions_2023_12",
+    ]
+
+
+def test_partition_table_ddl():
+    """Verify the partitioned table includes the partition key in its primary key."""
+
+    table = partitioned_table(sql.MetaData())
+    ddl = str(CreateTable(table).compile(dialect=postgresql.dialect()))
+
+    assert "id SERIAL NOT NULL" in ddl
+    assert "PRIMARY KEY (id, timestamp)" in ddl
+    assert "PARTITION BY RANGE (timestamp)" in ddl
+
+
+def test_partition_requires_postgres(tmp_path):
+    """Verify partitioning is rejected for other databases."""
+
+    with pytest.raises(ValueError):
+        WeatherDatabase(f"sqlite:///{tmp_path}/weather.db", partitioned=True)
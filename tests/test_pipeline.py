@@ -0,0 +1,240 @@
+"""Unit tests for the persistence pipeline."""
+
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from wxdat.pipeline import QueuePolicy, Writer, WriterPool
+from wxdat.providers import noaa
+
+
+class MemoryDatabase:
+    """Stand-in database that keeps saved entries in memory."""
+
+    def __init__(self, online=True):
+        self.online = online
+        self.entries = []
+        self.commits = 0
+
+    def save(self, entry):
+        return self.save_all([entry])
+
+    def save_all(self, entries, strict=False):
+        if not self.online:
+            if strict:
+                raise OperationalError("INSERT", {}, ConnectionError("offline"))
+
+            return False
+
+        self.entries.extend(entries)
+        self.commits += 1
+
+        return True
+
+
+def make_station():
+    return noaa.Station("Pipeline Test Station", station="KDEN")
+
+
+def test_writer_saves_inline():
+    """Verify the synchronous writer saves immediately."""
+
+    database = MemoryDatabase()
+    writer = Writer(database)
+
+    assert writer.submit(make_station(), "reading")
+    assert database.entries == ["reading"]
+
+
+def test_writer_reports_failure():
+    """Verify the writer reports readings that could not be saved."""
+
+    writer = Writer(MemoryDatabase(online=False))
+
+    assert not writer.submit(make_station(), "reading")
+
+
+def test_pool_drains_queue_on_stop():
+    """Verify pending readings are saved when the pool stops."""
+
+    database = MemoryDatabase()
+    pool = WriterPool(database, workers=2, queue_size=100)
+    station = make_station()
+
+    pool.start()
+
+    for idx in range(50):
+        assert pool.submit(station, idx)
+
+    pool.stop()
+
+    assert sorted(database.entries) == list(range(50))
+
+
+def test_pool_drops_newest_when_full():
+    """Verify the drop_newest policy rejects readings when the queue is full."""
+
+    database = MemoryDatabase()
+    pool = WriterPool(database, workers=1, queue_size=2, policy=QueuePolicy.DROP_NEWEST)
+    station = make_station()
+
+    # the writers have not started yet, so the queue fills up after two readings
+    results = [pool.submit(station, idx) for idx in range(3)]
+
+    pool.start()
+    pool.stop()
+
+    assert results == [True, True, False]
+
+    assert database.entries == [0, 1]
+
+
+def test_pool_drops_oldest_when_full():
+    """Verify the drop_oldest policy replaces the oldest queued reading."""
+
+    database = MemoryDatabase()
+    pool = WriterPool(database, workers=1, queue_size=2, policy=QueuePolicy.DROP_OLDEST)
+    station = make_station()
+
+    results = [pool.submit(station, idx) for idx in range(4)]
+
+    pool.start()
+    pool.stop()
+
+    assert all(results)
+    assert database.entries == [2, 3]
+
+
+def test_pool_drop_oldest_keeps_sentinel():
+    """Verify dropping the oldest reading does not discard a stop sentinel."""
+
+    database = MemoryDatabase()
+    pool = WriterPool(database, workers=1, queue_size=1, policy=QueuePolicy.DROP_OLDEST)
+    station = make_station()
+
+    # the sentinel queued by stop() fills the queue
+    pool.queue.put(None)
+
+    assert not pool.submit(station, 0)
+    assert pool.queue.get_nowait() is None
+
+
+def test_pool_rejects_after_stop():
+    """Verify readings submitted while stopping are not queued behind the sentinels."""
+
+    database = MemoryDatabase()
+    pool = WriterPool(database, workers=1, policy=QueuePolicy.DROP_OLDEST)
+    station = make_station()
+
+    pool.start()
+    pool.stop()
+
+    assert not pool.submit(station, 0)
+    assert pool.queue.empty()
+
+
+def test_pool_groups_commits():
+    """Verify readings waiting in the queue are saved together."""
+
+    database = MemoryDatabase()
+    pool = WriterPool(database, workers=1, queue_size=100, batch_size=10)
+    station = make_station()
+
+    # queue readings before the writer starts so they are all waiting
+    for idx in range(25):
+        assert pool.submit(station, idx)
+
+    pool.start()
+    pool.stop()
+
+    assert database.entries == list(range(25))
+    assert database.commits == 3
+
+
+class StalledDatabase(MemoryDatabase):
+    """Stand-in database that blocks on save until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def save_all(self, entries, strict=False):
+        self.release.wait()
+        return super().save_all(entries, strict)
+
+
+def test_pool_stop_timeout_drops_pending():
+    """Verify stopping is bounded and pending readings are reported as dropped."""
+
+    database = StalledDatabase()
+    pool = WriterPool(database, workers=1, queue_size=100, batch_size=1)
+    station = make_station()
+
+    pool.start()
+
+    for idx in range(10):
+        assert pool.submit(station, idx)
+
+    started = time.monotonic()
+    dropped = pool.stop(timeout=0.2)
+
+    assert time.monotonic() - started < 1
+
+    # one reading is held by the stalled writer; the rest are dropped
+    assert dropped == 9
+
+    database.release.set()
+
+
+class MemorySpool:
+    def __init__(self):
+        self.entries = []
+
+    def append(self, entry):
+        self.entries.append(entry)
+        return True
+
+
+class RejectingDatabase(MemoryDatabase):
+    """Stand-in database that rejects negative readings."""
+
+    def save_all(self, entries, strict=False):
+        if any(entry < 0 for entry in entries):
+            if strict:
+                raise IntegrityError("INSERT", {}, ValueError("negative"))
+
+            return False
+
+        return super().save_all(entries, strict)
+
+
+def test_batch_retries_data_errors_individually():
+    """Verify one bad reading does not fail the rest of the batch."""
+
+    database = RejectingDatabase()
+    spool = MemorySpool()
+    writer = Writer(database, spool)
+    station = make_station()
+
+    writer.write_batch([(station, 1), (station, -1), (station, 2)])
+
+    assert database.entries == [1, 2]
+    assert spool.entries == [-1]
+
+
+def test_batch_spooled_when_offline():
+    """Verify a batch is spooled without retrying each reading while offline."""
+
+    database = MemoryDatabase(online=False)
+    spool = MemorySpool()
+    writer = Writer(database, spool)
+    station = make_station()
+
+    calls = []
+    database.save = calls.append
+
+    writer.write_batch([(station, idx) for idx in range(5)])
+
+    assert calls == []
+    assert spool.entries == list(range(5))
@@ -0,0 +1,95 @@
+"""Unit tests for the profiling endpoint."""
+
+import threading
+
+from prometheus_client import CollectorRegistry
+
+from wxdat.profiling import DebugApp
+
+
+def request(app, path, query=""):
+    """Call the WSGI app; returns (status, body)."""
+
+    response = {}
+
+    def start_response(status, headers):
+        response["status"] = status
+
+    body = b"".join(app({"PATH_INFO": path, "QUERY_STRING": query}, start_response))
+
+    return response["status"], body.decode("utf-8")
+
+
+def busy_thread(name):
+    """Start a daemon thread that waits until the returned event is set."""
+
+    done = threading.Event()
+
+    def waiting_for_profile():
+        done.wait()
+
+    threading.Thread(name=name, target=waiting_for_profile, daemon=True).start()
+
+    return done
+
+
+def test_stack_snapshot():
+    """Verify the stack of each thread is included in the snapshot."""
+
+    app = DebugApp(CollectorRegistry())
+    done = busy_thread("NOAA-test")
+
+    try:
+        status, body = request(app, "/debug/stacks")
+    finally:
+        done.set()
+
+    assert status == "200 OK"
+    assert "--- NOAA-test" in body
+    assert "waiting_for_profile" in body
+
+
+def test_profile_collapsed_stacks():
+    """Verify profiles report collapsed stacks for the selected threads."""
+
+    app = DebugApp(CollectorRegistry())
+    done = busy_thread("NOAA-test")
+
+    try:
+        status, body = request(app, "/debug/profile", "seconds=0.1&thread=NOAA")
+    finally:
+        done.set()
+
+    assert status == "200 OK"
+
+    lines = body.splitlines()
+    assert lines
+
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+
+        assert stack.startswith("NOAA-test;")
+        assert "waiting_for_profile" in stack
+        assert int(count) > 0
+
+
+def test_profile_rejects_bad_duration():
+    """Verify the length of a profile is limited."""
+
+    app = DebugApp(CollectorRegistry())
+
+    assert request(app, "/debug/profile", "seconds=3600")[0] == "400 Bad Request"
+    assert request(app, "/debug/profile", "seconds=abc")[0] == "400 Bad Request"
+
+
+def test_metrics_passthrough():
+    """Verify other requests are handled by the metrics app."""
+
+    app = DebugApp(CollectorRegistry())
+
+    environ = {"PATH_INFO": "/metrics", "QUERY_STRING": "", "REQUEST_METHOD": "GET"}
+    statuses = []
+
+    app(environ, lambda status, headers: statuses.append(status))
+
+    assert statuses == ["200 OK"]
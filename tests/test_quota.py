@@ -0,0 +1,114 @@
+"""Unit tests for daily quota budgets."""
+
+from datetime import UTC, datetime
+
+from wxdat.quota import QuotaBudget
+
+MIDNIGHT = datetime(2024, 6, 1, tzinfo=UTC).timestamp()
+
+
+class FakeClock:
+    """Manually advanced clock for testing."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_budget_spreads_calls(tmp_path):
+    """Verify calls are spaced evenly over the rest of the day."""
+
+    clock = FakeClock(MIDNIGHT)
+    budget = QuotaBudget("key", 24, path=tmp_path / "quota.json", clock=clock)
+
+    # one call per hour is allowed
+    assert budget.acquire("station")
+    assert not budget.acquire("station")
+
+    clock.now += 3600
+    assert budget.acquire("station")
+    assert budget.remaining == 22
+
+
+def test_budget_shared_fairly(tmp_path):
+    """Verify stations on the same key each get a share of the budget."""
+
+    clock = FakeClock(MIDNIGHT)
+    budget = QuotaBudget("key", 24, path=tmp_path / "quota.json", clock=clock)
+
+    budget.register("alpha")
+    budget.register("bravo")
+
+    assert budget.acquire("alpha")
+    assert budget.acquire("bravo")
+
+    # each station now gets one call about every two hours
+    clock.now += 3600
+    assert not budget.acquire("alpha")
+
+    clock.now += 3600
+    assert budget.acquire("alpha")
+
+
+def test_budget_exhausted_until_reset(tmp_path):
+    """Verify no calls are allowed once the quota is used up."""
+
+    clock = FakeClock(MIDNIGHT + 23 * 3600)
+    budget = QuotaBudget("key", 1, path=tmp_path / "quota.json", clock=clock)
+
+    assert budget.acquire("station")
+
+    clock.now += 1800
+    assert not budget.acquire("station")
+
+    clock.now += 1800
+    assert budget.acquire("station")
+
+
+def test_budget_persists_usage(tmp_path):
+    """Verify usage is restored after a restart."""
+
+    clock = FakeClock(MIDNIGHT)
+    path = tmp_path / "quota.json"
+
+    budget = QuotaBudget("key", 10, path=path, clock=clock)
+    budget.acquire("station")
+
+    restored = QuotaBudget("key", 10, path=path, clock=clock)
+
+    assert restored.remaining == 9
+
+
+def test_budget_shared_between_processes(tmp_path):
+    """Verify budgets in separate workers count usage from the same file."""
+
+    clock = FakeClock(MIDNIGHT)
+    path = tmp_path / "quota.json"
+
+    # each worker process has its own budget for the key
+    first = QuotaBudget("key", 24, path=path, clock=clock)
+    second = QuotaBudget("key", 24, path=path, clock=clock)
+
+    assert first.acquire("alpha")
+    assert second.acquire("bravo")
+
+    assert second.remaining == 22
+
+    clock.now += 7200
+    assert first.acquire("alpha")
+
+    assert first.remaining == 21
+
+
+def test_budget_reload_updates_limit(tmp_path):
+    """Verify a changed quota is applied to an existing budget."""
+
+    path = tmp_path / "quota.json"
+
+    budget = QuotaBudget.get("reload-key", 10, path)
+    budget.acquire("station")
+
+    assert QuotaBudget.get("reload-key", 20, path) is budget
+    assert budget.remaining == 19
@@ -0,0 +1,61 @@
+"""Unit tests for recording readings from a station."""
+
+from datetime import UTC, datetime, timedelta
+
+from wxdat.observation import WeatherObservation
+from wxdat.providers import noaa
+from wxdat.recorder import DataRecorder
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+
+class FakeWriter:
+    def __init__(self):
+        self.saved = []
+
+    def submit(self, station, obs):
+        self.saved.append(obs)
+
+
+def make_obs(minute):
+    return WeatherObservation(
+        timestamp=START + timedelta(minutes=minute),
+        provider="NOAA",
+        station_id="KDEN",
+        temperature=32.0,
+    )
+
+
+def test_recorder_skips_repeated_readings(monkeypatch):
+    """Verify a reading is only saved when its timestamp has advanced."""
+
+    readings = iter([make_obs(0), make_obs(0), make_obs(5), make_obs(1)])
+
+    monkeypatch.setattr(noaa.Station, "observe", property(lambda self: next(readings)))
+
+    writer = FakeWriter()
+    recorder = DataRecorder(noaa.Station("Recorder Test", station="KDEN"), writer, 60)
+
+    results = [recorder.record_current_conditions() for _ in range(4)]
+
+    assert results == [True, False, True, False]
+    assert [obs.timestamp for obs in writer.saved] == [make_obs(0).timestamp, make_obs(5).timestamp]
+
+    # pushed readings are checked against the same timestamp
+    assert not recorder.record_pushed_conditions(make_obs(5))
+    assert recorder.record_pushed_conditions(make_obs(6))
+
+
+def test_recorder_advance_requires_newer_timestamp():
+    """Verify a reading that has not advanced does not replace the last timestamp."""
+
+    recorder = DataRecorder(noaa.Station("Recorder Test", station="KDEN"), FakeWriter(), 60)
+
+    assert recorder._advance(make_obs(5))
+
+    assert not recorder._advance(make_obs(5))
+    assert not recorder._advance(make_obs(4))
+    assert recorder.last_timestamp == make_obs(5).timestamp
+
+    assert recorder._advance(make_obs(6))
+    assert recorder.last_timestamp == make_obs(6).timestamp
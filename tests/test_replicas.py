@@ -0,0 +1,104 @@
+"""Unit tests for routing reads to replicas."""
+
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from wxdat.database import CurrentConditions, WeatherDatabase
+from wxdat.replicas import ReplicaSet
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+
+def make_entry(minute, temperature):
+    return CurrentConditions(
+        timestamp=START + timedelta(minutes=minute),
+        provider="NOAA",
+        station_id="KDEN",
+        temperature=temperature,
+    )
+
+
+@pytest.fixture(scope="function")
+def databases(tmp_path):
+    replica_url = f"sqlite:///{tmp_path}/replica.db"
+
+    # the replica has a copy of the first reading only
+    replica = WeatherDatabase(replica_url)
+    replica.save(make_entry(0, 1.0))
+
+    primary = WeatherDatabase(f"sqlite:///{tmp_path}/primary.db")
+    primary.save_all([make_entry(0, 1.0), make_entry(1, 2.0)])
+
+    yield primary, replica_url
+
+
+def test_replica_serves_fresh_reads(databases):
+    """Verify reads go to a replica that is within the allowed lag."""
+
+    primary, replica_url = databases
+    primary.replicas = ReplicaSet(primary.engine, [replica_url], max_lag=300)
+
+    readings = primary.query("NOAA", "KDEN")
+
+    assert [entry.temperature for entry in readings] == [1.0]
+    assert primary.replicas.replicas[0].lag == 60
+
+
+def test_replica_fallback_when_stale(databases):
+    """Verify reads fall back to the primary when replicas are too far behind."""
+
+    primary, replica_url = databases
+    primary.replicas = ReplicaSet(primary.engine, [replica_url], max_lag=30)
+
+    readings = primary.query("NOAA", "KDEN")
+
+    assert [entry.temperature for entry in readings] == [1.0, 2.0]
+
+
+def test_replica_unavailable(databases, tmp_path):
+    """Verify replicas that cannot be reached are skipped."""
+
+    primary, _ = databases
+    missing = f"sqlite:///{tmp_path}/missing/replica.db"
+    primary.replicas = ReplicaSet(primary.engine, [missing])
+
+    assert primary.replicas.session() is None
+    assert len(primary.query("NOAA", "KDEN")) == 2
+
+
+def test_replica_check_does_not_block_reads(databases):
+    """Verify reads are routed while another caller is measuring the lag."""
+
+    primary, replica_url = databases
+    replicas = ReplicaSet(primary.engine, [replica_url], max_lag=300)
+
+    replicas.check()
+
+    probing = threading.Event()
+    release = threading.Event()
+
+    newest = replicas._newest
+
+    def slow_newest(engine):
+        probing.set()
+        release.wait(5)
+        return newest(engine)
+
+    replicas._newest = slow_newest
+    replicas._last_check = None
+
+    checker = threading.Thread(target=replicas.session)
+    checker.start()
+
+    assert probing.wait(5)
+
+    # the lag is being measured; reads use the previous measurement
+    started = time.monotonic()
+    assert replicas.session() is not None
+    assert time.monotonic() - started < 1
+
+    release.set()
+    checker.join()
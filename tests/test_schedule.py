@@ -0,0 +1,85 @@
+"""Unit tests for station polling schedules."""
+
+from datetime import UTC, datetime, timedelta
+
+from wxdat.schedule import AdaptiveSchedule, FixedSchedule
+
+EPOCH = datetime(2024, 6, 1, 12, 53, tzinfo=UTC)
+
+
+def publish(schedule, count, period):
+    """Feed the schedule a series of observations published every period seconds."""
+
+    for idx in range(count):
+        schedule.update(EPOCH + timedelta(seconds=idx * period))
+
+    return (EPOCH + timedelta(seconds=(count - 1) * period)).timestamp()
+
+
+def test_fixed_schedule():
+    """Verify the fixed schedule accounts for elapsed time."""
+
+    schedule = FixedSchedule(300)
+
+    assert schedule.next_delay(1000, 1010) == 290
+
+
+def test_adaptive_uses_interval_while_learning():
+    """Verify the adaptive schedule uses the interval until the cadence is known."""
+
+    schedule = AdaptiveSchedule(300)
+    last = publish(schedule, 2, 3600)
+
+    assert schedule.period is None
+    assert schedule.next_delay(last, last) == 300
+
+
+def test_adaptive_aligns_to_publication():
+    """Verify the adaptive schedule waits for the next expected publication."""
+
+    schedule = AdaptiveSchedule(300, lag=30)
+    last = publish(schedule, 5, 3600)
+
+    assert schedule.period == 3600
+
+    # we observed the latest reading 2 minutes after it was published
+    now = last + 120
+    assert schedule.next_delay(now, now) <= 300
+
+
+def test_adaptive_aligns_within_interval():
+    """Verify polls are aligned to publication when it is sooner than the interval."""
+
+    schedule = AdaptiveSchedule(900, lag=30)
+    last = publish(schedule, 5, 600)
+
+    now = last + 120
+    assert schedule.next_delay(now, now) == 600 + 30 - 120
+
+
+def test_adaptive_keeps_interval_on_failure():
+    """Verify failed polls wait for the interval instead of backing off from min_delay."""
+
+    schedule = AdaptiveSchedule(300, min_delay=10)
+    last = publish(schedule, 5, 60)
+
+    schedule.update(None)
+
+    assert schedule.stale_polls == 0
+    assert schedule.next_delay(last, last) == 300
+
+
+def test_adaptive_backs_off_when_stale():
+    """Verify stale readings back off exponentially up to the interval."""
+
+    schedule = AdaptiveSchedule(300, min_delay=10)
+    last = publish(schedule, 5, 60)
+
+    delays = []
+
+    for _ in range(8):
+        schedule.update(datetime.fromtimestamp(last, UTC))
+        delays.append(schedule.next_delay(last, last))
+
+    assert delays[:4] == [10, 20, 40, 80]
+    assert max(delays) == 300
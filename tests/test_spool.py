@@ -0,0 +1,113 @@
+"""Unit tests for the local spool."""
+
+from datetime import UTC, datetime
+
+import pytest
+import sqlalchemy as sql
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from wxdat.database import CurrentConditions, WeatherDatabase
+from wxdat.observation import WeatherObservation
+from wxdat.spool import Spool
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+
+class OfflineDatabase:
+    """Stand-in for a database that is not reachable."""
+
+    def save_all(self, entries, strict=False):
+        if strict:
+            raise OperationalError("INSERT", {}, ConnectionError("offline"))
+
+        return False
+
+
+def make_entry(idx):
+    return WeatherObservation(
+        timestamp=START.replace(minute=idx),
+        provider="NOAA",
+        station_id="KDEN",
+        temperature=32.0 + idx,
+    )
+
+
+@pytest.fixture(scope="function")
+def database(tmp_path):
+    yield WeatherDatabase(f"sqlite:///{tmp_path}/weather.db")
+
+
+def test_spool_holds_entries_while_offline(tmp_path):
+    """Verify entries remain in the spool while the database is unavailable."""
+
+    spool = Spool(OfflineDatabase(), path=tmp_path / "spool.db")
+
+    for idx in range(5):
+        assert spool.append(make_entry(idx))
+
+    assert spool.replay() == 0
+    assert len(spool) == 5
+
+
+def test_spool_drops_oldest_when_full(tmp_path):
+    """Verify the spool size is bounded."""
+
+    spool = Spool(OfflineDatabase(), path=tmp_path / "spool.db", max_entries=3)
+
+    for idx in range(5):
+        spool.append(make_entry(idx))
+
+    assert len(spool) == 3
+
+
+def test_spool_replays_in_batches(tmp_path, database):
+    """Verify spooled entries are saved to the database when it is available."""
+
+    spool = Spool(database, path=tmp_path / "spool.db", batch_size=2)
+
+    for idx in range(5):
+        spool.append(make_entry(idx))
+
+    assert spool.replay() == 5
+    assert len(spool) == 0
+
+    with database.session() as session:
+        temps = session.scalars(sql.select(CurrentConditions.temperature)).all()
+
+    assert sorted(temps) == [32.0, 33.0, 34.0, 35.0, 36.0]
+
+
+class RejectingDatabase:
+    """Stand-in for a database that rejects readings without a temperature."""
+
+    def __init__(self):
+        self.entries = []
+
+    def save_all(self, entries, strict=False):
+        if any(entry.temperature is None for entry in entries):
+            raise IntegrityError("INSERT", {}, ValueError("missing temperature"))
+
+        self.entries.extend(entries)
+
+        return True
+
+
+def test_spool_moves_rejected_entries(tmp_path):
+    """Verify an entry the database rejects does not block replaying the others."""
+
+    database = RejectingDatabase()
+    spool = Spool(database, path=tmp_path / "spool.db", batch_size=2)
+
+    spool.append(make_entry(0))
+    spool.append(WeatherObservation(timestamp=START, provider="NOAA", station_id="KDEN"))
+
+    for idx in range(1, 4):
+        spool.append(make_entry(idx))
+
+    assert spool.replay() == 4
+    assert len(spool) == 0
+
+    (dead,) = spool._conn.execute("SELECT COUNT(*) FROM spool_dead").fetchone()
+    assert dead == 1
+
+    assert [entry.temperature for entry in database.entries] == [32.0, 33.0, 34.0, 35.0]
@@ -0,0 +1,100 @@
+"""Unit tests for distributing stations across workers."""
+
+import time
+
+from wxdat.config import AppConfig, PartitionConfig, SpoolConfig
+from wxdat.hashring import HashRing
+from wxdat.supervisor import MAX_RESTART_DELAY, WorkerProcess, station_shard, worker_config
+
+
+def make_config(count):
+    stations = [
+        {"name": f"Station {idx}", "provider": "NOAA", "station": f"K{idx:03d}"}
+        for idx in range(count)
+    ]
+
+    return AppConfig(stations=stations, workers=4)
+
+
+def test_every_station_has_one_worker():
+    """Verify each station is assigned to exactly one worker."""
+
+    config = make_config(100)
+
+    shards = [station_shard(config, index, 4) for index in range(4)]
+    names = [station.name for shard in shards for station in shard]
+
+    assert len(names) == 100
+    assert set(names) == {station.name for station in config.stations}
+
+
+def test_adding_node_moves_few_keys():
+    """Verify that adding a node only moves a fraction of the keys."""
+
+    keys = [f"key-{idx}" for idx in range(1000)]
+
+    before = HashRing(range(4))
+    after = HashRing(range(5))
+
+    moved = [key for key in keys if before.lookup(key) != after.lookup(key)]
+
+    assert len(moved) < len(keys) / 2
+
+
+def test_empty_ring():
+    """Verify an empty ring does not own any keys."""
+
+    assert HashRing([]).lookup("anything") is None
+
+
+def test_crash_looping_worker_restart_is_scheduled():
+    """Verify restarting a crash looping worker backs off without blocking."""
+
+    worker = WorkerProcess(make_config(4), 0, 4)
+    worker.started = time.monotonic()
+
+    began = time.monotonic()
+
+    for _ in range(12):
+        worker.restart()
+
+    # scheduling a restart must never sleep in the supervisor loop
+    assert time.monotonic() - began < 1
+
+    assert worker.restart_at > time.monotonic()
+    assert worker.restart_delay == MAX_RESTART_DELAY
+
+
+def test_healthy_worker_restarts_immediately():
+    """Verify a worker that ran for a while is restarted right away."""
+
+    worker = WorkerProcess(make_config(4), 0, 4)
+    worker.started = time.monotonic() - 3600
+    worker.restart_delay = 64
+
+    worker.restart()
+
+    assert worker.restart_at <= time.monotonic()
+    assert worker.restart_delay == 1
+
+
+def test_workers_use_separate_spools():
+    """Verify each worker replays its own spool file."""
+
+    config = make_config(4)
+    config.spool = SpoolConfig(path="spool.db")
+
+    paths = [worker_config(config, index, 4).spool.path for index in range(4)]
+
+    assert paths == ["spool.db", "spool.db.1", "spool.db.2", "spool.db.3"]
+
+
+def test_first_worker_manages_partitions():
+    """Verify partitions are only maintained by a single worker."""
+
+    config = make_config(4)
+    config.partitions = PartitionConfig()
+
+    partitions = [worker_config(config, index, 4).partitions for index in range(4)]
+
+    assert partitions == [config.partitions, None, None, None]
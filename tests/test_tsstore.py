@@ -0,0 +1,106 @@
+"""Unit tests for the embedded time-series store."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from wxdat.database import CurrentConditions, WeatherDatabase, open_database
+from wxdat.tsstore import TimeSeriesStore
+
+
+def make_entry(idx, temperature=None):
+    return CurrentConditions(
+        timestamp=datetime(2024, 1, 1, 12, idx, tzinfo=UTC),
+        provider="NOAA",
+        station_id="KDEN",
+        temperature=temperature,
+    )
+
+
+@pytest.fixture(scope="function")
+def store(tmp_path):
+    store = TimeSeriesStore(tmp_path / "store")
+    yield store
+    store.close()
+
+
+def test_tsstore_open_by_url(tmp_path):
+    """Verify the storage backend is selected by the URL scheme."""
+
+    assert isinstance(open_database(f"tsstore://{tmp_path}/store"), TimeSeriesStore)
+    assert isinstance(open_database(f"sqlite:///{tmp_path}/weather.db"), WeatherDatabase)
+
+
+def test_tsstore_query_range(store):
+    """Verify range queries return readings in [start, end)."""
+
+    assert store.save_all([make_entry(idx, 32.0 + idx) for idx in range(10)])
+
+    readings = store.query(
+        "NOAA",
+        "KDEN",
+        start=datetime(2024, 1, 1, 12, 3, tzinfo=UTC),
+        end=datetime(2024, 1, 1, 12, 6, tzinfo=UTC),
+    )
+
+    assert [entry.temperature for entry in readings] == [35.0, 36.0, 37.0]
+    assert readings[0].timestamp == datetime(2024, 1, 1, 12, 3, tzinfo=UTC)
+    assert readings[0].humidity is None
+
+    assert store.query("NOAA", "KBJC") == []
+
+
+def test_tsstore_series(store):
+    """Verify a single field can be read directly from the mapped files."""
+
+    for idx in range(5):
+        assert store.save(make_entry(idx, 50.0 + idx))
+
+    with store.series("NOAA", "KDEN", "temperature", start=make_entry(2).timestamp) as (ts, val):
+        assert len(ts) == 3
+        assert list(val) == [52.0, 53.0, 54.0]
+
+
+def test_tsstore_skips_old_readings(store):
+    """Verify readings that are not newer than the last are skipped."""
+
+    assert store.save(make_entry(5, 1.0))
+    assert store.save(make_entry(5, 2.0))
+    assert store.save(make_entry(1, 3.0))
+
+    readings = store.query("NOAA", "KDEN")
+
+    assert [entry.temperature for entry in readings] == [1.0]
+
+
+def test_tsstore_repairs_partial_append(tmp_path):
+    """Verify columns longer than the time index are truncated on open."""
+
+    store = TimeSeriesStore(tmp_path)
+    store.save_all([make_entry(idx, float(idx)) for idx in range(3)])
+    store.close()
+
+    # simulate an append interrupted before the time index was written
+    column = next(tmp_path.glob("*/*/temperature.f64"))
+    with open(column, "ab") as fp:
+        fp.write(b"\x00" * 8)
+
+    store = TimeSeriesStore(tmp_path)
+    assert store.save(make_entry(3, 3.0))
+
+    readings = store.query("NOAA", "KDEN")
+    store.close()
+
+    assert [entry.temperature for entry in readings] == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_database_query_range(tmp_path):
+    """Verify the SQL database offers the same query interface."""
+
+    database = WeatherDatabase(f"sqlite:///{tmp_path}/weather.db")
+
+    assert database.save_all([make_entry(idx, 32.0 + idx) for idx in range(5)])
+
+    readings = database.query("NOAA", "KDEN", start=make_entry(1).timestamp)
+
+    assert [entry.temperature for entry in readings] == [33.0, 34.0, 35.0, 36.0]